@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from django.utils import timezone
+
+from learnlab import response_cache
+from learnlab.bulk_io import EXPORT_CHUNK_SIZE, ForeignKeyCache
+from . import versions
+from .models import Author, Book
+
+
+class BookCatalog:
+    """
+    Books for bulk import/export (learnlab/bulk_io.py): one row per
+    book, the author given by name. Rows are checked like BookSerializer
+    checks them; authors missing from the table are created.
+    """
+
+    MODEL = Book
+    COLUMNS = ('id', 'title', 'publication_year', 'author')
+    # bulk_update skips auto_now, so updated_at is set by build_batch()
+    UPDATE_FIELDS = ['title', 'publication_year', 'author', 'updated_at']
+
+    def __init__(self):
+        self.authors = ForeignKeyCache(Author, 'name')
+
+    def build_batch(self, rows):
+        parsed = [self.parse(row) for row in rows]
+        authors = self.authors.resolve({fields['author'] for fields in parsed if isinstance(fields, dict)})
+        now = timezone.now()
+        return [
+            Book(
+                pk=fields['id'], title=fields['title'], publication_year=fields['publication_year'],
+                author_id=authors[fields['author']], updated_at=now,
+            ) if isinstance(fields, dict) else fields
+            for fields in parsed
+        ]
+
+    def parse(self, row):
+        """The row's cleaned fields, or an error message."""
+        title = str(row.get('title') or '').strip()
+        author = str(row.get('author') or '').strip()
+        if not title or len(title) > Book._meta.get_field('title').max_length:
+            return 'title is required (at most 200 characters)'
+        if not author or len(author) > Author._meta.get_field('name').max_length:
+            return 'author is required (at most 100 characters)'
+        try:
+            publication_year = int(row.get('publication_year'))
+            pk = int(row['id']) if row.get('id') not in (None, '') else None
+        except (TypeError, ValueError):
+            return 'id and publication_year must be whole numbers'
+        if publication_year > datetime.now().year:
+            return 'publication_year cannot be in the future'
+        return {'id': pk, 'title': title, 'publication_year': publication_year, 'author': author}
+
+    def export_rows(self):
+        return (
+            Book.objects.order_by('pk')
+            .values_list('id', 'title', 'publication_year', 'author__name')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+
+    def imported(self):
+        # What the save/delete signals (api/signals.py) would have done per row
+        versions.books.invalidate()
+        versions.authors.invalidate()
+        response_cache.bump(Book)
+        response_cache.bump(Author)
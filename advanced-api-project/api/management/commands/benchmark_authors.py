@@ -0,0 +1,75 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from api.models import Author, Book
+from api.serializers import AuthorSerializer, author_rows
+from api.views import AuthorListView
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time listing authors with nested books through AuthorSerializer (books "
+        "prefetched) and through the .values() fast path. Test data is created in a "
+        "transaction and rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=10000,
+                            help="Number of authors (default: 10000).")
+        parser.add_argument('--books-per-author', type=int, default=3,
+                            help="Books per author (default: 3).")
+        parser.add_argument('--repeat', type=int, default=5,
+                            help="Timed runs per path; the median is reported (default: 5).")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Rows per bulk_create (default: 2000).")
+
+    def handle(self, *args, authors, books_per_author, repeat, batch_size, **options):
+        try:
+            with transaction.atomic():
+                self.seed(authors, books_per_author, batch_size)
+                results = {
+                    'serializer': self.measure(self.serializer_path, repeat),
+                    'values': self.measure(self.values_path, repeat),
+                }
+                raise Rollback
+        except Rollback:
+            pass
+
+        self.stdout.write(f"{authors} authors, {authors * books_per_author} books, median of {repeat} runs:")
+        for name, (seconds, queries) in results.items():
+            self.stdout.write(f"  {name:<10} {seconds * 1000:9.1f} ms  {queries} queries")
+        speedup = results['serializer'][0] / results['values'][0]
+        self.stdout.write(self.style.SUCCESS(f"The values() path is {speedup:.1f}x faster."))
+
+    def seed(self, authors, books_per_author, batch_size):
+        created = Author.objects.bulk_create(
+            (Author(name=f'Bench author {i}') for i in range(authors)), batch_size=batch_size,
+        )
+        Book.objects.bulk_create(
+            (Book(title=f'Bench book {author.pk}-{n}', publication_year=2000, author=author)
+             for author in created for n in range(books_per_author)),
+            batch_size=batch_size,
+        )
+
+    def serializer_path(self):
+        return AuthorSerializer(AuthorListView.queryset.all(), many=True).data
+
+    def values_path(self):
+        return author_rows(Author.objects.order_by('name', 'id'))
+
+    def measure(self, path, repeat):
+        timings = []
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                path()
+                timings.append(time.perf_counter() - start)
+        return statistics.median(timings), len(queries)
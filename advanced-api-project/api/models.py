@@ -3,6 +3,7 @@ from django.db import models
 # Author model to store author information
 class Author(models.Model):
     name = models.CharField(max_length=100)  # Author's name, e.g., "J.K. Rowling"
+    updated_at = models.DateTimeField(auto_now=True)  # Version stamp for conditional GET (api/versions.py)
 
     def __str__(self):
         return self.name
@@ -12,6 +13,7 @@ class Book(models.Model):
     title = models.CharField(max_length=200)  # Book's title, e.g., "Harry Potter"
     publication_year = models.IntegerField()  # Year of publication, e.g., 1997
     author = models.ForeignKey(Author, on_delete=models.CASCADE, related_name='books')  # One-to-many relationship with Author
+    updated_at = models.DateTimeField(auto_now=True)  # Version stamp for conditional GET (api/versions.py)
 
     def __str__(self):
         return self.title
\ No newline at end of file
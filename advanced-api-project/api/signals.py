@@ -0,0 +1,21 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from learnlab import response_cache
+from . import versions
+from .models import Author, Book
+
+
+# Any write to a table retires its cached version stamp and cached responses
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_versions(sender, **kwargs):
+    versions.books.invalidate()
+    response_cache.bump(Book)
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_author_versions(sender, **kwargs):
+    versions.authors.invalidate()
+    response_cache.bump(Author)
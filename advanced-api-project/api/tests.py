@@ -1,3 +1,316 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from learnlab import bulk_io, response_cache
+from learnlab.conditional import ConditionalGetMixin
+from . import versions
+from .catalog import BookCatalog
+from .serializers import AuthorSerializer
+
+from learnlab.testing import QueryBudgetMixin
+from .models import Author, Book
+
+
+class BookQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.author = Author.objects.create(name="J.K. Rowling")
+
+    def make_books(self, start, count):
+        Book.objects.bulk_create(
+            Book(title=f"Book {start + i}", publication_year=2000, author=self.author) for i in range(count)
+        )
+
+    def get_cold(self, url):
+        # bulk_create doesn't invalidate the cached version stamps or responses
+        for each in caches.all():
+            each.clear()
+        return self.client.get(url)
+
+    def test_book_list_queries_are_flat(self):
+        # Books, plus the book and author version stamps on a cold cache
+        self.assertQueriesFlat(self.make_books, lambda: self.get_cold('/api/books/'), budget=3)
+
+    def test_book_search_queries_are_flat(self):
+        self.assertQueriesFlat(self.make_books, lambda: self.get_cold('/api/books/?search=Rowling'), budget=3)
+
+
+class AuthorListQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def make_authors(self, start, count):
+        authors = Author.objects.bulk_create(Author(name=f"Author {start + i:05}") for i in range(count))
+        Book.objects.bulk_create(
+            Book(title=f"Book {author.pk}-{n}", publication_year=2000, author=author)
+            for author in authors for n in range(2)
+        )
+
+    def test_nested_list_is_two_queries(self):
+        # Authors + all of their books in one prefetch
+        self.assertQueriesFlat(self.make_authors, lambda: self.client.get('/api/authors/'), budget=2)
+
+    def test_flat_mode_is_two_queries(self):
+        self.assertQueriesFlat(self.make_authors, lambda: self.client.get('/api/authors/?mode=flat'), budget=2)
+
+    def test_flat_mode_matches_the_serializer(self):
+        self.make_authors(0, 5)
+        Author.objects.create(name="No books yet")
+        nested = self.client.get('/api/authors/').json()
+        self.assertEqual(self.client.get('/api/authors/?mode=flat').json(), nested)
+        self.assertEqual(nested[0], AuthorSerializer(Author.objects.get(name="Author 00000")).data)
+        self.assertEqual(nested[-1]['books'], [])
+
+
+class BookConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches['conditional'].clear()
+        self.author = Author.objects.create(name="J.K. Rowling")
+        self.book = Book.objects.create(title="Harry Potter", publication_year=1997, author=self.author)
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_list_answers_304_until_books_or_authors_change(self):
+        url = '/api/books/?search=Rowling'
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            not_modified = self.revalidate(url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+
+        self.author.name = "Robert Galbraith"
+        self.author.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_list_has_no_last_modified(self):
+        # Deleting a book doesn't move the newest updated_at, so If-Modified-Since
+        # alone would keep the deleted book in the client's copy
+        url = '/api/books/'
+        self.assertFalse(self.client.get(url).has_header('Last-Modified'))
+        self.book.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalidation_reaches_other_workers(self):
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection('conditional')
+        stamp = versions.authors.get()
+        self.assertEqual(other_worker.get(versions.authors.key), stamp)
+        Author.objects.create(name="Jane Austen")
+        self.assertIsNone(other_worker.get(versions.authors.key))
+
+    def test_views_without_validators_answer_in_full(self):
+        self.assertEqual(ConditionalGetMixin().get_validators(None), (None, None))
+
+    def test_detail_answers_304_until_the_book_changes(self):
+        url = f'/api/books/{self.book.pk}/'
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.client.login(username='reader', password='pass12345')
+        self.client.patch(url, {'title': 'Harry Potter 1'}, format='json')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        self.assertEqual(self.client.get('/api/books/999/').status_code, 404)
+
+
+class BookResponseCacheTests(APITestCase):
+    def setUp(self):
+        for each in caches.all():
+            each.clear()
+        self.author = Author.objects.create(name="J.K. Rowling")
+        self.book = Book.objects.create(title="Harry Potter", publication_year=1997, author=self.author)
+
+    def get(self, url='/api/books/?search=Rowling'):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_pages_are_cached_per_query(self):
+        self.assertEqual(self.get()['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.get()
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(response.json()[0]['title'], "Harry Potter")
+        self.assertEqual(self.get('/api/books/?search=Potter')['X-Cache'], 'MISS')
+
+    def test_book_and_author_writes_invalidate(self):
+        self.get()
+        self.book.title = "Harry Potter 1"
+        self.book.save()
+        response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()[0]['title'], "Harry Potter 1")
+
+        self.author.name = "Robert Galbraith"
+        self.author.save()
+        self.assertEqual(self.get().json(), [])
+
+    def test_invalidation_reaches_other_workers(self):
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection('responses')
+        key = response_cache._generation_key(Book)
+        generation, = response_cache.generations((Book,))
+        self.assertEqual(other_worker.get(key), generation)
+        self.book.save()
+        self.assertNotEqual(other_worker.get(key), generation)
+
+    def test_waits_for_the_request_building_the_page(self):
+        self.get()
+        self.book.save()
+        built = (200, [{'title': 'built by the lock holder'}])
+        # Another request holds the lock for the new key
+        with mock.patch.object(caches['responses'], 'add', return_value=False), \
+                mock.patch.object(response_cache.CachedListMixin, '_wait', return_value=built) as wait:
+            response = self.get()
+        wait.assert_called_once()
+        self.assertEqual(response.json(), built[1])
+
+    def test_builds_the_page_when_the_lock_holder_gives_up(self):
+        response_cache.generations((Book, Author))
+        with mock.patch.object(caches['responses'], 'add', return_value=False), \
+                mock.patch.object(response_cache, 'RESPONSE_CACHE_LOCK_WAIT', 0.05):
+            response = self.get()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.json()[0]['title'], "Harry Potter")
+
+
+class BookBulkImportExportTests(APITestCase):
+    CSV = (
+        "id,title,publication_year,author\n"
+        ",Harry Potter,1997,J.K. Rowling\n"
+        ",\"Strike, Book One\",2013,Robert Galbraith\n"
+        ",,2000,Nobody\n"
+        ",Far Future,3000,J.K. Rowling\n"
+    )
+
+    def setUp(self):
+        for each in caches.all():
+            each.clear()
+        self.user = User.objects.create_user(username='loader', password='pass12345')
+
+    def import_file(self, content, suffix):
+        mode = 'wb' if isinstance(content, bytes) else 'w'
+        with tempfile.NamedTemporaryFile(mode, suffix=suffix, delete=False) as handle:
+            handle.write(content)
+        self.addCleanup(os.unlink, handle.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_books', handle.name, '--batch-size', '2', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_import_creates_books_and_authors_in_batches(self):
+        out, err = self.import_file(self.CSV, '.csv')
+        self.assertIn('Imported 2 rows (2 created, 0 updated, 2 invalid)', out)
+        self.assertIn('record 3: title is required', err)
+        self.assertIn('record 4: publication_year cannot be in the future', err)
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(Book.objects.get(title='Strike, Book One').author.name, 'Robert Galbraith')
+
+    def test_rows_with_ids_update_in_place(self):
+        self.import_file(self.CSV, '.csv')
+        book = Book.objects.get(title='Harry Potter')
+        row = {'id': book.pk, 'title': "Harry Potter and the Philosopher's Stone",
+               'publication_year': 1997, 'author': 'J.K. Rowling'}
+        out, _ = self.import_file(json.dumps(row) + '\nnot json\n', '.ndjson')
+        self.assertIn('(0 created, 1 updated, 1 invalid)', out)
+        book.refresh_from_db()
+        self.assertEqual(book.title, row['title'])
+        self.assertEqual(Author.objects.count(), 2)
+
+    def test_undecodable_and_malformed_records_are_reported(self):
+        content = (
+            self.CSV.encode() + b",Caf\xe9,2001,Nobody\n," + b"x" * 200 + b",2002,Nobody\n"
+            + b",Emma,1815,Jane Austen\n"
+        )
+        # field_size_limit() returns the previous limit
+        self.addCleanup(csv.field_size_limit, csv.field_size_limit(100))
+        out, err = self.import_file(content, '.csv')
+        self.assertIn('Imported 3 rows (3 created, 0 updated, 4 invalid)', out)
+        self.assertIn('record 5: not valid UTF-8', err)
+        self.assertIn('record 6: malformed CSV (field larger than field limit (100))', err)
+
+        out, err = self.import_file(b'{"title": "Caf\xe9"}\n', '.ndjson')
+        self.assertIn('1 invalid', out)
+        self.assertIn('record 1: not valid UTF-8', err)
+
+    def test_catalog_is_refreshed_when_a_batch_fails(self):
+        with mock.patch.object(bulk_io, '_write_batch', side_effect=RuntimeError), \
+                mock.patch.object(BookCatalog, 'imported') as imported:
+            with self.assertRaises(RuntimeError):
+                self.import_file(self.CSV, '.csv')
+        imported.assert_called_once()
+
+    def test_export_round_trips(self):
+        self.import_file(self.CSV, '.csv')
+        out = StringIO()
+        call_command('export_books', '--format', 'ndjson', stdout=out, stderr=StringIO())
+        rows = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([row['author'] for row in rows], ['J.K. Rowling', 'Robert Galbraith'])
+
+        Book.objects.all().delete()
+        self.import_file(out.getvalue(), '.ndjson')
+        self.assertEqual(Book.objects.count(), 2)
+
+    def test_endpoints_stream_both_ways(self):
+        response = self.client.post('/api/books/import/', self.CSV, content_type='text/csv')
+        self.assertIn(response.status_code, (401, 403))
+
+        self.client.login(username='loader', password='pass12345')
+        self.assertEqual(self.client.get('/api/books/').json(), [])
+        response = self.client.post('/api/books/import/', self.CSV, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertIn('rows_per_second', response.json())
+        self.assertEqual(self.client.post('/api/books/import/', '{}', content_type='application/json').status_code, 415)
+
+        response = self.client.get('/api/books/export/?type=csv')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0], 'id,title,publication_year,author')
+        self.assertEqual(len(lines), 3)
+        # The cached list was invalidated by the bulk import
+        self.assertEqual(len(self.client.get('/api/books/').json()), 2)
+
+
+class BookStreamingListTests(APITestCase):
+    def setUp(self):
+        for each in caches.all():
+            each.clear()
+        author = Author.objects.create(name="J.K. Rowling")
+        other = Author.objects.create(name="Jane Austen")
+        Book.objects.bulk_create(
+            [Book(title=f"Book {i:04}", publication_year=2000, author=author) for i in range(1200)]
+            + [Book(title="Emma", publication_year=1815, author=other)]
+        )
+
+    def stream(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertNotIn('X-Cache', response)
+        return b''.join(response.streaming_content)
+
+    def test_json_array_matches_the_list(self):
+        # More rows than one write, so chunks are joined with commas
+        expected = self.client.get('/api/books/').json()
+        self.assertEqual(json.loads(self.stream('/api/books/?stream=json')), expected)
+
+    def test_ndjson_applies_filters(self):
+        lines = self.stream('/api/books/?stream=ndjson&search=Austen').splitlines()
+        self.assertEqual([json.loads(line)['title'] for line in lines], ["Emma"])
+
+    def test_empty_array(self):
+        self.assertEqual(self.stream('/api/books/?stream=json&search=nobody'), b'[]')
+
+    def test_unknown_stream_format(self):
+        self.assertEqual(self.client.get('/api/books/?stream=xml').status_code, 400)
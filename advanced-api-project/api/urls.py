@@ -1,11 +1,17 @@
 from django.urls import path
-from .views import BookListView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView
+from .views import (
+    AuthorListView, BookListCreateView, BookDetailView, BookCreateView, BookUpdateView, BookDeleteView,
+    BookExportView, BookImportView,
+)
 
 # URL patterns for Book-related endpoints
 urlpatterns = [
-    path('books/', BookListView.as_view(), name='book-list'),  # List all books
+    path('books/', BookListCreateView.as_view(), name='book-list'),  # List all books
     path('books/<int:pk>/', BookDetailView.as_view(), name='book-detail'),  # Retrieve a book
     path('books/create/', BookCreateView.as_view(), name='book-create'),  # Create a book
     path('books/update/<int:pk>/', BookUpdateView.as_view(), name='book-update'),  # Update a book
     path('books/delete/<int:pk>/', BookDeleteView.as_view(), name='book-delete'),  # Delete a book
+    path('books/export/', BookExportView.as_view(), name='book-export'),  # Stream the catalog as CSV/NDJSON
+    path('books/import/', BookImportView.as_view(), name='book-import'),  # Bulk load CSV/NDJSON
+    path('authors/', AuthorListView.as_view(), name='author-list'),  # List authors with their books
 ]
\ No newline at end of file
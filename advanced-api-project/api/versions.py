@@ -0,0 +1,9 @@
+from learnlab.conditional import TableVersion
+from .models import Author, Book
+
+# Cached version stamps of the book and author tables for conditional GET (see
+# learnlab/conditional.py); api/signals.py invalidates them on
+# every save and delete. Book lists depend on both: searching matches author
+# names.
+books = TableVersion(Book)
+authors = TableVersion(Author)
@@ -1,106 +1,159 @@
-```python
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
 from rest_framework import generics
+from rest_framework import filters  # Use filters alias for OrderingFilter and SearchFilter
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
-from .models import Book
-from .serializers import BookSerializer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from django_filters.rest_framework import DjangoFilterBackend
+from learnlab.bulk_io import (
+    CONTENT_TYPES, FORMATS, decode_lines, export_lines, format_for, import_rows, read_rows,
+)
+from learnlab.conditional import ConditionalGetMixin, make_etag, row_version
+from learnlab.response_cache import CachedListMixin
+from learnlab.streaming import StreamingListMixin
+from . import versions
+from .catalog import BookCatalog
+from .models import Author, Book
+from .serializers import AuthorSerializer, BookSerializer, author_rows
 
 
-class BookListCreateView(generics.ListCreateAPIView):
+class BookListCreateView(ConditionalGetMixin, StreamingListMixin, CachedListMixin, generics.ListCreateAPIView):
     """
     Handles:
-    - GET /books/ → List all books (anyone can view).
+    - GET /books/ → List all books with filtering, searching, and ordering (anyone can view).
     - POST /books/ → Create a new book (only authenticated users).
+    Filtering: title, publication_year, author. Searching: title and author name.
+    Ordering: title and publication_year (ascending or descending).
+    GET answers 304 Not Modified when neither books nor authors changed since
+    the client's copy (an ETag from the cached table stamps);
+    otherwise the serialized page comes from the response cache when it can.
+    ?stream=json or ?stream=ndjson streams every matching book instead, one
+    row at a time (learnlab/streaming.py).
     """
+    # author is only serialized as its id, so no join is needed to list books;
+    # the author name search adds the join itself
     queryset = Book.objects.all()
     serializer_class = BookSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filterset_fields = ['title', 'publication_year', 'author']
+    search_fields = ['title', 'author__name']
+    ordering_fields = ['title', 'publication_year']
+    ordering = ['title']
+    # Searching matches author names; the output is the same for every user
+    cache_models = (Book, Author)
+    cache_per_user = False
 
+    def get_validators(self, request):
+        # No Last-Modified: deletes don't move it (see learnlab/conditional.py)
+        return make_etag(*versions.books.get(), *versions.authors.get()), None
 
-class BookDetailView(generics.RetrieveUpdateDestroyAPIView):
+
+class BookDetailView(ConditionalGetMixin, generics.RetrieveUpdateDestroyAPIView):
     """
     Handles:
     - GET /books/<id>/ → Retrieve details of a single book (anyone can view).
     - PUT /books/<id>/ → Update a book (only authenticated users).
     - PATCH /books/<id>/ → Partially update a book (only authenticated users).
     - DELETE /books/<id>/ → Delete a book (only authenticated users).
+    GET answers 304 Not Modified while the book's updated_at is unchanged.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get_validators(self, request):
+        updated_at = row_version(self.get_queryset(), self.kwargs['pk'])
+        if updated_at is None:
+            return None, None  # 404 from the handler
+        return make_etag(self.kwargs['pk'], updated_at), updated_at
+
+
+class AuthorListView(generics.ListAPIView):
+    """
+    Handles:
+    - GET /authors/ → List authors with their books nested (anyone can view).
+    Books are prefetched, so the list costs two queries for any number of
+    authors. ?mode=flat returns the same data built from .values() rows
+    (api.serializers.author_rows), for large lists.
+    """
+    queryset = Author.objects.prefetch_related(
+        Prefetch('books', queryset=Book.objects.order_by('id'))
+    ).order_by('name', 'id')
+    serializer_class = AuthorSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('mode') == 'flat':
+            return Response(author_rows(Author.objects.order_by('name', 'id')))
+        return super().list(request, *args, **kwargs)
+
+
+class BookCreateView(generics.CreateAPIView):
+    """
+    POST: Create a new book.
+    Permissions: Restricted to authenticated users.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+
+class BookUpdateView(generics.UpdateAPIView):
+    """
+    PUT/PATCH: Update an existing book by ID.
+    Permissions: Restricted to authenticated users.
+    """
+    queryset = Book.objects.all()
+    serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+
+class BookDeleteView(generics.DestroyAPIView):
+    """
+    DELETE: Delete a book by ID.
+    Permissions: Restricted to authenticated users.
     """
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    permission_classes = [IsAuthenticated]
+
+
+class BookExportView(APIView):
+    """
+    GET /books/export/?type=csv|ndjson → every book, streamed as it is read
+    (anyone can view). Authors are given by name, as import expects them.
+    """
     permission_classes = [IsAuthenticatedOrReadOnly]
-```
-
-
-# # View to list all books with filtering, searching, and ordering
-# from rest_framework import generics
-# from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
-# from django_filters.rest_framework import DjangoFilterBackend
-# from rest_framework import filters  # Use filters alias for OrderingFilter and SearchFilter
-# from .models import Book
-# from .serializers import BookSerializer
-# from django_filters import rest_framework
-
-# # View to list all books with filtering, searching, and ordering
-# class BookListView(generics.ListAPIView):
-#     """
-#     GET: Retrieve a list of all books with filtering, searching, and ordering capabilities.
-#     Permissions: Accessible to all users (authenticated or unauthenticated).
-#     Filtering: Supports filtering by title, publication_year, and author.
-#     Searching: Supports text search on title and author name.
-#     Ordering: Supports ordering by title and publication_year (ascending or descending).
-#     """
-#     queryset = Book.objects.all()
-#     serializer_class = BookSerializer
-#     permission_classes = [IsAuthenticatedOrReadOnly]
-#     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]  # Enable filtering, search, and ordering
-#     filterset_fields = ['title', 'publication_year', 'author']  # Fields for filtering
-#     search_fields = ['title', 'author__name']  # Fields for searching (title and author name)
-#     ordering_fields = ['title', 'publication_year']  # Fields for ordering
-#     ordering = ['title']  # Default ordering
-
-# # View to retrieve a single book by ID
-# class BookDetailView(generics.RetrieveAPIView):
-#     """
-#     GET: Retrieve details of a specific book by ID.
-#     Permissions: Accessible to all users (authenticated or unauthenticated).
-#     """
-#     queryset = Book.objects.all()
-#     serializer_class = BookSerializer
-#     permission_classes = [IsAuthenticatedOrReadOnly]
-
-# # View to create a new book
-# class BookCreateView(generics.CreateAPIView):
-#     """
-#     POST: Create a new book.
-#     Permissions: Restricted to authenticated users.
-#     Custom behavior: Ensures validated data is saved.
-#     """
-#     queryset = Book.objects.all()
-#     serializer_class = BookSerializer
-#     permission_classes = [IsAuthenticated]
-
-#     def perform_create(self, serializer):
-#         serializer.save()
-
-# # View to update an existing book
-# class BookUpdateView(generics.UpdateAPIView):
-#     """
-#     PUT/PATCH: Update an existing book by ID.
-#     Permissions: Restricted to authenticated users.
-#     Custom behavior: Ensures validated data is saved.
-#     """
-#     queryset = Book.objects.all()
-#     serializer_class = BookSerializer
-#     permission_classes = [IsAuthenticated]
-
-#     def perform_update(self, serializer):
-#         serializer.save()
-
-# # View to delete a book
-# class BookDeleteView(generics.DestroyAPIView):
-#     """
-#     DELETE: Delete a book by ID.
-#     Permissions: Restricted to authenticated users.
-#     """
-#     queryset = Book.objects.all()
-#     serializer_class = BookSerializer
-#     permission_classes = [IsAuthenticated]
\ No newline at end of file
+
+    def get(self, request):
+        # Not ?format=, which DRF keeps for picking a renderer
+        fmt = request.query_params.get('type', 'csv')
+        if fmt not in FORMATS:
+            return Response({'detail': f'type must be one of {", ".join(FORMATS)}.'}, status=400)
+        catalog = BookCatalog()
+        response = StreamingHttpResponse(
+            export_lines(catalog.export_rows(), catalog.COLUMNS, fmt), content_type=CONTENT_TYPES[fmt],
+        )
+        response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+        return response
+
+
+class BookImportView(APIView):
+    """
+    POST /books/import/ with a text/csv or application/x-ndjson body → import
+    counts and rows/second (only authenticated users). The body is read line
+    by line and written in batches, so its size doesn't matter; see
+    learnlab/bulk_io.py.
+    """
+    permission_classes = [IsAuthenticated]
+    parser_classes = []  # the body is streamed, never parsed into request.data
+
+    def post(self, request):
+        fmt = format_for(request.content_type, default=None)
+        if fmt is None:
+            return Response({'detail': 'Send text/csv or application/x-ndjson.'}, status=415)
+        lines = decode_lines(request.stream) if request.stream is not None else ()
+        stats = import_rows(BookCatalog(), read_rows(lines, fmt))
+        return Response(stats.as_dict())
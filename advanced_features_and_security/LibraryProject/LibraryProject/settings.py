@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Code shared with the other projects in this repository lives in learnlab/ at
+# its root
+REPO_DIR = BASE_DIR.parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.1/howto/deployment/checklist/
@@ -125,6 +133,28 @@ STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'bookshelf.CustomUser'
+
+# Permission checks read the user's permission set from a cache shared by all
+# worker processes (see bookshelf/backends.py). FileBasedCache shares it
+# between the workers of one host and keeps it across restarts;
+# django.core.cache.backends.redis.RedisCache (needs redis-py) between hosts.
+AUTHENTICATION_BACKENDS = ['bookshelf.backends.CachedPermissionBackend']
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'permissions': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'libraryproject-permissions',
+    },
+}
+# Tests get every FileBasedCache above in a temporary directory instead, so
+# they never clear or read the entries of a running server
+TEST_RUNNER = 'learnlab.testing.IsolatedCachesRunner'
+PERMISSION_CACHE_ALIAS = 'permissions'
+PERMISSION_CACHE_TIMEOUT = 3600
+# Cached roles (relationship_app/roles.py) live next to the permission sets
+ROLE_CACHE_ALIAS = 'permissions'
 SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = 'DENY'  
 SECURE_CONTENT_TYPE_NOSNIFF = True  
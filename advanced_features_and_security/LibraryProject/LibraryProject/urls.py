@@ -21,4 +21,5 @@ urlpatterns = [
     path('admin/', admin.site.urls),
     path('list/',include('relationship_app.urls')),
     path('detail/',include('relationship_app.urls')),
+    path('bookshelf/',include('bookshelf.urls')),
 ]
\ No newline at end of file
@@ -0,0 +1,76 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+# Permission checks from a cache shared by every worker process.
+#
+# ModelBackend loads a user's permission set (two queries: the user's own
+# permissions and those of their groups) once per User object, which means
+# once per request, in every process, after every restart. Since
+# permission_required views (bookshelf.views) check on every request,
+# CachedPermissionBackend keeps the set in the cache named by
+# PERMISSION_CACHE_ALIAS (a FileBasedCache in settings, so all workers on the
+# host share it and it outlives restarts), keyed by:
+#
+#   - a permission version number, bumped by the signals in signals.py on
+#     any change to user or group permissions or group membership, which
+#     retires every cached set at once (bumped at once and again after the
+#     transaction commits, so a request that read the old rows meanwhile
+#     doesn't cache them under the new version),
+#   - the user, and whether they are a superuser (superusers have every
+#     permission, so flipping the flag changes the set).
+#
+# A check is then one cache read per request, and none for further checks in
+# the same request. Object permissions are not supported, as with ModelBackend.
+
+PERMISSION_CACHE_ALIAS = getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')
+PERMISSION_CACHE_TIMEOUT = getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 3600)
+KEY_PREFIX = 'bookshelf:permissions'
+VERSION_KEY = f'{KEY_PREFIX}:version'
+
+
+def _cache():
+    return caches[PERMISSION_CACHE_ALIAS]
+
+
+def version():
+    cache = _cache()
+    current = cache.get(VERSION_KEY)
+    if current is None:
+        # Not 0: sets cached under an evicted version 0 could still be there
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        current = cache.get(VERSION_KEY)
+    return current
+
+
+def bump(**kwargs):
+    """Retire every cached permission set; takes signal kwargs so it can be a receiver."""
+    def incr():
+        cache = _cache()
+        try:
+            cache.incr(VERSION_KEY)
+        except ValueError:
+            cache.set(VERSION_KEY, time.time_ns(), None)
+
+    incr()
+    transaction.on_commit(incr)
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ModelBackend with the permission set read from the shared cache (see the module comment)."""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            cache = _cache()
+            key = f'{KEY_PREFIX}:{version()}:{user_obj.pk}:{int(user_obj.is_superuser)}'
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, PERMISSION_CACHE_TIMEOUT)
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
@@ -0,0 +1,38 @@
+from learnlab.bulk_io import EXPORT_CHUNK_SIZE
+from .models import Book
+
+
+class BookCatalog:
+    """
+    Bookshelf books for bulk import/export (learnlab/bulk_io.py): one
+    row per book, the author as plain text like the model stores it.
+    """
+
+    MODEL = Book
+    COLUMNS = ('id', 'title', 'author', 'publication_year')
+    UPDATE_FIELDS = ['title', 'author', 'publication_year']
+
+    def build_batch(self, rows):
+        return [self.build(row) for row in rows]
+
+    def build(self, row):
+        """A Book for the row, or an error message."""
+        title = str(row.get('title') or '').strip()
+        author = str(row.get('author') or '').strip()
+        if not title or len(title) > Book._meta.get_field('title').max_length:
+            return 'title is required (at most 200 characters)'
+        if not author or len(author) > Book._meta.get_field('author').max_length:
+            return 'author is required (at most 100 characters)'
+        try:
+            publication_year = int(row.get('publication_year'))
+            pk = int(row['id']) if row.get('id') not in (None, '') else None
+        except (TypeError, ValueError):
+            return 'id and publication_year must be whole numbers'
+        return Book(pk=pk, title=title, author=author, publication_year=publication_year)
+
+    def export_rows(self):
+        return Book.objects.order_by('pk').values_list(*self.COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def imported(self):
+        # Nothing is cached from this table, so there is nothing to refresh
+        pass
@@ -0,0 +1,27 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import backends
+
+User = get_user_model()
+
+
+# Any change to who has which permission retires the cached permission sets
+# (bookshelf/backends.py)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def bump_on_grant(sender, action, **kwargs):
+    if action.startswith('post_'):
+        backends.bump()
+
+
+# Deleting a group or permission drops its m2m rows without m2m_changed, and
+# superusers hold every permission, including new ones
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def bump_on_delete(sender, **kwargs):
+    backends.bump()
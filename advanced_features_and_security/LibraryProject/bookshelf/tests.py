@@ -1,3 +1,103 @@
-from django.test import TestCase
+import json
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.test import RequestFactory, TestCase
+
+from . import backends, views
+from .models import Book
+
+User = get_user_model()
+
+
+class CachedPermissionBackendTests(TestCase):
+    def setUp(self):
+        for each in caches.all():
+            each.clear()
+        self.user = User.objects.create_user(username='editor', email='editor@example.com', password='pass12345')
+        self.permission = Permission.objects.get(codename='can_edit', content_type__app_label='bookshelf')
+
+    def fresh(self):
+        # A new User object, as every request gets
+        return User.objects.get(pk=self.user.pk)
+
+    def can_edit(self):
+        return self.fresh().has_perm('bookshelf.can_edit')
+
+    def test_set_is_read_from_the_cache(self):
+        user = self.fresh()
+        # The user's own permissions and their groups' permissions
+        with self.assertNumQueries(2):
+            user.has_perm('bookshelf.can_edit')
+        user = self.fresh()
+        with self.assertNumQueries(0):
+            user.has_perm('bookshelf.can_edit')
+            user.has_perm('bookshelf.can_view')
+
+    def test_other_workers_share_the_set(self):
+        self.can_edit()
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection(backends.PERMISSION_CACHE_ALIAS)
+        self.assertEqual(other_worker.get(backends.VERSION_KEY), backends.version())
+
+    def test_grant_and_revoke(self):
+        self.assertFalse(self.can_edit())
+        self.user.user_permissions.add(self.permission)
+        self.assertTrue(self.can_edit())
+        self.user.user_permissions.remove(self.permission)
+        self.assertFalse(self.can_edit())
+
+    def test_group_grant_and_delete(self):
+        group = Group.objects.create(name='Editors')
+        group.permissions.add(self.permission)
+        self.assertFalse(self.can_edit())
+        self.user.groups.add(group)
+        self.assertTrue(self.can_edit())
+        group.delete()
+        self.assertFalse(self.can_edit())
+
+    def test_superuser_flip(self):
+        self.assertFalse(self.can_edit())
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertTrue(self.can_edit())
+
+    def test_bump_is_repeated_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.user.user_permissions.add(self.permission)
+        # A request that read the old rows before the commit cached them under the new version
+        stale = f'{backends.KEY_PREFIX}:{backends.version()}:{self.user.pk}:0'
+        caches[backends.PERMISSION_CACHE_ALIAS].set(stale, set())
+        for callback in callbacks:
+            callback()
+        self.assertTrue(self.can_edit())
+
+
+class BookImportTests(TestCase):
+    def setUp(self):
+        for each in caches.all():
+            each.clear()
+        self.book = Book.objects.create(title='Emma', author='Jane Austen', publication_year=1815)
+        self.clerk = User.objects.create_user(username='clerk', email='clerk@example.com', password='pass12345')
+        self.clerk.user_permissions.add(Permission.objects.get(codename='can_create', content_type__app_label='bookshelf'))
+
+    def post_import(self, content):
+        request = RequestFactory().post('/books/import/', content, content_type='text/csv')
+        request.user = User.objects.get(pk=self.clerk.pk)
+        return json.loads(views.import_books(request).content)
+
+    def test_updates_need_the_edit_permission(self):
+        content = (
+            f"id,title,author,publication_year\n{self.book.pk},Emma (edited),Jane Austen,1815\n"
+            f",Persuasion,Jane Austen,1817\n"
+        ).encode()
+        stats = self.post_import(content)
+        self.assertEqual((stats['created'], stats['updated'], stats['invalid']), (1, 0, 1))
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, 'Emma')
+
+        self.clerk.user_permissions.add(Permission.objects.get(codename='can_edit', content_type__app_label='bookshelf'))
+        self.assertEqual(self.post_import(content)['updated'], 1)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, 'Emma (edited)')
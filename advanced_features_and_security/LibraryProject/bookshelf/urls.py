@@ -0,0 +1,7 @@
+from django.urls import path
+from . import views
+
+urlpatterns = [
+    path('books/export/', views.export_books, name='bookshelf_export_books'),
+    path('books/import/', views.import_books, name='bookshelf_import_books'),
+]
@@ -3,6 +3,10 @@ from django.contrib.auth.decorators import permission_required
 from .models import Book
 from django.http import HttpResponseForbidden
 from .forms import ExampleForm
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_POST
+from learnlab.bulk_io import CONTENT_TYPES, FORMATS, decode_lines, export_lines, format_for, import_rows, read_rows
+from .catalog import BookCatalog
 
 
 @permission_required('bookshelf.can_create', raise_exception=True)
@@ -54,4 +58,30 @@ def create_book(request):
     else:
         form = ExampleForm()
 
-    return render(request, 'bookshelf/form_example.html', {'form': form})
\ No newline at end of file
+    return render(request, 'bookshelf/form_example.html', {'form': form})
+
+
+# Bulk export/import of the bookshelf (learnlab/bulk_io.py). Both stream:
+# the export as it is read, the import line by line from the request body.
+@permission_required('bookshelf.can_view', raise_exception=True)
+@require_GET
+def export_books(request):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f"format must be one of {', '.join(FORMATS)}.")
+    catalog = BookCatalog()
+    response = StreamingHttpResponse(export_lines(catalog.export_rows(), catalog.COLUMNS, fmt),
+                                     content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+    return response
+
+@permission_required('bookshelf.can_create', raise_exception=True)
+@require_POST
+def import_books(request):
+    fmt = format_for(request.content_type, default=None)
+    if fmt is None:
+        return HttpResponse("Send text/csv or application/x-ndjson.", status=415)
+    # Rows with the id of an existing book update it, which needs the edit permission too
+    allow_updates = request.user.has_perm('bookshelf.can_edit')
+    stats = import_rows(BookCatalog(), read_rows(decode_lines(request), fmt), allow_updates=allow_updates)
+    return JsonResponse(stats.as_dict())
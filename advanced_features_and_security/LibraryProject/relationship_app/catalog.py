@@ -0,0 +1,60 @@
+import datetime
+
+from learnlab.bulk_io import EXPORT_CHUNK_SIZE, ForeignKeyCache
+from .models import Author, Book
+
+
+class BookCatalog:
+    """
+    Library books for bulk import/export (learnlab/bulk_io.py): one row
+    per book, the author given by name and the published date as YYYY-MM-DD
+    (or empty). Authors missing from the table are created.
+    """
+
+    MODEL = Book
+    COLUMNS = ('id', 'title', 'author', 'published_date')
+    UPDATE_FIELDS = ['title', 'author', 'published_date']
+
+    def __init__(self):
+        self.authors = ForeignKeyCache(Author, 'name')
+
+    def build_batch(self, rows):
+        parsed = [self.parse(row) for row in rows]
+        authors = self.authors.resolve({fields['author'] for fields in parsed if isinstance(fields, dict)})
+        return [
+            Book(
+                pk=fields['id'], title=fields['title'], author_id=authors[fields['author']],
+                published_date=fields['published_date'],
+            ) if isinstance(fields, dict) else fields
+            for fields in parsed
+        ]
+
+    def parse(self, row):
+        """The row's cleaned fields, or an error message."""
+        title = str(row.get('title') or '').strip()
+        author = str(row.get('author') or '').strip()
+        published = str(row.get('published_date') or '').strip()
+        if not title or len(title) > Book._meta.get_field('title').max_length:
+            return 'title is required (at most 255 characters)'
+        if not author or len(author) > Author._meta.get_field('name').max_length:
+            return 'author is required (at most 255 characters)'
+        try:
+            pk = int(row['id']) if row.get('id') not in (None, '') else None
+        except (TypeError, ValueError):
+            return 'id must be a whole number'
+        try:
+            published_date = datetime.date.fromisoformat(published) if published else None
+        except ValueError:
+            return 'published_date must be a YYYY-MM-DD date'
+        return {'id': pk, 'title': title, 'author': author, 'published_date': published_date}
+
+    def export_rows(self):
+        return (
+            Book.objects.order_by('pk')
+            .values_list('id', 'title', 'author__name', 'published_date')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+
+    def imported(self):
+        # Nothing is cached from this table, so there is nothing to refresh
+        pass
@@ -0,0 +1,43 @@
+import time
+from importlib import import_module
+
+from django.core.management.base import BaseCommand
+
+from learnlab.bulk_io import FORMATS, export_lines, format_for
+from .import_books import CATALOG_APPS
+
+
+class Command(BaseCommand):
+    help = "Export every book as CSV or NDJSON, streamed in constant memory."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', choices=CATALOG_APPS, default='relationship_app',
+                            help="Whose Book to export (default: relationship_app).")
+        parser.add_argument('--output', default='-',
+                            help="File to write (default: '-', stdout).")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Output format (default: from the file extension, else csv).")
+
+    def handle(self, *args, model, output, format, **options):
+        catalog = import_module(f'{model}.catalog').BookCatalog()
+        fmt = format or format_for(output)
+        start = time.perf_counter()
+        rows = 0
+
+        def counted(items):
+            nonlocal rows
+            for rows, item in enumerate(items, start=1):
+                yield item
+
+        chunks = export_lines(counted(catalog.export_rows()), catalog.COLUMNS, fmt)
+        if output == '-':
+            for chunk in chunks:
+                self.stdout.write(chunk.decode(), ending='')
+        else:
+            with open(output, 'wb') as stream:
+                stream.writelines(chunks)
+
+        seconds = time.perf_counter() - start
+        rate = rows / seconds if seconds else 0
+        # Keep stdout for the data
+        self.stderr.write(self.style.SUCCESS(f"Exported {rows} books in {seconds:.1f}s, {rate:.0f} rows/s."))
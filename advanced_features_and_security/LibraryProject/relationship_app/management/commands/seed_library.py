@@ -0,0 +1,77 @@
+import datetime
+import random
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from relationship_app.models import Author, Book, Librarian, Library
+
+WORDS = "river night garden stone letter winter city voice empire shadow house light ocean road".split()
+
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = "Create synthetic authors, books and libraries (with librarians) for benchmarks."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=1000,
+                            help="Number of authors to create (default: 1000).")
+        parser.add_argument('--books', type=int, default=20000,
+                            help="Number of books to create (default: 20000).")
+        parser.add_argument('--libraries', type=int, default=50,
+                            help="Number of libraries to create (default: 50).")
+        parser.add_argument('--books-per-library', type=int, default=500,
+                            help="Books in each library's collection (default: 500).")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows per bulk_create (default: 5000).")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Random seed, for repeatable datasets (default: 0).")
+
+    def handle(self, *args, authors, books, libraries, books_per_library, batch_size, seed, **options):
+        rng = random.Random(seed)
+
+        start = Author.objects.aggregate(last=Max('pk'))['last'] or 0
+        Author.objects.bulk_create((Author(name=f'Author {start + i}') for i in range(authors)), batch_size=batch_size)
+        author_ids = list(Author.objects.values_list('pk', flat=True))
+
+        start = Book.objects.aggregate(last=Max('pk'))['last'] or 0
+        for batch in _batches(range(books), batch_size):
+            Book.objects.bulk_create(
+                Book(
+                    title=' '.join(rng.choices(WORDS, k=3)).title(),
+                    author_id=rng.choice(author_ids),
+                    published_date=datetime.date(1900, 1, 1) + datetime.timedelta(days=rng.randrange(45000)),
+                )
+                for _ in batch
+            )
+        book_ids = list(Book.objects.filter(pk__gt=start).values_list('pk', flat=True))
+
+        start = Library.objects.aggregate(last=Max('pk'))['last'] or 0
+        Library.objects.bulk_create(Library(name=f'Library {start + i}') for i in range(libraries))
+        library_ids = list(Library.objects.filter(pk__gt=start).values_list('pk', flat=True))
+        Librarian.objects.bulk_create(Librarian(name=f'Librarian {pk}', library_id=pk) for pk in library_ids)
+
+        # Edge table of Library.books
+        Shelf = Library.books.through
+        shelved = 0
+        for library_id in library_ids:
+            rows = [
+                Shelf(library_id=library_id, book_id=book_id)
+                for book_id in rng.sample(book_ids, min(books_per_library, len(book_ids)))
+            ]
+            Shelf.objects.bulk_create(rows, batch_size=batch_size)
+            shelved += len(rows)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {authors} authors, {len(book_ids)} books, {len(library_ids)} libraries "
+            f"and {shelved} shelf entries."
+        ))
@@ -0,0 +1,47 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from . import roles
+from .models import UserProfile
+
+User = get_user_model()
+
+
+# Cached role/permission entries (relationship_app/roles.py) go stale when:
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def invalidate_profile_access(sender, instance, **kwargs):
+    # ... a user's role changes,
+    roles.invalidate([instance.user_id])
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidate_user_access(sender, instance, action, reverse, pk_set, **kwargs):
+    # ... a user's own permissions or groups change (from either side),
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        roles.invalidate([instance.pk])
+    elif pk_set is not None:
+        roles.invalidate(pk_set)
+    else:
+        roles.invalidate_all()  # cleared from the group's or permission's side
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_access(sender, action, **kwargs):
+    # ... or a group's permissions change, which concerns all of its members
+    if action.startswith('post_'):
+        roles.invalidate_all()
+
+
+# Deleting a group or permission drops its m2m rows without m2m_changed, and
+# superusers hold every permission, including new ones
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_deleted_access(sender, **kwargs):
+    roles.invalidate_all()
@@ -1,3 +1,189 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from learnlab import bulk_io
+from . import roles, views
+from .catalog import BookCatalog
+from .models import Author, Book, Library, UserProfile
+
+User = get_user_model()
+
+
+class RoleResolutionTests(TestCase):
+    def setUp(self):
+        for each in caches.all():
+            each.clear()
+        self.user = User.objects.create_user(username='reader', email='reader@example.com', password='pass12345')
+        self.permission = Permission.objects.get(codename='can_add_book', content_type__app_label='relationship_app')
+        self.perm_name = 'relationship_app.can_add_book'
+
+    def fresh(self):
+        # A new User object, as every request gets
+        return User.objects.get(pk=self.user.pk)
+
+    def set_role(self, role):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.role = role
+        profile.save()
+
+    def test_cold_then_warm_query_counts(self):
+        user = self.fresh()
+        # The role, the user's own permissions and their groups' permissions
+        with self.assertNumQueries(3):
+            self.assertEqual(roles.resolve(user).role, 'Member')
+        with self.assertNumQueries(0):
+            roles.resolve(user)
+        user = self.fresh()
+        with self.assertNumQueries(0):
+            self.assertEqual(roles.resolve(user).role, 'Member')
+
+    def test_other_workers_see_the_cached_access(self):
+        roles.resolve(self.fresh())
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection(roles.ROLE_CACHE_ALIAS)
+        self.assertEqual(other_worker.get(roles._key(self.user.pk, False)).role, 'Member')
+
+    def test_role_change(self):
+        self.assertEqual(roles.resolve(self.fresh()).role, 'Member')
+        self.set_role('Librarian')
+        self.assertTrue(roles.resolve(self.fresh()).has_role('Librarian'))
+
+    def test_group_permission_change(self):
+        group = Group.objects.create(name='Editors')
+        self.user.groups.add(group)
+        self.assertFalse(roles.resolve(self.fresh()).has_perms([self.perm_name]))
+        group.permissions.add(self.permission)
+        self.assertTrue(roles.resolve(self.fresh()).has_perms([self.perm_name]))
+        group.delete()
+        self.assertFalse(roles.resolve(self.fresh()).has_perms([self.perm_name]))
+
+    def test_superuser_flip(self):
+        self.assertFalse(roles.resolve(self.fresh()).has_perms([self.perm_name]))
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertTrue(roles.resolve(self.fresh()).has_perms([self.perm_name]))
+
+    def test_invalidation_is_repeated_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.set_role('Admin')
+        # A request that read the old role before the commit cached it meanwhile
+        roles._cache().set(roles._key(self.user.pk, False), roles.Access('Member'))
+        for callback in callbacks:
+            callback()
+        self.assertEqual(roles.resolve(self.fresh()).role, 'Admin')
+
+
+class RoleRequiredTests(TestCase):
+    def setUp(self):
+        for each in caches.all():
+            each.clear()
+        self.user = User.objects.create_user(username='member', email='member@example.com', password='pass12345')
+
+    def call(self, user, **kwargs):
+        request = RequestFactory().get('/admin-only/')
+        request.user = user
+        return roles.role_required('Admin', **kwargs)(lambda request: HttpResponse('ok'))(request)
+
+    def test_redirects_to_login(self):
+        response = self.call(User.objects.get(pk=self.user.pk))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn('next=/admin-only/', response['Location'])
+
+    def test_raise_exception_answers_403(self):
+        with self.assertRaises(PermissionDenied):
+            self.call(User.objects.get(pk=self.user.pk), raise_exception=True)
+
+    def test_lets_the_role_through(self):
+        profile = UserProfile.objects.get(user=self.user)
+        profile.role = 'Admin'
+        profile.save()
+        self.assertEqual(self.call(User.objects.get(pk=self.user.pk)).content, b'ok')
+
+
+class BookBulkImportTests(TestCase):
+    CSV = (
+        b"id,title,author,published_date\n"
+        b",Harry Potter,J.K. Rowling,1997-06-26\n"
+        b",Caf\xe9,Nobody,\n"
+        b",Emma,Jane Austen,someday\n"
+        b"," + b"x" * 300 + b",Nobody,\n"
+        b",Persuasion,Jane Austen,\n"
+    )
+
+    def import_file(self, content, suffix='.csv'):
+        with tempfile.NamedTemporaryFile('wb', suffix=suffix, delete=False) as handle:
+            handle.write(content)
+        self.addCleanup(os.unlink, handle.name)
+        out, err = StringIO(), StringIO()
+        call_command('import_books', handle.name, '--batch-size', '2', stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_bad_records_are_reported_not_raised(self):
+        # field_size_limit() returns the previous limit
+        self.addCleanup(csv.field_size_limit, csv.field_size_limit(100))
+        out, err = self.import_file(self.CSV)
+        self.assertIn('Imported 2 rows (2 created, 0 updated, 3 invalid)', out)
+        self.assertIn('record 2: not valid UTF-8', err)
+        self.assertIn('record 3: published_date must be', err)
+        self.assertIn('record 4: malformed CSV (field larger than field limit (100))', err)
+        self.assertEqual(Book.objects.get(title='Persuasion').author.name, 'Jane Austen')
+
+    def test_export_round_trips(self):
+        self.import_file(self.CSV)
+        out = StringIO()
+        call_command('export_books', '--format', 'ndjson', stdout=out, stderr=StringIO())
+        Book.objects.all().delete()
+        self.import_file(out.getvalue().encode(), '.ndjson')
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), ['Harry Potter', 'Persuasion'])
+
+    def post_import(self, user, content):
+        request = RequestFactory().post('/books/import/', content, content_type='text/csv')
+        request.user = User.objects.get(pk=user.pk)  # a fresh User, as every request gets
+        return json.loads(views.import_books(request).content)
+
+    def test_updates_need_the_change_permission(self):
+        book = Book.objects.create(title='Emma', author=Author.objects.create(name='Jane Austen'))
+        clerk = User.objects.create_user(username='clerk', email='clerk@example.com', password='pass12345')
+        clerk.user_permissions.add(Permission.objects.get(codename='can_add_book', content_type__app_label='relationship_app'))
+        content = f"id,title,author,published_date\n{book.pk},Emma (edited),Jane Austen,\n,Persuasion,Jane Austen,\n".encode()
+
+        stats = self.post_import(clerk, content)
+        self.assertEqual((stats['created'], stats['updated'], stats['invalid']), (1, 0, 1))
+        self.assertEqual(stats['errors'], [f'record 1: id {book.pk} already exists and updates are not allowed'])
+        book.refresh_from_db()
+        self.assertEqual(book.title, 'Emma')
+
+        clerk.user_permissions.add(Permission.objects.get(codename='can_change_book', content_type__app_label='relationship_app'))
+        self.assertEqual(self.post_import(clerk, content)['updated'], 1)
+        book.refresh_from_db()
+        self.assertEqual(book.title, 'Emma (edited)')
+
+    def test_catalog_is_refreshed_when_a_batch_fails(self):
+        with mock.patch.object(bulk_io, '_write_batch', side_effect=RuntimeError), \
+                mock.patch.object(BookCatalog, 'imported') as imported:
+            with self.assertRaises(RuntimeError):
+                self.import_file(self.CSV)
+        imported.assert_called_once()
+
+
+class LibraryPageTests(TestCase):
+    # The pages replayed by benchmarks/mixes/relationship_app.json
+    def test_book_list_and_library_detail_render(self):
+        library = Library.objects.create(name='Central')
+        library.books.add(Book.objects.create(title='Emma', author=Author.objects.create(name='Jane Austen')))
+        self.assertEqual(self.client.get('/list/books/', secure=True).status_code, 200)
+        response = self.client.get(f'/list/library/{library.pk}/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([book.title for book in response.context['books']], ['Emma'])
@@ -16,4 +16,6 @@ urlpatterns = [
     path('add_book/', views.add_book, name='add_book'),  # Ensure trailing slash
     path('edit_book/<int:pk>/', views.edit_book, name='edit_book'),  # Ensure trailing slash
     path('delete/<int:pk>/', views.delete_book, name='delete_book'),  # Ensure trailing slash
-]
\ No newline at end of file
+    path('books/export/', views.export_books, name='export_books'),
+    path('books/import/', views.import_books, name='import_books'),
+]
@@ -5,9 +5,13 @@ from .models import Library
 from django.views.generic.detail import DetailView
 from django.contrib import messages
 from django.contrib.auth import login,logout
-from django.contrib.auth.decorators import user_passes_test
 from .forms import BookForm
 from django.contrib.auth.decorators import permission_required
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_POST
+from learnlab.bulk_io import CONTENT_TYPES, FORMATS, decode_lines, export_lines, format_for, import_rows, read_rows
+from .catalog import BookCatalog
+from .roles import resolve, role_required
 
 
 def list_books(request):
@@ -24,11 +28,8 @@ class LibraryDetailView(DetailView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        library = self.get_object()
-        context['books'] = Book.objects.filter(library=library)
+        context['books'] = Book.objects.filter(library=self.object)
         return context
-    def get_template_names(self):
-        return ['templates/library_detail.html'] 
 
 def register(request):
     if request.method == 'POST':
@@ -62,24 +63,25 @@ def LogoutView(request):
     messages.success(request, 'You have been logged out.')
     return redirect('login')
 
+# Roles come from relationship_app/roles.py, cached across requests
 def is_admin(user):
-    return user.userprofile.role == 'Admin'
+    return resolve(user).has_role('Admin')
 
 def is_librarian(user):
-    return user.userprofile.role == 'Librarian'
+    return resolve(user).has_role('Librarian')
 
 def is_member(user):
-    return user.userprofile.role == 'Member'
+    return resolve(user).has_role('Member')
 
-@user_passes_test(is_admin)
+@role_required('Admin')
 def admin_view(request):
     return render(request, 'relationship_app/admin_view.html')
 
-@user_passes_test(is_librarian)
+@role_required('Librarian')
 def librarian_view(request):
     return render(request, 'relationship_app/librarian_view.html')
 
-@user_passes_test(is_member)
+@role_required('Member')
 def member_view(request):
     return render(request, 'relationship_app/member_view.html')
 
@@ -112,4 +114,30 @@ def delete_book(request, pk):
     if request.method == 'POST':
         book.delete()
         return redirect('book_list')  
-    return render(request, 'relationship_app/delete_book.html', {'book': book})
\ No newline at end of file
+    return render(request, 'relationship_app/delete_book.html', {'book': book})
+
+
+# Bulk export/import of the library books (learnlab/bulk_io.py). Both stream:
+# the export as it is read, the import line by line from the request body.
+@permission_required('relationship_app.view_book', raise_exception=True)
+@require_GET
+def export_books(request):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f"format must be one of {', '.join(FORMATS)}.")
+    catalog = BookCatalog()
+    response = StreamingHttpResponse(export_lines(catalog.export_rows(), catalog.COLUMNS, fmt),
+                                     content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+    return response
+
+@permission_required('relationship_app.can_add_book', raise_exception=True)
+@require_POST
+def import_books(request):
+    fmt = format_for(request.content_type, default=None)
+    if fmt is None:
+        return HttpResponse("Send text/csv or application/x-ndjson.", status=415)
+    # Rows with the id of an existing book update it, which needs the edit permission too
+    allow_updates = request.user.has_perm('relationship_app.can_change_book')
+    stats = import_rows(BookCatalog(), read_rows(decode_lines(request), fmt), allow_updates=allow_updates)
+    return JsonResponse(stats.as_dict())
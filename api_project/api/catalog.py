@@ -0,0 +1,38 @@
+from learnlab import response_cache
+from learnlab.bulk_io import EXPORT_CHUNK_SIZE
+from .models import Book
+
+
+class BookCatalog:
+    """
+    Books for bulk import/export (learnlab/bulk_io.py): one row per book,
+    with the author as plain text like the model stores it.
+    """
+
+    MODEL = Book
+    COLUMNS = ('id', 'title', 'author')
+    UPDATE_FIELDS = ['title', 'author']
+
+    def build_batch(self, rows):
+        return [self.build(row) for row in rows]
+
+    def build(self, row):
+        """A Book for the row, or an error message."""
+        title = str(row.get('title') or '').strip()
+        author = str(row.get('author') or '').strip()
+        if not title or len(title) > Book._meta.get_field('title').max_length:
+            return 'title is required (at most 50 characters)'
+        if not author or len(author) > Book._meta.get_field('author').max_length:
+            return 'author is required (at most 50 characters)'
+        try:
+            pk = int(row['id']) if row.get('id') not in (None, '') else None
+        except (TypeError, ValueError):
+            return 'id must be a whole number'
+        return Book(pk=pk, title=title, author=author)
+
+    def export_rows(self):
+        return Book.objects.order_by('pk').values_list(*self.COLUMNS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+    def imported(self):
+        # What the save signal (api/signals.py) would have done per row
+        response_cache.bump(Book)
@@ -0,0 +1,38 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from learnlab.bulk_io import BATCH_SIZE, FORMATS, decode_lines, format_for, import_rows, read_rows
+from api.catalog import BookCatalog
+
+
+class Command(BaseCommand):
+    help = (
+        "Import books from a CSV or NDJSON file ('-' reads stdin) in constant memory. "
+        "Rows with the id of an existing book update it, the others are created."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to read, or '-' for stdin.")
+        parser.add_argument('--format', choices=FORMATS,
+                            help="Input format (default: from the file extension, else csv).")
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE,
+                            help=f"Rows written per transaction (default: {BATCH_SIZE}).")
+
+    def handle(self, *args, path, format, batch_size, **options):
+        fmt = format or format_for(path)
+        try:
+            stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+        except OSError as exc:
+            raise CommandError(exc)
+        try:
+            stats = import_rows(BookCatalog(), read_rows(decode_lines(stream), fmt), batch_size=batch_size)
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        for error in stats.errors:
+            self.stderr.write(error)
+        if stats.invalid > len(stats.errors):
+            self.stderr.write(f"... and {stats.invalid - len(stats.errors)} more invalid rows.")
+        self.stdout.write(self.style.SUCCESS(stats.summary()))
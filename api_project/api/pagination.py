@@ -0,0 +1,12 @@
+from learnlab.pagination import KeysetPagination as BaseKeysetPagination
+
+
+class KeysetPagination(BaseKeysetPagination):
+    """Keyset pagination in id order; the api models have no created_at."""
+    ordering = ('id',)
+
+
+class DirectoryPagination(KeysetPagination):
+    """Larger pages for listings of small projected rows, like the user directory."""
+    page_size = 50
+    max_page_size = 500
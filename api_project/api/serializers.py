@@ -4,4 +4,10 @@ from .models import Book
 class BookSerializer(serializers.ModelSerializer):
     class Meta:
         model = Book
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+# Directory rows are .values() dicts, not User instances (see api.views.ListUsers)
+class UserDirectorySerializer(serializers.Serializer):
+    id=serializers.IntegerField()
+    username=serializers.CharField()
+    email=serializers.EmailField()
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from learnlab import response_cache
+from .models import Book
+
+
+# Any write to the books table retires the cached book lists
+@receiver(post_save, sender=Book)
+@receiver(post_delete, sender=Book)
+def invalidate_book_responses(sender, **kwargs):
+    response_cache.bump(Book)
@@ -1,3 +1,219 @@
-from django.test import TestCase
+import base64
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from learnlab import bulk_io, response_cache
+from learnlab.testing import QueryBudgetMixin
+from .catalog import BookCatalog
+from .models import Book
+
+
+class ListUsersQueryBudgetTests(QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='admin', email='admin@example.com', password='pass12345')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def make_users(self, start, count):
+        User.objects.bulk_create(
+            User(username=f'user{start + i}', email=f'user{start + i}@example.com') for i in range(count)
+        )
+
+    def test_list_users_does_not_grow_with_users(self):
+        # Token lookup (with its user) + the user list
+        self.assertQueriesFlat(self.make_users, lambda: self.client.get('/api/users/'), budget=2)
+
+    def test_pages_follow_usernames(self):
+        self.make_users(0, 5)
+        page = self.client.get('/api/users/?page_size=4').json()
+        self.assertEqual([row['username'] for row in page['results']], ['admin', 'user0', 'user1', 'user2'])
+        self.assertEqual(set(page['results'][0]), {'id', 'username', 'email'})
+        rest = self.client.get(page['next']).json()
+        self.assertEqual([row['username'] for row in rest['results']], ['user3', 'user4'])
+        self.assertIsNone(rest['next'])
+
+    def test_prefix_search_is_an_index_range(self):
+        User.objects.bulk_create(User(username=name) for name in ('ann', 'anna', 'annie', 'anton', 'bob'))
+        response = self.client.get('/api/users/?prefix=ann')
+        self.assertEqual([row['username'] for row in response.json()['results']], ['ann', 'anna', 'annie'])
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get('/api/users/?prefix=ann')
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + queries[-1]['sql'])
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('USING INDEX', plan)
+
+    def test_stream_exports_the_directory(self):
+        self.make_users(0, 3)
+        response = self.client.get('/api/users/?stream=ndjson&prefix=user')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['username'] for row in rows], ['user0', 'user1', 'user2'])
+        self.assertEqual(rows[0]['email'], 'user0@example.com')
+
+
+def cursor(payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.books = [Book.objects.create(title=f'Book {i}', author=author) for i, author in enumerate('ABCDE')]
+
+    def titles(self, page):
+        return [row['title'] for row in page['results']]
+
+    def test_pages_are_stable_under_inserts(self):
+        # -author, -id
+        first = self.client.get('/api/books_all/', {'page_size': 2}).json()
+        self.assertEqual(self.titles(first), ['Book 4', 'Book 3'])
+        self.assertNotIn('count', first)
+
+        # A book written between page loads must not shift the next page
+        Book.objects.create(title='Late', author='Z')
+        second = self.client.get(first['next']).json()
+        self.assertEqual(self.titles(second), ['Book 2', 'Book 1'])
+        self.assertEqual(self.client.get(second['previous']).json()['results'], first['results'])
+
+    def test_malformed_cursors_are_not_found(self):
+        for token in ('not-a-cursor', cursor({'r': 0, 'p': ['garbage', 'x']}), cursor([{'a': 1}, 1]),
+                      cursor({'r': 0, 'p': [None, None]}), cursor({'r': 0, 'p': [{'a': 1}, 1]}),
+                      cursor({'r': 0, 'p': ['A']})):
+            with self.subTest(token=token):
+                self.assertEqual(self.client.get('/api/books_all/', {'cursor': token}).status_code, 404)
+        response = self.client.get('/api/users/', {'cursor': cursor({'r': 0, 'p': [[1]]})})
+        self.assertEqual(response.status_code, 404)
+
+
+class BookResponseCacheTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.book = Book.objects.create(title='Dune', author='Frank Herbert')
+
+    def test_list_is_cached_until_a_book_changes(self):
+        for url in ('/api/books/', '/api/books_all/'):
+            self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+            # Only the token lookup
+            with self.assertNumQueries(1):
+                self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+        Book.objects.create(title='Emma', author='Jane Austen')
+        response = self.client.get('/api/books/?page_size=5')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(len(response.json()['results']), 2)
+        self.assertEqual(self.client.get('/api/books_all/')['X-Cache'], 'MISS')
+
+    def test_invalidation_reaches_other_workers(self):
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection('responses')
+        key = response_cache._generation_key(Book)
+        generation, = response_cache.generations((Book,))
+        self.assertEqual(other_worker.get(key), generation)
+        self.book.save()
+        self.assertNotEqual(other_worker.get(key), generation)
+
+    def test_unauthenticated_requests_are_not_served_from_cache(self):
+        self.client.get('/api/books/')
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/books/').status_code, 401)
+
+
+class BookBulkImportExportTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.user = User.objects.create_user(username='loader', password='pass12345')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_import_then_export(self):
+        self.assertEqual(self.client.get('/api/books/').json()['results'], [])
+        body = 'title,author\nDune,Frank Herbert\nEmma,Jane Austen\n,No title\n'
+        response = self.client.post('/api/books/import/', body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(response.json()['errors'], ['record 3: title is required (at most 50 characters)'])
+        # The bulk import invalidated the cached list
+        self.assertEqual(len(self.client.get('/api/books/?page_size=5').json()['results']), 2)
+
+        response = self.client.get('/api/books/export/?type=ndjson')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Dune', 'Emma'])
+
+        dune = Book.objects.get(title='Dune')
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as handle:
+            handle.write(json.dumps({'id': dune.pk, 'title': 'Dune Messiah', 'author': 'Frank Herbert'}) + '\n')
+        self.addCleanup(os.unlink, handle.name)
+        out = StringIO()
+        call_command('import_books', handle.name, stdout=out, stderr=StringIO())
+        self.assertIn('(0 created, 1 updated, 0 invalid)', out.getvalue())
+        dune.refresh_from_db()
+        self.assertEqual(dune.title, 'Dune Messiah')
+
+    def test_bad_records_are_reported_not_raised(self):
+        # field_size_limit() returns the previous limit
+        self.addCleanup(csv.field_size_limit, csv.field_size_limit(100))
+        body = b'title,author\nDune,Frank Herbert\nCaf\xe9,Nobody\n' + b'x' * 200 + b',Nobody\nEmma,Jane Austen\n'
+        response = self.client.post('/api/books/import/', body, content_type='text/csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['created'], 2)
+        self.assertEqual(response.json()['errors'], [
+            'record 2: not valid UTF-8', 'record 3: malformed CSV (field larger than field limit (100))',
+        ])
+
+    def test_catalog_is_refreshed_when_a_batch_fails(self):
+        with mock.patch.object(bulk_io, '_write_batch', side_effect=RuntimeError), \
+                mock.patch.object(BookCatalog, 'imported') as imported:
+            with self.assertRaises(RuntimeError):
+                bulk_io.import_rows(BookCatalog(), [{'title': 'Dune', 'author': 'Frank Herbert'}])
+        imported.assert_called_once()
+
+    def test_import_requires_a_known_content_type(self):
+        response = self.client.post('/api/books/import/', '{}', content_type='application/json')
+        self.assertEqual(response.status_code, 415)
+
+
+class BookStreamingListTests(APITestCase):
+    def setUp(self):
+        caches['responses'].clear()
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        Book.objects.bulk_create(Book(title=f'Book {i:04}', author=f'Author {i % 7}') for i in range(1200))
+
+    def stream(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content)
+
+    def test_streams_every_book_unpaginated(self):
+        books = json.loads(self.stream('/api/books/?stream=json'))
+        self.assertEqual(len(books), 1200)
+        self.assertEqual(books[0], {'id': Book.objects.order_by('pk')[0].pk, 'title': 'Book 0000', 'author': 'Author 0'})
+
+    def test_viewset_streams_ndjson_in_its_ordering(self):
+        lines = self.stream('/api/books_all/?stream=ndjson').splitlines()
+        self.assertEqual(len(lines), 1200)
+        self.assertEqual(json.loads(lines[0])['author'], 'Author 6')
+
+    def test_requires_authentication(self):
+        self.client.credentials()
+        self.assertEqual(self.client.get('/api/books/?stream=json').status_code, 401)
@@ -4,6 +4,7 @@ from rest_framework import routers
 from .views import BookViewSet
 from .views import ListUsers
 from .views import CustomAuthToken
+from .views import BookExport, BookImport
 
 router=routers.DefaultRouter()
 
@@ -13,6 +14,10 @@ urlpatterns = [
     # Route for the BookList view (ListAPIView)
     path('books/',BookList.as_view(), name='book-list'),
 
+    # Streaming CSV/NDJSON export and bulk import of the catalog
+    path('books/export/',BookExport.as_view(), name='book-export'),
+    path('books/import/',BookImport.as_view(), name='book-import'),
+
     # Include the router URLs for BookViewSet (all CRUD operations)
     path('', include(router.urls)), # This includes all routes registered with the router
 
@@ -1,28 +1,87 @@
 from django.shortcuts import render
 from rest_framework import generics,viewsets,authentication,permissions
 from .models import Book
-from .serializers import BookSerializer
+from .serializers import BookSerializer, UserDirectorySerializer
+from .pagination import DirectoryPagination
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.authtoken.models import Token
 from django.contrib.auth.models import User
+from django.http import StreamingHttpResponse
+from learnlab.bulk_io import CONTENT_TYPES, FORMATS, decode_lines, export_lines, format_for, import_rows, read_rows
+from learnlab.response_cache import CachedListMixin
+from learnlab.streaming import StreamingListMixin
+from .catalog import BookCatalog
 
 # Create your views here.
-class BookList(generics.ListAPIView):
+# Book lists are served from the response cache (learnlab/response_cache.py)
+# until a book is written; every user sees the same books. ?stream=json|ndjson
+# streams the whole list unpaginated instead (learnlab/streaming.py)
+class BookList(StreamingListMixin, CachedListMixin, generics.ListAPIView):
     queryset = Book.objects.all()
     serializer_class=BookSerializer
+    cache_models=(Book,)
+    cache_per_user=False
 
-class BookViewSet(viewsets.ModelViewSet):
+class BookViewSet(StreamingListMixin, CachedListMixin, viewsets.ModelViewSet):
     queryset=Book.objects.all().order_by('-author')
     serializer_class=BookSerializer
+    keyset_ordering=('-author','-id')
+    cache_models=(Book,)
+    cache_per_user=False
 
-class ListUsers(APIView):
+# User directory: id, username and email only, read as .values() rows (no User
+# instances), in keyset pages over the unique username index, so a page costs
+# the same however many users there are. ?prefix= narrows to usernames starting
+# with it (case-sensitive) as an index range scan; ?stream=json|ndjson exports
+# the whole (narrowed) directory unpaginated, a chunk at a time
+class ListUsers(StreamingListMixin, generics.ListAPIView):
     authentication_classes=[authentication.TokenAuthentication]
     permission_classes=[permissions.IsAuthenticated]
-    def get(self,request,format=None):
-        emails=[user.email for user in User.objects.all()]
-        return Response(emails)
+    serializer_class=UserDirectorySerializer
+    pagination_class=DirectoryPagination
+    keyset_ordering=('username',)
+    def get_queryset(self):
+        users=User.objects.order_by('username').values('id','username','email')
+        prefix=self.request.query_params.get('prefix')
+        if prefix:
+            users=users.filter(**username_prefix(prefix))
+        return users
+    def stream_rows(self,queryset):
+        # The rows already have the serializer's keys
+        return queryset.iterator(chunk_size=self.stream_chunk_size)
+
+def username_prefix(prefix):
+    # username >= 'ab' AND username < 'ac' rather than LIKE 'ab%', which SQLite
+    # can't serve from the index (Django's LIKE has an ESCAPE clause)
+    try:
+        upper=prefix[:-1]+chr(ord(prefix[-1])+1)
+    except ValueError:  # the last character is already the highest code point
+        return {'username__startswith':prefix}
+    return {'username__gte':prefix,'username__lt':upper}
+
+# Bulk load and dump of the catalog (learnlab/bulk_io.py), streamed both ways
+class BookExport(APIView):
+    def get(self,request):
+        # ?type=, as DRF keeps ?format= for picking a renderer
+        fmt=request.query_params.get('type','csv')
+        if fmt not in FORMATS:
+            return Response({'detail':f'type must be one of {", ".join(FORMATS)}.'},status=400)
+        catalog=BookCatalog()
+        response=StreamingHttpResponse(export_lines(catalog.export_rows(),catalog.COLUMNS,fmt),content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition']=f'attachment; filename="books.{fmt}"'
+        return response
+
+class BookImport(APIView):
+    parser_classes=[]  # the body is read line by line, never parsed into request.data
+    def post(self,request):
+        fmt=format_for(request.content_type,default=None)
+        if fmt is None:
+            return Response({'detail':'Send text/csv or application/x-ndjson.'},status=415)
+        lines=decode_lines(request.stream) if request.stream is not None else ()
+        stats=import_rows(BookCatalog(),read_rows(lines,fmt))
+        return Response(stats.as_dict())
 
 class CustomAuthToken(ObtainAuthToken):
     def post(self,request,*args,**kwargs):
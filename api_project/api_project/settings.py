@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Code shared with the other projects in this repository lives in learnlab/ at
+# its root
+REPO_DIR = BASE_DIR.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -28,7 +36,7 @@ DEBUG = True
 ALLOWED_HOSTS = []
 
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.KeysetPagination',
     'PAGE_SIZE': 1,
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.TokenAuthentication',
@@ -55,6 +63,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'learnlab.instrumentation.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -135,3 +144,29 @@ STATIC_URL = 'static/'
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Per-view query/latency metrics (see learnlab/instrumentation.py), scraped from
+# /internal/metrics/ by staff users, or by a scraper sending
+# "Authorization: Bearer <INSTRUMENTATION_METRICS_TOKEN>" (None turns that off)
+INSTRUMENTATION_METRICS_TOKEN = None
+INSTRUMENTATION_SERVER_TIMING = DEBUG
+
+# Cached API list responses (see learnlab/response_cache.py). Every worker
+# process must share the cache, or the ones that didn't handle a write keep
+# serving the old pages: FileBasedCache shares it between the workers of one
+# host, django.core.cache.backends.redis.RedisCache (needs redis-py) between hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'responses': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'api_project-responses',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+}
+# Tests get every FileBasedCache above in a temporary directory instead, so
+# they never clear or read the entries of a running server
+TEST_RUNNER = 'learnlab.testing.IsolatedCachesRunner'
+RESPONSE_CACHE_ALIAS = 'responses'
+RESPONSE_CACHE_TIMEOUT = 300
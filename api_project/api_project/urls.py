@@ -17,7 +17,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from learnlab.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('internal/metrics/', metrics_view, name='metrics'),
     path('api/', include('api.urls')),
 ]
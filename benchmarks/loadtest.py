@@ -0,0 +1,239 @@
+"""
+In-process load driver for the Django projects in this repository.
+
+Replays a weighted mix of requests straight against a project's WSGI
+application (no server, no sockets), so the numbers measure Django, the ORM
+and the database, and reports requests/second and p50/p95/p99 latency per
+endpoint.
+
+    python benchmarks/loadtest.py benchmarks/mixes/social_media_api.json \\
+        --requests 5000 --concurrency 4
+
+A mix file names the project directory, its settings module, the user to
+send requests as (optional) and the requests:
+
+    {
+      "project": "social_media_api",
+      "settings": "social_media_api.settings",
+      "user": "bench_0",
+      "requests": [
+        {"name": "feed", "path": "/api/posts/feed/", "weight": 5},
+        {"name": "post", "path": "/api/posts/posts/{post}/", "params": {"post": [1, 5000]}}
+      ]
+    }
+
+"{name}" placeholders in a path are filled with a random integer from the
+matching "params" range. Requests are sent with a logged-in session cookie
+for "user"; give "headers" on a request for other kinds of authentication.
+Seed the database first with the project's seed_* management commands.
+"""
+import argparse
+import io
+import json
+import math
+import os
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_application(project, settings_module, host):
+    sys.path.insert(0, os.path.join(ROOT, project))
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.core.wsgi import get_wsgi_application
+
+    # Requests come from this process only; let the benchmark host through
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, host]
+    return get_wsgi_application()
+
+
+def session_cookie(username):
+    """Log ``username`` in and return the session cookie header value."""
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+    from django.contrib.sessions.backends.db import SessionStore
+
+    User = get_user_model()
+    user = User.objects.get(**{User.USERNAME_FIELD: username})
+    session = SessionStore()
+    session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    session.save()
+    return f'{settings.SESSION_COOKIE_NAME}={session.session_key}'
+
+
+def plan(mix, total, rng):
+    """The sequence of (name, method, path, headers, body) to send."""
+    entries = mix['requests']
+    weights = [entry.get('weight', 1) for entry in entries]
+    for entry in rng.choices(entries, weights=weights, k=total):
+        params = {key: rng.randint(low, high) for key, (low, high) in entry.get('params', {}).items()}
+        body = entry.get('body')
+        yield (
+            entry.get('name', entry['path']),
+            entry.get('method', 'GET').upper(),
+            entry['path'].format(**params),
+            entry.get('headers', {}),
+            json.dumps(body).encode() if body is not None else b'',
+        )
+
+
+def build_environ(method, path, headers, body, host, cookie):
+    path, _, query = path.partition('?')
+    environ = {
+        'REQUEST_METHOD': method,
+        'PATH_INFO': path,
+        'QUERY_STRING': query,
+        'SERVER_NAME': host,
+        'SERVER_PORT': '443',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': host,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        # https, so SECURE_SSL_REDIRECT doesn't turn every request into a 301
+        'wsgi.url_scheme': 'https',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    if cookie:
+        environ['HTTP_COOKIE'] = cookie
+    for name, value in headers.items():
+        environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+
+def call(application, environ):
+    """Run one request through the application; returns the status code."""
+    status = []
+
+    def start_response(status_line, response_headers, exc_info=None):
+        status.append(int(status_line.split()[0]))
+
+    result = application(environ, start_response)
+    try:
+        # Drain the body so streaming responses are timed in full
+        for _ in result:
+            pass
+    finally:
+        if hasattr(result, 'close'):
+            result.close()
+    return status[0]
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+def run(application, requests, concurrency, host, cookie):
+    from django.db import connections
+
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    lock = threading.Lock()
+    requests = iter(requests)
+
+    def worker():
+        try:
+            while True:
+                with lock:
+                    request = next(requests, None)
+                if request is None:
+                    return
+                name, method, path, headers, body = request
+                environ = build_environ(method, path, headers, body, host, cookie)
+                start = time.perf_counter()
+                status = call(application, environ)
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies[name].append(elapsed)
+                    if status >= 400:
+                        errors[name] += 1
+        finally:
+            connections.close_all()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(latencies, errors, wall):
+    rows = []
+    for name, values in sorted(latencies.items()):
+        ordered = sorted(values)
+        rows.append({
+            'endpoint': name,
+            'requests': len(ordered),
+            'errors': errors.get(name, 0),
+            'rps': len(ordered) / wall,
+            'p50_ms': percentile(ordered, 50) * 1000,
+            'p95_ms': percentile(ordered, 95) * 1000,
+            'p99_ms': percentile(ordered, 99) * 1000,
+        })
+    everything = sorted(value for values in latencies.values() for value in values)
+    rows.append({
+        'endpoint': 'TOTAL',
+        'requests': len(everything),
+        'errors': sum(errors.values()),
+        'rps': len(everything) / wall,
+        'p50_ms': percentile(everything, 50) * 1000,
+        'p95_ms': percentile(everything, 95) * 1000,
+        'p99_ms': percentile(everything, 99) * 1000,
+    })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a request mix against a project's WSGI app in-process.")
+    parser.add_argument('mix', help="Path to a mix JSON file.")
+    parser.add_argument('--requests', type=int, default=2000, help="Requests to send (default: 2000).")
+    parser.add_argument('--warmup', type=int, default=100, help="Untimed requests sent first (default: 100).")
+    parser.add_argument('--concurrency', type=int, default=1, help="Worker threads (default: 1).")
+    parser.add_argument('--settings', help="Settings module, overriding the mix file's.")
+    parser.add_argument('--user', help="User to send requests as, overriding the mix file's.")
+    parser.add_argument('--host', default='benchmark.local', help="Host header (default: benchmark.local).")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed for the request sequence (default: 0).")
+    parser.add_argument('--json', action='store_true', help="Print the results as JSON.")
+    args = parser.parse_args(argv)
+
+    with open(args.mix) as f:
+        mix = json.load(f)
+    application = load_application(mix['project'], args.settings or mix['settings'], args.host)
+    username = args.user or mix.get('user')
+    cookie = session_cookie(username) if username else None
+
+    rng = random.Random(args.seed)
+    run(application, plan(mix, args.warmup, rng), args.concurrency, args.host, cookie)
+    latencies, errors, wall = run(application, plan(mix, args.requests, rng), args.concurrency, args.host, cookie)
+    rows = report(latencies, errors, wall)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+    print(f"{'endpoint':<30} {'requests':>8} {'errors':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in rows:
+        print(
+            f"{row['endpoint']:<30} {row['requests']:>8} {row['errors']:>6} {row['rps']:>9.1f} "
+            f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Code shared with the other projects in this repository lives in learnlab/ at
+# its root
+REPO_DIR = BASE_DIR.parent.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -123,6 +131,24 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Roles and permissions cached by relationship_app/roles.py, shared by all
+# worker processes. FileBasedCache shares them between the workers of one
+# host; use django.core.cache.backends.redis.RedisCache (needs redis-py)
+# between hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'roles': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'django-models-libraryproject-roles',
+    },
+}
+# Tests get every FileBasedCache above in a temporary directory instead, so
+# they never clear or read the entries of a running server
+TEST_RUNNER = 'learnlab.testing.IsolatedCachesRunner'
+ROLE_CACHE_ALIAS = 'roles'
+
 # Redirect after login
 LOGIN_REDIRECT_URL = 'list_books'
 LOGOUT_REDIRECT_URL = 'login'
@@ -0,0 +1,150 @@
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.core.cache import caches
+from django.core.exceptions import PermissionDenied
+from django.db import transaction
+
+from .models import UserProfile
+
+try:
+    from rest_framework.permissions import BasePermission
+except ImportError:  # Django REST framework isn't a dependency of this project
+    BasePermission = None
+
+try:
+    from bookshelf.backends import version as permission_version
+except ImportError:  # no shared permission cache (bookshelf/backends.py) in this project
+    def permission_version():
+        return 0
+
+# Role and permission resolution for access checks. Reading
+# ``user.<profile>.role`` in every role-gated view costs a query per request
+# (and the profile's related_name differs between copies of this app), and
+# user.has_perm() loads the permission set again for every new User object,
+# i.e. on every request.
+#
+# resolve() reads the user's role and full permission set once, keeps them
+# on the user object for the rest of the request and in the cache named by
+# ROLE_CACHE_ALIAS for the next ones, so a role-gated view normally costs no
+# query at all. That cache must be shared by every worker process (a
+# FileBasedCache in settings): with a per-process cache, invalidating an entry
+# in one worker leaves the others serving the old role.
+#
+# Entries are dropped by the signals in signals.py when a UserProfile is saved
+# or deleted or a user's groups or permissions change; a change to a group's
+# permissions, or a deleted group or permission, retires every entry at once
+# through a generation number in the key. The key also holds the version of
+# the shared permission cache, where the project has one, so whatever retires
+# cached permission sets there retires these entries too, and whether the user
+# is a superuser, since superusers hold every permission. Invalidation happens
+# at once and again after the transaction commits, so a request reading the
+# old rows meanwhile doesn't cache them for good.
+
+ROLE_CACHE_ALIAS = getattr(settings, 'ROLE_CACHE_ALIAS', 'default')
+ROLE_CACHE_TIMEOUT = getattr(settings, 'ROLE_CACHE_TIMEOUT', 300)
+KEY_PREFIX = 'relationship_app:access'
+GENERATION_KEY = f'{KEY_PREFIX}:generation'
+
+
+@dataclass(frozen=True)
+class Access:
+    role: str = None
+    permissions: frozenset = frozenset()
+
+    def has_role(self, *roles):
+        return self.role in roles
+
+    def has_perms(self, perms):
+        return set(perms) <= self.permissions
+
+    def allows(self, roles=(), perms=()):
+        """One of ``roles`` (any role when none are given) and all of ``perms``."""
+        return (not roles or self.has_role(*roles)) and self.has_perms(perms)
+
+
+ANONYMOUS = Access()
+
+
+def _cache():
+    return caches[ROLE_CACHE_ALIAS]
+
+
+def _generation():
+    cache = _cache()
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Not 0: entries of an evicted generation 0 could still be cached
+        cache.add(GENERATION_KEY, time.time_ns(), None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def _key(user_pk, is_superuser):
+    return f'{KEY_PREFIX}:{_generation()}:{permission_version()}:{user_pk}:{int(is_superuser)}'
+
+
+def resolve(user):
+    """The Access (role and permission names) of ``user``; anonymous and inactive users have none."""
+    if not user.is_authenticated or not user.is_active:
+        return ANONYMOUS
+    access = getattr(user, '_relationship_access', None)
+    if access is None:
+        cache = _cache()
+        key = _key(user.pk, user.is_superuser)
+        access = cache.get(key)
+        if access is None:
+            role = UserProfile.objects.filter(user_id=user.pk).values_list('role', flat=True).first()
+            access = Access(role, frozenset(user.get_all_permissions()))
+            cache.set(key, access, ROLE_CACHE_TIMEOUT)
+        user._relationship_access = access
+    return access
+
+
+def invalidate(user_pks):
+    def delete():
+        _cache().delete_many([_key(pk, flag) for pk in user_pks for flag in (False, True)])
+
+    delete()
+    transaction.on_commit(delete)
+
+
+def invalidate_all():
+    def bump():
+        cache = _cache()
+        try:
+            cache.incr(GENERATION_KEY)
+        except ValueError:
+            cache.set(GENERATION_KEY, time.time_ns(), None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def role_required(*roles, perms=(), login_url=None, raise_exception=False):
+    """
+    View decorator: let the request through when the user has one of
+    ``roles`` (any role when none are given) and every permission in
+    ``perms``. Otherwise redirect to the login page, or answer 403 with
+    ``raise_exception``.
+    """
+    def check(user):
+        if resolve(user).allows(roles, perms):
+            return True
+        if raise_exception:
+            raise PermissionDenied
+        return False
+
+    return user_passes_test(check, login_url=login_url)
+
+
+if BasePermission is not None:
+    def role_permission(*roles, perms=()):
+        """A DRF permission class for ``permission_classes``, checking like role_required()."""
+        class HasRole(BasePermission):
+            def has_permission(self, request, view):
+                return resolve(request.user).allows(roles, perms)
+        HasRole.__name__ = HasRole.__qualname__ = f"HasRole({', '.join(roles)})"
+        return HasRole
@@ -1,3 +1,4 @@
+from django.contrib.auth.views import LoginView, LogoutView
 from django.urls import path
 from . import views
 from .views import admin_view
@@ -26,4 +27,8 @@ urlpatterns = [
         path('add_book/', add_book, name='add_book'),
         path('edit_book/<int:pk>/', edit_book, name='edit_book'),
         path('delete_book/<int:pk>/', delete_book, name='delete_book'),
+
+    # Bulk export/import of the books
+        path('books/export/', views.export_books, name='export_books'),
+        path('books/import/', views.import_books, name='import_books'),
     ]
@@ -6,11 +6,15 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth.forms import AuthenticationForm
 from django.views.generic.detail import DetailView
-from django.contrib.auth.decorators import user_passes_test
 from django.contrib.auth.decorators import permission_required
+from django.http import HttpResponse, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET, require_POST
+from learnlab.bulk_io import CONTENT_TYPES, FORMATS, decode_lines, export_lines, format_for, import_rows, read_rows
+from .catalog import BookCatalog
 from .models import Book
 from .models import Library
 from .forms import BookForm
+from .roles import resolve, role_required
 
 # --- Function-based view: list all books ---
 def list_books(request):
@@ -54,26 +58,26 @@ def logout_view(request):
     logout(request)
     return render(request, 'relationship_app/logout.html')
 
-# Role check functions
+# Role check functions (roles are resolved and cached by relationship_app/roles.py)
 def is_admin(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Admin'
+    return resolve(user).has_role('Admin')
 
 def is_librarian(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Librarian'
+    return resolve(user).has_role('Librarian')
 
 def is_member(user):
-    return hasattr(user, 'userprofile') and user.userprofile.role == 'Member'
+    return resolve(user).has_role('Member')
 
 # Role-based views
-@user_passes_test(is_admin)
+@role_required('Admin')
 def admin_view(request):
     return render(request, 'relationship_app/admin_view.html')
 
-@user_passes_test(is_librarian)
+@role_required('Librarian')
 def librarian_view(request):
     return render(request, 'relationship_app/librarian_view.html')
 
-@user_passes_test(is_member)
+@role_required('Member')
 def member_view(request):
     return render(request, 'relationship_app/member_view.html')
 
@@ -110,3 +114,29 @@ def delete_book(request, pk):
         book.delete()
         return redirect('list_books')
     return render(request, 'relationship_app/delete_book.html', {'book': book})
+
+# Bulk export/import of the books (learnlab/bulk_io.py). Both stream:
+# the export as it is read, the import line by line from the request body.
+@permission_required('relationship_app.view_book', raise_exception=True)
+@require_GET
+def export_books(request):
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return HttpResponseBadRequest(f"format must be one of {', '.join(FORMATS)}.")
+    catalog = BookCatalog()
+    response = StreamingHttpResponse(export_lines(catalog.export_rows(), catalog.COLUMNS, fmt),
+                                     content_type=CONTENT_TYPES[fmt])
+    response['Content-Disposition'] = f'attachment; filename="books.{fmt}"'
+    return response
+
+# Import books (requires canaddbook permission)
+@permission_required('relationship_app.can_add_book', raise_exception=True)
+@require_POST
+def import_books(request):
+    fmt = format_for(request.content_type, default=None)
+    if fmt is None:
+        return HttpResponse("Send text/csv or application/x-ndjson.", status=415)
+    # Rows with the id of an existing book update it, which needs the edit permission too
+    allow_updates = request.user.has_perm('relationship_app.can_change_book')
+    stats = import_rows(BookCatalog(), read_rows(decode_lines(request), fmt), allow_updates=allow_updates)
+    return JsonResponse(stats.as_dict())
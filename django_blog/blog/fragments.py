@@ -0,0 +1,66 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+from django.utils import timezone
+
+from learnlab.instrumentation import registry
+from . import versions
+from .models import Post
+
+# Template fragment cache for the blog pages. {% cachefragment %} (in
+# templatetags/blog_cache.py) caches a block of HTML under a key built from the
+# fragment name and the objects it shows; a model instance contributes its pk
+# and updated_at, so editing it gives the fragment a new key and the stale
+# copy is never read again (it ages out after FRAGMENT_CACHE_TIMEOUT).
+#
+# Post.updated_at is bumped by signals whenever a comment or tag of the post
+# changes too, so one stamp covers everything shown for a post. Nothing
+# per-user goes inside a fragment: edit/delete controls render around it.
+#
+# Hits and misses per fragment are counted in the metrics registry
+# (blog_fragment_cache_requests_total on /internal/metrics/).
+
+FRAGMENT_CACHE_TIMEOUT = getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 600)
+FRAGMENT_CACHE_PREFIX = 'blog:fragment'
+
+METRIC = 'blog_fragment_cache_requests_total'
+METRIC_HELP = 'Template fragment cache lookups, per fragment and result.'
+
+
+def version_stamp(value):
+    if isinstance(value, models.Model):
+        updated_at = getattr(value, 'updated_at', None)
+        return f'{value._meta.label_lower}:{value.pk}:{updated_at.timestamp() if updated_at else ""}'
+    return str(value)
+
+
+def fragment_key(name, vary_on):
+    stamps = '|'.join(version_stamp(value) for value in vary_on)
+    digest = hashlib.md5(stamps.encode(), usedforsecurity=False).hexdigest()
+    return f'{FRAGMENT_CACHE_PREFIX}:{name}:{digest}'
+
+
+def get_or_render(name, vary_on, render):
+    key = fragment_key(name, vary_on)
+    html = cache.get(key)
+    if html is None:
+        registry.increment(METRIC, METRIC_HELP, fragment=name, result='miss')
+        html = render()
+        cache.set(key, html, FRAGMENT_CACHE_TIMEOUT)
+    else:
+        registry.increment(METRIC, METRIC_HELP, fragment=name, result='hit')
+    return html
+
+
+def fragment_stats(name):
+    """Hit and miss counts of fragment ``name`` in this process."""
+    return {result: registry.counter(METRIC, fragment=name, result=result) for result in ('hit', 'miss')}
+
+
+def touch_posts(post_ids):
+    """Bump updated_at of ``post_ids``, retiring every cached fragment of those posts."""
+    # update() sends no signals, so this doesn't queue a search reindex
+    Post.objects.filter(pk__in=post_ids).update(updated_at=timezone.now())
+    versions.posts.invalidate()
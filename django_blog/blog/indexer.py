@@ -0,0 +1,121 @@
+import atexit
+import logging
+import operator
+import threading
+from functools import reduce
+
+from django.conf import settings
+from django.db import close_old_connections, connections, router, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import search
+from .models import DirtyPost, Post
+
+logger = logging.getLogger(__name__)
+
+# Incremental search indexing. Saving a post or changing its tags only upserts
+# a DirtyPost row (see blog/signals.py); the request never builds documents.
+# Once the transaction commits, a background thread is woken to drain the
+# queue in batches. The thread also polls, so rows queued by other processes
+# or left behind by a crash are picked up; `manage.py reindex_posts --dirty`
+# drains the queue from cron or a dedicated worker process.
+#
+# Set SEARCH_INDEX_ASYNC = False to index on commit, in the request (tests).
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def mark_dirty(post_ids):
+    """Queue posts for reindexing; the indexer runs after the transaction commits."""
+    now = timezone.now()
+    connection = connections[router.db_for_write(DirtyPost)]
+    unique_fields = ['post_id'] if connection.features.supports_update_conflicts_with_target else None
+    # Re-marking a queued post moves its stamp forward so an in-flight batch
+    # doesn't drop the newer change
+    DirtyPost.objects.bulk_create(
+        [DirtyPost(post_id=post_id, marked_at=now) for post_id in post_ids],
+        update_conflicts=True, unique_fields=unique_fields, update_fields=['marked_at'],
+    )
+    transaction.on_commit(_queued)
+
+
+def _queued():
+    if _setting('SEARCH_INDEX_ASYNC', True):
+        indexer.wake()
+    else:
+        drain()
+
+
+def drain(batch_size=None):
+    """Refresh the documents of every queued post; returns the number of posts handled."""
+    batch_size = batch_size or _setting('SEARCH_INDEX_BATCH_SIZE', 500)
+    handled = 0
+    while True:
+        rows = list(DirtyPost.objects.order_by('marked_at').values_list('post_id', 'marked_at')[:batch_size])
+        if not rows:
+            return handled
+        post_ids = [post_id for post_id, _ in rows]
+        posts = list(Post.objects.filter(pk__in=post_ids).prefetch_related('tags'))
+        with transaction.atomic():
+            search.index_posts(posts)
+            search.unindex_posts(set(post_ids) - {post.pk for post in posts})
+            # Only the (post, stamp) pairs read: posts marked again since then
+            # have another stamp and stay queued
+            by_stamp = {}
+            for post_id, marked_at in rows:
+                by_stamp.setdefault(marked_at, []).append(post_id)
+            DirtyPost.objects.filter(reduce(operator.or_, (
+                Q(marked_at=marked_at, post_id__in=ids) for marked_at, ids in by_stamp.items()
+            ))).delete()
+        handled += len(rows)
+
+
+class Indexer:
+    """Single background thread draining the DirtyPost queue."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        if self._thread is None:
+            self.start()
+        self._wake.set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='search-indexer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        # Anything still queued stays in the table for the next drain
+        self._stopping.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        poll = _setting('SEARCH_INDEX_POLL_INTERVAL', 5.0)
+        linger = _setting('SEARCH_INDEX_LINGER', 0.5)
+        while not self._stopping.is_set():
+            self._wake.wait(poll)
+            self._wake.clear()
+            # Let a burst of saves collect into one batch
+            self._stopping.wait(linger)
+            try:
+                drain()
+            except Exception:
+                logger.exception("Search indexer failed to drain the queue")
+            finally:
+                close_old_connections()
+
+
+indexer = Indexer()
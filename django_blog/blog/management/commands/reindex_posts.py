@@ -0,0 +1,93 @@
+import json
+import multiprocessing
+import os
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.models import Max, Min
+
+from blog import indexer
+from blog.models import Post
+from blog.reindex import index_range, init_worker
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the search documents of all posts. The pk range is split into chunks "
+        "indexed by worker processes; finished chunks are checkpointed so an "
+        "interrupted run continues where it stopped when run again with --resume. "
+        "With --dirty, only drain the queue of changed posts instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dirty', action='store_true',
+                            help="Only index posts queued by saves (drains the DirtyPost table).")
+        parser.add_argument('--workers', type=int, default=1,
+                            help="Worker processes (default: 1, index in this process).")
+        parser.add_argument('--chunk-size', type=int, default=10000,
+                            help="Posts (by pk range) per checkpointed chunk (default: 10000).")
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Posts fetched and written per batch (default: 500).")
+        parser.add_argument('--checkpoint', default='reindex_posts.checkpoint.json',
+                            help="Checkpoint file (default: reindex_posts.checkpoint.json).")
+        parser.add_argument('--resume', action='store_true',
+                            help="Skip chunks finished by a previous, interrupted run.")
+
+    def handle(self, *args, dirty, workers, chunk_size, batch_size, checkpoint, resume, **options):
+        if dirty:
+            handled = indexer.drain(batch_size)
+            self.stdout.write(self.style.SUCCESS(f"Indexed {handled} queued posts."))
+            return
+
+        state = self.load_checkpoint(checkpoint) if resume else None
+        if state is None:
+            bounds = Post.objects.aggregate(lo=Min('pk'), hi=Max('pk'))
+            if bounds['lo'] is None:
+                self.stdout.write("No posts to index.")
+                return
+            # Posts created after this point are indexed through the queue
+            state = {'lo': bounds['lo'], 'hi': bounds['hi'], 'chunk_size': chunk_size, 'done': []}
+        done = set(state['done'])
+        chunks = [
+            (lo, lo + state['chunk_size'], batch_size)
+            for lo in range(state['lo'], state['hi'] + 1, state['chunk_size'])
+            if lo not in done
+        ]
+        self.stdout.write(f"Indexing {len(chunks)} chunks ({len(done)} already done).")
+
+        if workers > 1 and connections['default'].vendor == 'sqlite':
+            # SQLite has a single writer; parallel workers would only hit "database is locked"
+            self.stdout.write("SQLite allows one writer at a time; indexing in this process.")
+            workers = 1
+
+        indexed = 0
+        if workers > 1:
+            # Children open their own connections, and get the settings module
+            # passed in since spawned ones inherit nothing (see blog/reindex.py)
+            connections.close_all()
+            with multiprocessing.Pool(workers, initializer=init_worker, initargs=(os.environ['DJANGO_SETTINGS_MODULE'],)) as pool:
+                for lo, count in pool.imap_unordered(index_range, chunks):
+                    indexed += self.chunk_done(state, lo, count, checkpoint)
+        else:
+            for chunk in chunks:
+                lo, count = index_range(chunk)
+                indexed += self.chunk_done(state, lo, count, checkpoint)
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} posts."))
+
+    def chunk_done(self, state, lo, count, checkpoint):
+        state['done'].append(lo)
+        # Write-then-rename so a crash never leaves a half-written checkpoint
+        with open(checkpoint + '.tmp', 'w') as f:
+            json.dump(state, f)
+        os.replace(checkpoint + '.tmp', checkpoint)
+        return count
+
+    def load_checkpoint(self, checkpoint):
+        try:
+            with open(checkpoint) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
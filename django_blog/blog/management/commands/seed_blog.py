@@ -0,0 +1,108 @@
+import random
+from itertools import accumulate, islice
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+from taggit.models import Tag, TaggedItem
+
+from blog import versions
+from blog.models import Comment, Post, Profile
+
+WORDS = (
+    "django python template view model form query index cache search tag comment "
+    "author profile deploy testing migration admin static media session security"
+).split()
+
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Create synthetic users, tagged posts and comments for benchmarks. Tag usage "
+        "follows a power law, so a few tags are on most posts."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500,
+                            help="Number of authors to create (default: 500).")
+        parser.add_argument('--posts', type=int, default=20000,
+                            help="Number of posts to create (default: 20000).")
+        parser.add_argument('--tags', type=int, default=300,
+                            help="Size of the tag vocabulary (default: 300).")
+        parser.add_argument('--tags-per-post', type=int, default=3,
+                            help="Tags on each post (default: 3).")
+        parser.add_argument('--avg-comments', type=int, default=4,
+                            help="Average comments per post (default: 4).")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Rows per bulk_create (default: 2000).")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Random seed, for repeatable datasets (default: 0).")
+
+    def handle(self, *args, users, posts, tags, tags_per_post, avg_comments, batch_size, seed, **options):
+        rng = random.Random(seed)
+        password = make_password('bench-password')
+
+        start = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        User.objects.bulk_create(
+            (User(username=f'blogger_{start + i}', email=f'blogger_{start + i}@example.com', password=password)
+             for i in range(users)),
+            batch_size=batch_size,
+        )
+        user_ids = list(User.objects.filter(pk__gt=start).values_list('pk', flat=True))
+        # bulk_create skips the post_save signal that creates profiles
+        Profile.objects.bulk_create((Profile(user_id=pk) for pk in user_ids), batch_size=batch_size)
+        created_users = len(user_ids)
+        if not user_ids:
+            user_ids = list(User.objects.values_list('pk', flat=True))
+
+        Tag.objects.bulk_create(
+            (Tag(name=f'topic-{i}', slug=f'topic-{i}') for i in range(tags)),
+            batch_size=batch_size, ignore_conflicts=True,
+        )
+        tag_ids = list(Tag.objects.filter(slug__startswith='topic-').values_list('pk', flat=True))
+        rng.shuffle(tag_ids)
+        tag_weights = list(accumulate(1 / (rank + 1) for rank in range(len(tag_ids))))
+        post_type = ContentType.objects.get_for_model(Post)
+
+        def text(words):
+            return ' '.join(rng.choices(WORDS, k=words))
+
+        tagged = comments = 0
+        for batch in _batches(range(posts), batch_size):
+            start = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+            Post.objects.bulk_create(
+                Post(author_id=rng.choice(user_ids), title=text(6).capitalize(), content=text(200)) for _ in batch
+            )
+            post_ids = list(Post.objects.filter(pk__gt=start).values_list('pk', flat=True))
+
+            items = [
+                TaggedItem(content_type=post_type, object_id=post_id, tag_id=tag_id)
+                for post_id in post_ids
+                for tag_id in set(rng.choices(tag_ids, cum_weights=tag_weights, k=tags_per_post))
+            ] if tag_ids else []
+            TaggedItem.objects.bulk_create(items, batch_size=batch_size)
+            tagged += len(items)
+
+            batch_comments = [
+                Comment(post_id=post_id, author_id=rng.choice(user_ids), content=text(20))
+                for post_id in post_ids
+                for _ in range(int(rng.expovariate(1 / avg_comments)) if avg_comments else 0)
+            ]
+            Comment.objects.bulk_create(batch_comments, batch_size=batch_size)
+            comments += len(batch_comments)
+
+        # bulk_create sends no signals to invalidate the cached version stamp
+        versions.posts.invalidate()
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {created_users} users, {posts} posts, {tagged} tag assignments and {comments} comments."
+        ))
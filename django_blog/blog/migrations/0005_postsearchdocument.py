@@ -0,0 +1,121 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:08
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Keep in step with blog/search.py
+FTS_TABLE = 'blog_postsearch_fts'
+
+SQLITE_FTS = [
+    f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, body, tags,
+        content='blog_postsearchdocument', content_rowid='post_id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3 4'
+    )""",
+    f"""CREATE TRIGGER blog_postsearch_ai AFTER INSERT ON blog_postsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, body, tags) VALUES (new.post_id, new.title, new.body, new.tags);
+    END""",
+    f"""CREATE TRIGGER blog_postsearch_ad AFTER DELETE ON blog_postsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body, tags)
+        VALUES ('delete', old.post_id, old.title, old.body, old.tags);
+    END""",
+    f"""CREATE TRIGGER blog_postsearch_au AFTER UPDATE ON blog_postsearchdocument BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, body, tags)
+        VALUES ('delete', old.post_id, old.title, old.body, old.tags);
+        INSERT INTO {FTS_TABLE}(rowid, title, body, tags) VALUES (new.post_id, new.title, new.body, new.tags);
+    END""",
+]
+
+SQLITE_DROP = [
+    "DROP TRIGGER IF EXISTS blog_postsearch_ai",
+    "DROP TRIGGER IF EXISTS blog_postsearch_ad",
+    "DROP TRIGGER IF EXISTS blog_postsearch_au",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+]
+
+MYSQL_FULLTEXT = [
+    "ALTER TABLE blog_postsearchdocument ADD FULLTEXT INDEX blog_postsearch_ft (title, body, tags)",
+    "ALTER TABLE blog_postsearchdocument ADD FULLTEXT INDEX blog_postsearch_title_ft (title)",
+]
+
+MYSQL_DROP = [
+    "ALTER TABLE blog_postsearchdocument DROP INDEX blog_postsearch_ft",
+    "ALTER TABLE blog_postsearchdocument DROP INDEX blog_postsearch_title_ft",
+]
+
+
+def _sqlite_has_fts5(connection):
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == 'ENABLE_FTS5' for row in cursor.fetchall())
+
+
+def create_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        statements = MYSQL_FULLTEXT
+    elif connection.vendor == 'sqlite' and _sqlite_has_fts5(connection):
+        statements = SQLITE_FTS
+    else:
+        # Other databases use the LIKE fallback in blog/search.py
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'mysql':
+        statements = MYSQL_DROP
+    elif connection.vendor == 'sqlite':
+        statements = SQLITE_DROP
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def index_existing_posts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    PostSearchDocument = apps.get_model('blog', 'PostSearchDocument')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+
+    tags = {}
+    tagged = TaggedItem.objects.filter(
+        content_type__app_label='blog', content_type__model='post'
+    ).values_list('object_id', 'tag__name')
+    for post_id, name in tagged.iterator():
+        tags.setdefault(post_id, []).append(name)
+
+    batch = []
+    for post in Post.objects.only('pk', 'title', 'content').iterator(chunk_size=2000):
+        batch.append(PostSearchDocument(
+            post_id=post.pk, title=post.title, body=post.content, tags=' '.join(tags.get(post.pk, ())),
+        ))
+        if len(batch) == 2000:
+            PostSearchDocument.objects.bulk_create(batch)
+            batch = []
+    PostSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_tags'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='blog.post')),
+                ('title', models.CharField(max_length=200)),
+                ('body', models.TextField()),
+                ('tags', models.TextField(blank=True)),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+        migrations.RunPython(index_existing_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_postsearchdocument'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DirtyPost',
+            fields=[
+                ('post_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('marked_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def index_existing_tags(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    TaggedItem = apps.get_model('taggit', 'TaggedItem')
+    TaggedPost = apps.get_model('blog', 'TaggedPost')
+    TagStat = apps.get_model('blog', 'TagStat')
+
+    published = dict(Post.objects.values_list('pk', 'published_date').iterator())
+    tagged = TaggedItem.objects.filter(
+        content_type__app_label='blog', content_type__model='post'
+    ).values_list('tag_id', 'object_id')
+
+    batch = []
+    for tag_id, post_id in tagged.iterator():
+        if post_id in published:
+            batch.append(TaggedPost(tag_id=tag_id, post_id=post_id, published_date=published[post_id]))
+        if len(batch) == 2000:
+            TaggedPost.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TaggedPost.objects.bulk_create(batch, ignore_conflicts=True)
+
+    counts = TaggedPost.objects.values('tag_id').annotate(n=models.Count('*'), last=models.Max('tagged_at')).order_by()
+    TagStat.objects.bulk_create(
+        TagStat(tag_id=row['tag_id'], post_count=row['n'], last_used=row['last']) for row in counts
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_dirtypost'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TagStat',
+            fields=[
+                ('tag', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stat', serialize=False, to='taggit.tag')),
+                ('post_count', models.PositiveIntegerField(default=0)),
+                ('last_used', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-post_count'], name='tagstat_count_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaggedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('published_date', models.DateTimeField()),
+                ('tagged_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tag_index', to='blog.post')),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='taggit.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['tag', '-published_date', '-post'], name='taggedpost_tag_published_idx')],
+                'unique_together': {('tag', 'post')},
+            },
+        ),
+        migrations.RunPython(index_existing_tags, migrations.RunPython.noop),
+    ]
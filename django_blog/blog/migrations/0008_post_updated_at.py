@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 17:20
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_existing_posts(apps, schema_editor):
+    # Existing rows got the migration time; their publish date is a better guess
+    Post = apps.get_model('blog', 'Post')
+    Post.objects.update(updated_at=F('published_date'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0007_tag_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.RunPython(stamp_existing_posts, migrations.RunPython.noop),
+    ]
@@ -2,13 +2,18 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from django.utils import timezone
 from taggit.managers import TaggableManager
+from taggit.models import Tag
 
 # Create your models here.
 class Post(models.Model):
     title = models.CharField(max_length=200)
     content = models.TextField()
     published_date = models.DateTimeField(auto_now_add=True)
+    # Also bumped when the post's comments or tags change (blog/signals.py), so
+    # it versions everything rendered for the post; see blog/fragments.py
+    updated_at = models.DateTimeField(auto_now=True)
     author = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='posts')
     tags = TaggableManager()
 
@@ -33,6 +38,62 @@ class Comment(models.Model):
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
 
+# Denormalized copy of a post for full-text search: tags are flattened into
+# one text column so matching never joins through taggit. The full-text index
+# itself (MySQL FULLTEXT or an SQLite FTS5 table) is created by migration
+# 0005; see blog/search.py.
+class PostSearchDocument(models.Model):
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='search_document')
+    title = models.CharField(max_length=200)
+    body = models.TextField()
+    tags = models.TextField(blank=True)
+
+    def __str__(self):
+        return f'Search document for post {self.post_id}'
+
+# Posts whose search document needs refreshing. Filled by signals on the write
+# path (one upsert, no indexing work) and drained in batches by the indexer in
+# blog/indexer.py. post_id is not a foreign key so deletions can be queued too.
+class DirtyPost(models.Model):
+    post_id = models.BigIntegerField(primary_key=True)
+    marked_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f'Post {self.post_id} (dirty since {self.marked_at})'
+
+# Materialized (tag, post) index mirroring taggit's generic TaggedItem rows for
+# posts, with the post date copied in so a per-tag listing is one range scan on
+# (tag, -published_date). Maintained by signals; see blog/tagstats.py.
+class TaggedPost(models.Model):
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='+')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='tag_index')
+    published_date = models.DateTimeField()
+    tagged_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        unique_together = ('tag', 'post')
+        indexes = [
+            models.Index(fields=['tag', '-published_date', '-post'], name='taggedpost_tag_published_idx'),
+        ]
+
+    def __str__(self):
+        return f'Post {self.post_id} tagged {self.tag_id}'
+
+# Per-tag post counts for the tag cloud, recomputed from TaggedPost whenever a
+# tag is added to or removed from a post.
+class TagStat(models.Model):
+    tag = models.OneToOneField(Tag, on_delete=models.CASCADE, primary_key=True, related_name='stat')
+    post_count = models.PositiveIntegerField(default=0)
+    last_used = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-post_count'], name='tagstat_count_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.tag_id}: {self.post_count} posts'
+
 # Automatically create/update profile when a User is created
 @receiver(post_save, sender=User)
 def create_or_update_user_profile(sender, instance, created, **kwargs):
@@ -0,0 +1,36 @@
+import os
+
+import django
+from django.db import connections
+
+# Worker side of `manage.py reindex_posts`. Pool workers import this module to
+# find their initializer and task. With the spawn start method (the default on
+# macOS and Windows) a worker is a fresh interpreter that inherits no module
+# state, so nothing here may need Django set up at import time: the settings
+# module comes in through the initializer's arguments and the app imports are
+# made inside the functions.
+
+
+def init_worker(settings_module):
+    """Pool initializer: set Django up in a worker process."""
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    django.setup()
+    # Under fork, children must not share the parent's database connection
+    connections.close_all()
+
+
+def index_range(bounds):
+    """Rebuild the documents of posts with lo <= pk < hi; returns (lo, posts indexed)."""
+    from . import search
+    from .models import Post
+
+    lo, hi, batch_size = bounds
+    posts = Post.objects.filter(pk__gte=lo, pk__lt=hi).order_by('pk').prefetch_related('tags')
+    batch, indexed = [], 0
+    for post in posts.iterator(chunk_size=batch_size):
+        batch.append(post)
+        if len(batch) == batch_size:
+            indexed += search.index_posts(batch)
+            batch = []
+    indexed += search.index_posts(batch)
+    return lo, indexed
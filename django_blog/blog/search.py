@@ -0,0 +1,200 @@
+import re
+from collections import namedtuple
+
+from django.db import connections, router
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post, PostSearchDocument
+
+# Full-text search over blog posts.
+#
+# Every post has a PostSearchDocument (title, body and its tag names flattened
+# into one row) and the documents are covered by a full-text index created in
+# migration 0005:
+#
+#   - MySQL: FULLTEXT indexes, queried with MATCH ... AGAINST in boolean mode
+#     (InnoDB ranks with a BM25-like TF-IDF score; title matches count double),
+#   - SQLite: an external-content FTS5 table kept in sync by triggers, ranked
+#     with bm25() and highlighted with snippet(),
+#   - anything else: AND-ed LIKE filters on the document table, unranked.
+#
+# Every query term is matched as a prefix, so "djan" finds "django".
+# SearchResults is lazy and sliceable, so it can go straight into a Paginator:
+# only the requested page is fetched, plus one COUNT for the page links.
+
+FTS_TABLE = 'blog_postsearch_fts'
+MAX_TERMS = 8
+SNIPPET_WORDS = 30
+
+# Column weights for bm25(): title, body, tags
+FTS_WEIGHTS = (10.0, 1.0, 5.0)
+
+_TERM = re.compile(r'\w+')
+# Highlight markers, swapped for <mark> tags after the snippet is HTML-escaped
+_START, _END = '\x02', '\x03'
+
+Hit = namedtuple('Hit', 'post rank snippet')
+
+_fts_tables = {}
+
+
+def terms(query):
+    """Lower-cased search terms of ``query``; punctuation and operators are dropped."""
+    return [term.lower() for term in _TERM.findall(query or '')][:MAX_TERMS]
+
+
+def backend(using):
+    connection = connections[using]
+    if connection.vendor == 'mysql':
+        return 'mysql'
+    if connection.vendor == 'sqlite':
+        if using not in _fts_tables:
+            _fts_tables[using] = FTS_TABLE in connection.introspection.table_names()
+        if _fts_tables[using]:
+            return 'fts5'
+    return 'basic'
+
+
+def document_for(post):
+    # Uses prefetched tags when the caller loaded them
+    return PostSearchDocument(
+        post_id=post.pk, title=post.title, body=post.content, tags=' '.join(tag.name for tag in post.tags.all()),
+    )
+
+
+def index_posts(posts):
+    """Create or refresh the search documents of ``posts``."""
+    documents = [document_for(post) for post in posts]
+    if not documents:
+        return 0
+    connection = connections[router.db_for_write(PostSearchDocument)]
+    # MySQL upserts on any unique key and doesn't accept a conflict target
+    unique_fields = ['post'] if connection.features.supports_update_conflicts_with_target else None
+    PostSearchDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=unique_fields, update_fields=['title', 'body', 'tags'],
+    )
+    return len(documents)
+
+
+def unindex_posts(post_ids):
+    PostSearchDocument.objects.filter(post_id__in=post_ids).delete()
+
+
+def highlight(text, search_terms, words=SNIPPET_WORDS):
+    """A window of ``text`` around the first match with the matching words marked."""
+    def matches(word):
+        return any(token.startswith(term) for token in _TERM.findall(word.lower()) for term in search_terms)
+
+    tokens = text.split()
+    first = next((i for i, word in enumerate(tokens) if matches(word)), 0)
+    start = max(0, first - words // 4)
+    window = [f'{_START}{word}{_END}' if matches(word) else word for word in tokens[start:start + words]]
+    snippet = ' '.join(window)
+    if start > 0:
+        snippet = '…' + snippet
+    if start + words < len(tokens):
+        snippet += '…'
+    return _render(snippet)
+
+
+def _render(snippet):
+    return mark_safe(escape(snippet).replace(_START, '<mark>').replace(_END, '</mark>'))
+
+
+class SearchResults:
+    """Lazy, sliceable search hits for ``query``, best match first."""
+
+    def __init__(self, query, using=None):
+        self.terms = terms(query)
+        self.using = using or router.db_for_read(PostSearchDocument)
+        self.backend = backend(self.using)
+        self._count = None
+
+    def count(self):
+        if self._count is None:
+            self._count = self._count_matches() if self.terms else 0
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index:index + 1][0]
+        start, stop = index.start or 0, index.stop
+        if not self.terms or (stop is not None and stop <= start):
+            return []
+        limit = (stop - start) if stop is not None else self.count()
+        rows = getattr(self, f'_{self.backend}_page')(start, limit)
+
+        posts = Post.objects.select_related('author').prefetch_related('tags').in_bulk([row[0] for row in rows])
+        hits = []
+        for post_id, rank, snippet in rows:
+            post = posts.get(post_id)
+            if post is None:
+                continue
+            snippet = _render(snippet) if snippet is not None else highlight(post.content, self.terms)
+            hits.append(Hit(post, rank, snippet))
+        return hits
+
+    def _execute(self, sql, params):
+        with connections[self.using].cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _count_matches(self):
+        if self.backend == 'fts5':
+            sql = f"SELECT COUNT(*) FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s"
+            return self._execute(sql, [self._fts5_query()])[0][0]
+        if self.backend == 'mysql':
+            sql = (
+                "SELECT COUNT(*) FROM blog_postsearchdocument "
+                "WHERE MATCH(title, body, tags) AGAINST (%s IN BOOLEAN MODE)"
+            )
+            return self._execute(sql, [self._mysql_query()])[0][0]
+        return self._basic_queryset().count()
+
+    # SQLite FTS5
+
+    def _fts5_query(self):
+        # Quoted so terms are never read as FTS operators; * makes them prefixes
+        return ' '.join(f'"{term}"*' for term in self.terms)
+
+    def _fts5_page(self, offset, limit):
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        sql = (
+            f"SELECT rowid, bm25({FTS_TABLE}, {weights}) AS rank, "
+            f"snippet({FTS_TABLE}, 1, char(2), char(3), '…', {SNIPPET_WORDS}) "
+            f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s"
+        )
+        return self._execute(sql, [self._fts5_query(), limit, offset])
+
+    # MySQL FULLTEXT
+
+    def _mysql_query(self):
+        return ' '.join(f'+{term}*' for term in self.terms)
+
+    def _mysql_page(self, offset, limit):
+        sql = (
+            "SELECT post_id, "
+            "2 * MATCH(title) AGAINST (%s IN BOOLEAN MODE) "
+            "+ MATCH(title, body, tags) AGAINST (%s IN BOOLEAN MODE) AS score, NULL "
+            "FROM blog_postsearchdocument WHERE MATCH(title, body, tags) AGAINST (%s IN BOOLEAN MODE) "
+            "ORDER BY score DESC, post_id DESC LIMIT %s OFFSET %s"
+        )
+        query = self._mysql_query()
+        return self._execute(sql, [query, query, query, limit, offset])
+
+    # Fallback
+
+    def _basic_queryset(self):
+        matches = Q()
+        for term in self.terms:
+            matches &= Q(title__icontains=term) | Q(body__icontains=term) | Q(tags__icontains=term)
+        return PostSearchDocument.objects.using(self.using).filter(matches)
+
+    def _basic_page(self, offset, limit):
+        rows = self._basic_queryset().order_by('-post_id').values_list('post_id', flat=True)[offset:offset + limit]
+        return [(post_id, None, None) for post_id in rows]
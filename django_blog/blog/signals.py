@@ -0,0 +1,68 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import tagstats, versions
+from .fragments import touch_posts
+from .indexer import mark_dirty
+from .models import Comment, Post
+
+# Queue a post for reindexing whenever it or its tags change (see
+# blog/indexer.py), and mirror tag changes into the tag index and counts (see
+# blog/tagstats.py). Deleting a post deletes its search document and tag index
+# rows through the cascades. Comment and tag changes also bump the post's
+# updated_at, which retires its cached fragments (see blog/fragments.py), and
+# any post change invalidates the posts table version stamp (blog/versions.py).
+
+
+@receiver(post_save, sender=Post)
+def queue_saved_post(sender, instance, **kwargs):
+    mark_dirty([instance.pk])
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_versions(sender, **kwargs):
+    versions.posts.invalidate()
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def queue_retagged_post(sender, instance, action, **kwargs):
+    # taggit shares one through model between all taggable models
+    if isinstance(instance, Post) and action in ('post_add', 'post_remove', 'post_clear'):
+        mark_dirty([instance.pk])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def touch_retagged_post(sender, instance, action, **kwargs):
+    if isinstance(instance, Post) and action in ('post_add', 'post_remove', 'post_clear'):
+        touch_posts([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_commented_post(sender, instance, origin=None, **kwargs):
+    # Comments going away with their post have nothing left to invalidate
+    if not isinstance(origin, Post):
+        touch_posts([instance.post_id])
+
+
+@receiver(m2m_changed, sender=Post.tags.through)
+def index_post_tags(sender, instance, action, pk_set, **kwargs):
+    if not isinstance(instance, Post):
+        return
+    if action == 'post_add':
+        tagstats.index_tags(instance, pk_set)
+    elif action == 'post_remove':
+        tagstats.unindex_tags(instance.pk, pk_set)
+    elif action == 'post_clear':
+        tagstats.unindex_tags(instance.pk)
+
+
+@receiver(pre_delete, sender=Post)
+def remember_deleted_post_tags(sender, instance, **kwargs):
+    instance._indexed_tag_ids = set(instance.tag_index.values_list('tag_id', flat=True))
+
+
+@receiver(post_delete, sender=Post)
+def recount_deleted_post_tags(sender, instance, **kwargs):
+    tagstats.refresh_on_commit(getattr(instance, '_indexed_tag_ids', ()))
@@ -1,4 +1,17 @@
 // Basic example script to demonstrate dynamic behavior
 document.addEventListener('DOMContentLoaded', function() {
     console.log('Blog page loaded');
-});
\ No newline at end of file
+});
+
+// "More comments" loads the next page of comments in place instead of
+// reloading the post; without JavaScript the link still works as a page link
+document.addEventListener('click', function(event) {
+    var link = event.target.closest('a.load-comments');
+    if (!link) {
+        return;
+    }
+    event.preventDefault();
+    fetch(link.dataset.url, {headers: {'X-Requested-With': 'XMLHttpRequest'}})
+        .then(function(response) { return response.text(); })
+        .then(function(html) { link.outerHTML = html; });
+});
@@ -0,0 +1,108 @@
+import math
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Count, Max
+
+from .models import Post, TaggedPost, TagStat
+
+# Tag statistics and the per-tag post index. taggit stores tags through a
+# generic relation, so counting posts per tag or listing a tag's posts would
+# mean a GROUP BY / join over TaggedItem on every render. Instead, signals
+# (blog/signals.py) mirror every tag change into TaggedPost and recount the
+# affected tags into TagStat once the transaction commits; the tag cloud is
+# read from TagStat and cached until the next change.
+
+TAG_CLOUD_CACHE_KEY = 'blog:tag-cloud'
+TAG_CLOUD_SIZE = getattr(settings, 'TAG_CLOUD_SIZE', 50)
+TAG_CLOUD_TIMEOUT = getattr(settings, 'TAG_CLOUD_TIMEOUT', 600)
+TAG_CLOUD_WEIGHTS = 5
+
+
+def index_tags(post, tag_ids):
+    TaggedPost.objects.bulk_create(
+        [TaggedPost(tag_id=tag_id, post_id=post.pk, published_date=post.published_date) for tag_id in tag_ids],
+        ignore_conflicts=True,
+    )
+    refresh_on_commit(tag_ids)
+
+
+def unindex_tags(post_id, tag_ids=None):
+    """Drop a post from the index, for ``tag_ids`` or for all of its tags."""
+    rows = TaggedPost.objects.filter(post_id=post_id)
+    if tag_ids is not None:
+        rows = rows.filter(tag_id__in=tag_ids)
+    else:
+        tag_ids = set(rows.values_list('tag_id', flat=True))
+    rows.delete()
+    refresh_on_commit(tag_ids)
+
+
+def refresh_on_commit(tag_ids):
+    tag_ids = set(tag_ids)
+    if tag_ids:
+        transaction.on_commit(lambda: refresh_stats(tag_ids))
+
+
+def refresh_stats(tag_ids):
+    """Recount ``tag_ids`` from the index; tags no longer used lose their row."""
+    counts = (
+        TaggedPost.objects.filter(tag_id__in=tag_ids)
+        .values('tag_id')
+        .annotate(post_count=Count('*'), last_used=Max('tagged_at'))
+        .order_by()
+    )
+    stats = [TagStat(**row) for row in counts]
+    with transaction.atomic():
+        TagStat.objects.bulk_create(
+            stats, update_conflicts=True, update_fields=['post_count', 'last_used'],
+            unique_fields=['tag'] if _upsert_has_target() else None,
+        )
+        TagStat.objects.filter(tag_id__in=tag_ids).exclude(tag_id__in=[s.tag_id for s in stats]).delete()
+    cache.delete(TAG_CLOUD_CACHE_KEY)
+
+
+def _upsert_has_target():
+    # MySQL upserts on any unique key and doesn't accept a conflict target
+    return connections[router.db_for_write(TagStat)].features.supports_update_conflicts_with_target
+
+
+def tag_cloud():
+    """The most used tags, alphabetically, each with a 1-5 display weight."""
+    cloud = cache.get(TAG_CLOUD_CACHE_KEY)
+    if cloud is None:
+        top = list(
+            TagStat.objects.filter(post_count__gt=0)
+            .order_by('-post_count', 'tag__name')
+            .values('tag__name', 'tag__slug', 'post_count')[:TAG_CLOUD_SIZE]
+        )
+        cloud = [
+            {'name': row['tag__name'], 'slug': row['tag__slug'], 'count': row['post_count']}
+            for row in top
+        ]
+        _weigh(cloud)
+        cloud.sort(key=lambda entry: entry['name'].lower())
+        cache.set(TAG_CLOUD_CACHE_KEY, cloud, TAG_CLOUD_TIMEOUT)
+    return cloud
+
+
+def _weigh(cloud):
+    # Log scale: tag counts follow a power law, a linear scale would put
+    # everything but the top tag in the smallest bucket
+    if not cloud:
+        return
+    low = math.log(min(entry['count'] for entry in cloud))
+    high = math.log(max(entry['count'] for entry in cloud))
+    for entry in cloud:
+        share = (math.log(entry['count']) - low) / (high - low) if high > low else 1
+        entry['weight'] = 1 + round(share * (TAG_CLOUD_WEIGHTS - 1))
+
+
+def tagged_posts(tag):
+    """Posts carrying ``tag``, newest first, read through the TaggedPost index."""
+    return (
+        Post.objects.filter(tag_index__tag=tag)
+        .select_related('author')
+        .order_by('-tag_index__published_date', '-tag_index__post')
+    )
@@ -0,0 +1,35 @@
+from django import template
+
+from ..fragments import get_or_render
+
+register = template.Library()
+
+
+class FragmentNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary_on = [expression.resolve(context) for expression in self.vary_on]
+        return get_or_render(name, vary_on, lambda: self.nodelist.render(context))
+
+
+@register.tag
+def cachefragment(parser, token):
+    """
+    Cache the enclosed block until one of the given objects changes::
+
+        {% cachefragment "post-body" post %} ... {% endcachefragment %}
+
+    Model instances vary the key by pk and updated_at, other values by their
+    string form (e.g. a page number). See blog/fragments.py.
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires at least a fragment name.")
+    nodelist = parser.parse(('endcachefragment',))
+    parser.delete_first_token()
+    return FragmentNode(nodelist, parser.compile_filter(bits[1]), [parser.compile_filter(bit) for bit in bits[2:]])
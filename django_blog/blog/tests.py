@@ -1,3 +1,321 @@
-from django.test import TestCase
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.utils.http import http_date
+
+from learnlab.testing import QueryBudgetMixin
+from . import fragments, indexer, reindex, search, tagstats, versions
+from .models import Comment, DirtyPost, Post, PostSearchDocument
+from .search import SearchResults
+
+
+class BlogIndexQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+
+    def make_posts(self, start, count):
+        Post.objects.bulk_create(
+            Post(author=self.author, title=f'Post {start + i}', content='...') for i in range(count)
+        )
+        versions.posts.invalidate()  # bulk_create sends no signals
+
+    def test_index_does_not_grow_with_posts(self):
+        def get_index():
+            response = self.client.get('/')
+            self.assertEqual(response.status_code, 200)
+        # The table version stamp, the post count, then a page of posts with their authors
+        self.assertQueriesFlat(self.make_posts, get_index, budget=3)
+
+    def test_index_is_paginated(self):
+        self.make_posts(0, 25)
+        response = self.client.get('/', {'page': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p.title for p in response.context['posts']], [f'Post {i}' for i in range(4, -1, -1)])
+        self.assertContains(response, 'Page 3 of 3')
+
+
+class PostDetailQueryBudgetTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.readers = [User.objects.create_user(username=f'reader{i}', password='pass12345') for i in range(5)]
+        self.post = Post.objects.create(author=self.author, title='Post', content='...')
+        self.post.tags.add('django', 'python')
+
+    def make_comments(self, start, count):
+        self.comment_count = start + count
+        Comment.objects.bulk_create(
+            Comment(post=self.post, author=self.readers[(start + i) % 5], content=f'Comment {start + i}')
+            for i in range(count)
+        )
+
+    def test_detail_does_not_grow_with_comments(self):
+        def get_detail():
+            cache.clear()  # budget a cold render, fragments included
+            response = self.client.get(f'/post/{self.post.pk}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(response.context['comments']), min(self.comment_count, 20))
+        # Version stamp, post with author, comment count, one page of comments
+        # with authors, tags
+        self.assertQueriesFlat(self.make_comments, get_detail, budget=5)
+
+    def test_comment_pages_load_in_place(self):
+        self.make_comments(0, 25)
+        response = self.client.get(f'/post/{self.post.pk}/comments/?page=2')
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Comment 24')
+        self.assertNotContains(response, 'Comment 19')
+        self.assertNotContains(response, 'More comments')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['conditional'].clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Post', content='...')
+
+    def revalidate(self, url, response, **headers):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'], **headers)
+
+    def test_index_answers_304_from_the_cached_stamp(self):
+        response = self.client.get('/')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate('/', response).status_code, 304)
+
+        Post.objects.create(author=self.author, title='Another', content='...')
+        self.assertEqual(self.revalidate('/', response).status_code, 200)
+
+    def test_index_has_no_last_modified(self):
+        # Deleting a post doesn't move the newest updated_at, so If-Modified-Since
+        # alone would keep the deleted post in the client's copy
+        self.assertFalse(self.client.get('/').has_header('Last-Modified'))
+        self.post.delete()
+        response = self.client.get('/', HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalidation_reaches_other_workers(self):
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection('conditional')
+        stamp = versions.posts.get()
+        self.assertEqual(other_worker.get(versions.posts.key), stamp)
+        Post.objects.create(author=self.author, title='Another', content='...')
+        self.assertIsNone(other_worker.get(versions.posts.key))
+
+    def test_detail_changes_with_comments_and_user(self):
+        url = f'/post/{self.post.pk}/'
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        Comment.objects.create(post=self.post, author=self.author, content='First')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+        response = self.client.get(url)
+        self.client.login(username='author', password='pass12345')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+        self.assertFalse(self.client.get(url).has_header('Last-Modified'))
+
+
+class FragmentCacheTests(QueryBudgetMixin, TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Cached post', content='First draft')
+        self.post.tags.add('django')
+        self.url = f'/post/{self.post.pk}/'
+
+    def get_detail(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_post_body_is_served_from_cache(self):
+        before = fragments.fragment_stats('post-body')
+        self.get_detail()
+        # Version stamp, post and comment count; the tag query only runs to
+        # render the body
+        with self.assertNumQueries(3):
+            self.get_detail()
+        after = fragments.fragment_stats('post-body')
+        self.assertEqual(after['miss'] - before['miss'], 1)
+        self.assertEqual(after['hit'] - before['hit'], 1)
+
+    def test_changes_invalidate_the_post_body(self):
+        self.get_detail()
+        self.post.content = 'Second draft'
+        self.post.save()
+        self.assertContains(self.get_detail(), 'Second draft')
+
+        self.post.tags.add('caching')
+        self.assertContains(self.get_detail(), 'caching')
+
+        stamp = Post.objects.get(pk=self.post.pk).updated_at
+        Comment.objects.create(post=self.post, author=self.reader, content='Nice')
+        self.assertGreater(Post.objects.get(pk=self.post.pk).updated_at, stamp)
+
+    def test_edit_controls_are_per_user(self):
+        Comment.objects.create(post=self.post, author=self.reader, content='Nice')
+        self.get_detail()
+        self.client.login(username='reader', password='pass12345')
+        response = self.get_detail()
+        self.assertContains(response, 'btn-warning')
+        self.assertNotContains(response, f'/post/{self.post.pk}/update/')
+        self.client.login(username='author', password='pass12345')
+        response = self.get_detail()
+        self.assertNotContains(response, 'btn-warning')
+        self.assertContains(response, f'/post/{self.post.pk}/update/')
+
+
+@override_settings(SEARCH_INDEX_ASYNC=False)
+class PostSearchTests(TransactionTestCase):
+    # Not TestCase: MySQL only updates FULLTEXT indexes when a transaction commits
+
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.django = Post.objects.create(author=self.author, title='Django tips',
+                                          content='Use select_related to avoid extra queries.')
+        self.caching = Post.objects.create(author=self.author, title='Caching',
+                                           content='A <b>cache</b> in front of Django views.')
+        self.caching.tags.add('performance')
+
+    def search(self, query):
+        return list(SearchResults(query)[:10])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual([hit.post for hit in self.search('django')], [self.django, self.caching])
+
+    def test_terms_match_as_prefixes(self):
+        self.assertEqual([hit.post for hit in self.search('djan tip')], [self.django])
+
+    def test_tags_and_edits_are_indexed(self):
+        self.assertEqual([hit.post for hit in self.search('performance')], [self.caching])
+        self.caching.tags.clear()
+        self.assertEqual(self.search('performance'), [])
+        self.django.content = 'Now about performance.'
+        self.django.save()
+        self.assertEqual([hit.post for hit in self.search('performance')], [self.django])
+
+    def test_snippets_are_escaped_and_highlighted(self):
+        snippet = self.search('cache')[0].snippet
+        self.assertIn('<mark>', snippet)
+        self.assertIn('&lt;b&gt;', snippet)
+
+    def test_search_view_paginates(self):
+        response = self.client.get('/search/', {'q': 'django'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['page_obj'].paginator.count, 2)
+        self.assertContains(response, '<mark>Django</mark>')
+
+
+@override_settings(SEARCH_INDEX_ASYNC=True)
+class SearchIndexerTests(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username='author', password='pass12345')
+
+    def test_saves_are_queued_until_drained(self):
+        with mock.patch.object(indexer.indexer, 'wake') as wake:
+            post = Post.objects.create(author=self.author, title='Queued', content='Indexed later')
+        wake.assert_called()
+        self.assertTrue(DirtyPost.objects.filter(post_id=post.pk).exists())
+        self.assertEqual(SearchResults('queued').count(), 0)
+
+        self.assertEqual(indexer.drain(), 1)
+        self.assertFalse(DirtyPost.objects.exists())
+        self.assertEqual(SearchResults('queued').count(), 1)
+
+    def test_posts_marked_again_during_a_batch_stay_queued(self):
+        with mock.patch.object(indexer.indexer, 'wake'):
+            first = Post.objects.create(author=self.author, title='First', content='...')
+            second = Post.objects.create(author=self.author, title='Second', content='...')
+        now = timezone.now()
+        DirtyPost.objects.filter(post_id=first.pk).update(marked_at=now - timedelta(minutes=2))
+        DirtyPost.objects.filter(post_id=second.pk).update(marked_at=now)
+        index_posts = search.index_posts
+
+        def remark_first(posts):
+            # Saved again while the batch is indexed, with a stamp older than the batch's newest
+            DirtyPost.objects.filter(post_id=first.pk).update(marked_at=now - timedelta(minutes=1))
+            index_posts(posts)
+
+        with mock.patch.object(search, 'index_posts', side_effect=remark_first):
+            # Both posts, then the first one again
+            self.assertEqual(indexer.drain(), 3)
+        self.assertFalse(DirtyPost.objects.exists())
+
+    def test_reindex_command_resumes_from_checkpoint(self):
+        with mock.patch.object(indexer.indexer, 'wake'):
+            posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='rebuild') for i in range(5)]
+        PostSearchDocument.objects.all().delete()
+        DirtyPost.objects.all().delete()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            checkpoint = os.path.join(tmp, 'checkpoint.json')
+            first = posts[0].pk
+            # A previous run got through the first chunk before it was interrupted
+            with open(checkpoint, 'w') as f:
+                json.dump({'lo': first, 'hi': posts[-1].pk, 'chunk_size': 2, 'done': [first]}, f)
+            call_command('reindex_posts', resume=True, checkpoint=checkpoint, stdout=StringIO())
+            self.assertFalse(os.path.exists(checkpoint))
+
+        self.assertEqual(
+            set(PostSearchDocument.objects.values_list('post_id', flat=True)),
+            {post.pk for post in posts[2:]},
+        )
+
+    def test_reindex_workers_start_under_spawn(self):
+        # Spawned workers inherit no module state; the initializer must set Django up alone
+        with multiprocessing.get_context('spawn').Pool(
+            1, initializer=reindex.init_worker, initargs=(os.environ['DJANGO_SETTINGS_MODULE'],)
+        ) as pool:
+            self.assertIsInstance(pool.apply_async(os.getpid).get(timeout=60), int)
+
+
+@override_settings(SEARCH_INDEX_ASYNC=False)
+class TagStatsTests(TestCase):
+    def setUp(self):
+        cache.delete(tagstats.TAG_CLOUD_CACHE_KEY)
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.posts = [Post.objects.create(author=self.author, title=f'Post {i}', content='...') for i in range(3)]
+
+    def tag(self, post, *names):
+        with self.captureOnCommitCallbacks(execute=True):
+            post.tags.add(*names)
+
+    def test_counts_follow_tag_changes(self):
+        for post in self.posts:
+            self.tag(post, 'django')
+        self.tag(self.posts[0], 'python')
+        self.assertEqual(
+            {(entry['name'], entry['count']) for entry in tagstats.tag_cloud()},
+            {('django', 3), ('python', 1)},
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].tags.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].delete()
+        cloud = tagstats.tag_cloud()
+        self.assertEqual([(entry['name'], entry['count']) for entry in cloud], [('django', 1)])
+        with self.assertNumQueries(0):
+            self.assertEqual(tagstats.tag_cloud(), cloud)
+
+    def test_tag_page_reads_the_index(self):
+        for post in self.posts:
+            self.tag(post, 'django')
+        response = self.client.get('/tags/django/')
+        self.assertEqual(list(response.context['posts']), self.posts[::-1])
+
+        response = self.client.get('/tags/cloud/')
+        self.assertEqual(response.json()['tags'], [{'name': 'django', 'slug': 'django', 'count': 3, 'weight': 5}])
@@ -16,6 +16,7 @@ urlpatterns = [
     path('', views.index, name='blog_index'),
     path('', views.PostListView.as_view(), name='blog_index'),
     path('post/<int:pk>/', views.PostDetailView.as_view(), name='post-detail'),
+    path('post/<int:pk>/comments/', views.post_comments, name='post-comments'),
     path('post/new/', views.PostCreateView.as_view(), name='post-create'),
     path('post/<int:pk>/update/', views.PostUpdateView.as_view(), name='post-update'),
     path('post/<int:pk>/delete/', views.PostDeleteView.as_view(), name='post-delete'),
@@ -25,6 +26,7 @@ urlpatterns = [
     path('comment/<int:pk>/update/', CommentUpdateView.as_view(), name='edit_comment'),
     path('comment/<int:pk>/delete/', views.delete_comment, name='delete_comment'),
     path('search/', views.search_posts, name='search_posts'),
+    path('tags/cloud/', views.tag_cloud_view, name='tag_cloud'),
     path('tags/<str:tag_name>/', views.posts_by_tag, name='posts_by_tag'),
     path('tags/<slug:tag_slug>/', PostByTagListView.as_view(), name='posts_by_tag'),
 ]
\ No newline at end of file
@@ -0,0 +1,7 @@
+from learnlab.conditional import TableVersion
+from .models import Post
+
+# Cached version stamp of the posts table for conditional GET on post lists
+# (see learnlab/conditional.py). blog/signals.py invalidates it on every
+# post save or delete, and touch_posts() when comments or tags change.
+posts = TableVersion(Post)
@@ -5,12 +5,26 @@ from .forms import CustomUserCreationForm
 from django.contrib.auth.decorators import login_required
 from .models import Profile, Post, Comment
 from .forms import ProfileForm, CommentForm
-from django.http import HttpResponse, HttpResponseForbidden
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.urls import reverse_lazy
 from .models import Post, Comment
-from django.db.models import Q
+from django.core.paginator import Paginator
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from taggit.models import Tag
+from learnlab.conditional import make_etag, row_version
+from . import versions
+from .search import SearchResults
+from .tagstats import tag_cloud, tagged_posts
+
+INDEX_POSTS_PER_PAGE = 10
+SEARCH_RESULTS_PER_PAGE = 10
+TAGGED_POSTS_PER_PAGE = 10
+TAG_CLOUD_MAX_AGE = 60
+COMMENTS_PER_PAGE = 20
 
 # Create your views here.
 
@@ -105,18 +119,71 @@ def delete_comment(request, comment_id):
     return render(request, 'blog/comment_confirm_delete.html', {'comment': comment})
 
 
+# Conditional GET validators (see learnlab/conditional.py)
+
+def _posts_etag(request, *args, **kwargs):
+    # The list sends no Last-Modified: deletes don't move it (see learnlab/conditional.py)
+    return versions.posts.etag()
+
+
+def _post_version(request, pk):
+    # Read once per request; condition() asks for the ETag and Last-Modified separately
+    if not hasattr(request, '_post_version'):
+        request._post_version = row_version(Post.objects, pk)
+    return request._post_version
+
+
+def _post_etag(request, pk):
+    updated_at = _post_version(request, pk)
+    # The page carries the reader's edit controls and CSRF token
+    return make_etag(pk, updated_at, request.user.pk) if updated_at else None
+
+
+def _post_last_modified(request, pk):
+    # Pages that differ per user revalidate by ETag only
+    return None if request.user.is_authenticated else _post_version(request, pk)
+
+
 # Blog Post Views
 
 class PostListView(ListView):
     model = Post
     template_name = 'blog/post_list.html'   # blog/templates/blog/post_list.html
     context_object_name = 'posts'
-    ordering = ['-created_at']
+    ordering = ['-published_date']
     paginate_by = 6
+
+
+@method_decorator(condition(etag_func=_post_etag, last_modified_func=_post_last_modified), name='dispatch')
 class PostDetailView(DetailView):
+    """
+    A post with its tags and one page of comments. The number of queries is
+    fixed however many comments the post has: the author is joined in, and
+    comments are paginated with their authors joined in. Tags are read by the
+    template inside the cached post body, so they cost a query only on a miss.
+    """
     model = Post
+    queryset = Post.objects.select_related('author')
     template_name = 'blog/post_detail.html'  # blog/templates/blog/post_detail.html
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(comments_context(self.object, self.request.GET.get('comments')))
+        context['form'] = CommentForm()
+        return context
+
+
+def comments_context(post, page_number):
+    comments = post.comments.select_related('author').order_by('created_at', 'id')
+    page_obj = Paginator(comments, COMMENTS_PER_PAGE).get_page(page_number)
+    return {'post': post, 'comments_page': page_obj, 'comments': page_obj.object_list}
+
+
+def post_comments(request, pk):
+    """One page of a post's comments as an HTML fragment, for loading more comments in place."""
+    post = get_object_or_404(Post.objects.only('pk', 'author_id'), pk=pk)
+    return render(request, 'blog/comment_list.html', comments_context(post, request.GET.get('page')))
+
 class PostCreateView(LoginRequiredMixin, CreateView):
     model = Post
     template_name = 'blog/post_form.html'    # blog/templates/blog/post_form.html
@@ -148,11 +215,14 @@ class PostDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
         return self.request.user == post.author
 
 
+@method_decorator(condition(etag_func=_posts_etag), name='dispatch')
 class BlogIndexView(ListView):
     model = Post
+    queryset = Post.objects.select_related('author')  # the template shows each post's author
     template_name = 'blog/index.html'  # path to your template
     context_object_name = 'posts'
-    ordering = ['-created_at']  # newest first
+    ordering = ['-published_date', '-pk']  # newest first; pk keeps pages stable on ties
+    paginate_by = INDEX_POSTS_PER_PAGE
 
 
 # CREATE COMMENT
@@ -200,29 +270,29 @@ class CommentDeleteView(LoginRequiredMixin, UserPassesTestMixin, DeleteView):
 
 
 def search_posts(request):
-    query = request.GET.get('q')
-    results = []
-
-    if query:
-        results = Post.objects.filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+    """Full-text search over title, content and tags (see blog/search.py), paginated."""
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(SearchResults(query), SEARCH_RESULTS_PER_PAGE)
+    page_obj = paginator.get_page(request.GET.get('page'))
 
     context = {
         'query': query,
-        'results': results
+        'page_obj': page_obj,
+        'results': page_obj.object_list,
     }
 
     return render(request, 'blog/search_results.html', context)
 
 
 def posts_by_tag(request, tag_name):
-    posts = Post.objects.filter(tags__name=tag_name)
+    """Posts with a tag, newest first, through the precomputed tag index (blog/tagstats.py)."""
+    tag = get_object_or_404(Tag, name=tag_name)
+    page_obj = Paginator(tagged_posts(tag), TAGGED_POSTS_PER_PAGE).get_page(request.GET.get('page'))
     context = {
+        'tag': tag,
         'tag_name': tag_name,
-        'posts': posts
+        'page_obj': page_obj,
+        'posts': page_obj.object_list,
     }
     return render(request, 'blog/posts_by_tag.html', context)
 
@@ -230,13 +300,22 @@ class PostByTagListView(ListView):
     model = Post
     template_name = 'blog/posts_by_tag.html'
     context_object_name = 'posts'
+    paginate_by = TAGGED_POSTS_PER_PAGE
 
     def get_queryset(self):
         tag_slug = self.kwargs.get('tag_slug')
-        self.tag = Tag.objects.get(slug=tag_slug)
-        return Post.objects.filter(tags__in=[self.tag])
+        self.tag = get_object_or_404(Tag, slug=tag_slug)
+        return tagged_posts(self.tag)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['tag'] = self.tag
-        return context
\ No newline at end of file
+        context['tag_name'] = self.tag.name
+        return context
+
+
+def tag_cloud_view(request):
+    """GET /tags/cloud/: the most used tags with their post counts and display weights, as JSON."""
+    response = JsonResponse({'tags': tag_cloud()})
+    patch_cache_control(response, public=True, max_age=TAG_CLOUD_MAX_AGE)
+    return response
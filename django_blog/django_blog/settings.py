@@ -10,11 +10,19 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import sys
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Code shared with the other projects in this repository lives in learnlab/ at
+# its root
+REPO_DIR = BASE_DIR.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -42,6 +50,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'learnlab.instrumentation.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -140,4 +149,34 @@ LOGIN_URL = 'login'
 
 MEDIA_URL = '/media/'
 
-MEDIA_ROOT = BASE_DIR / 'media'
\ No newline at end of file
+MEDIA_ROOT = BASE_DIR / 'media'
+
+# Per-view query/latency metrics (see learnlab/instrumentation.py), scraped from
+# /internal/metrics/ by staff users, or by a scraper sending
+# "Authorization: Bearer <INSTRUMENTATION_METRICS_TOKEN>" (None turns that off)
+INSTRUMENTATION_METRICS_TOKEN = None
+INSTRUMENTATION_SERVER_TIMING = DEBUG
+
+# Search indexing (see blog/indexer.py): saves queue posts in a DirtyPost table
+# that a background thread drains in batches
+SEARCH_INDEX_ASYNC = True
+SEARCH_INDEX_BATCH_SIZE = 500
+SEARCH_INDEX_POLL_INTERVAL = 5.0
+SEARCH_INDEX_LINGER = 0.5
+
+# Version stamps for conditional GET (learnlab/conditional.py). Every worker
+# process must see the same stamps, or the ones that didn't handle a write keep
+# answering 304: FileBasedCache shares them on one host, Redis between hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'conditional': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'django_blog-conditional',
+    },
+}
+# Tests get every FileBasedCache above in a temporary directory instead, so
+# they never clear or read the entries of a running server
+TEST_RUNNER = 'learnlab.testing.IsolatedCachesRunner'
+CONDITIONAL_CACHE = 'conditional'
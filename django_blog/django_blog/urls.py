@@ -16,11 +16,14 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
+
+from learnlab.instrumentation import metrics_view
 from django.conf import settings
 from django.conf.urls.static import static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('internal/metrics/', metrics_view, name='metrics'),
     # path('', include('users.urls')),
     path('', include('blog.urls')),
 ]
@@ -0,0 +1,8 @@
+# Code shared by the Django projects in this repository: query-budget test
+# helpers, per-view instrumentation, conditional GET validators, keyset
+# pagination, the response cache, streaming list responses and bulk
+# import/export. Each project's settings.py puts the repository root on
+# sys.path, so ``learnlab`` imports the same way from every project.
+#
+# The package's own tests run from the repository root with
+#   python -m django test learnlab --settings=learnlab.tests.settings
@@ -0,0 +1,282 @@
+import csv
+import json
+import time
+from dataclasses import dataclass, field
+from itertools import islice
+
+from django.db import transaction
+
+# Streaming bulk import/export of catalog rows, shared by the import_books /
+# export_books commands and the book import/export endpoints.
+#
+# Everything is a generator over rows, so memory stays flat however large the
+# file is: read_rows() parses CSV or NDJSON line by line, import_rows() writes
+# BATCH_SIZE rows at a time (one transaction per batch: bulk_update for ids
+# that exist, bulk_create for the rest), and export_lines() streams a
+# queryset.iterator() back out. Foreign keys given by name (e.g. an author) go
+# through a ForeignKeyCache, which resolves a whole batch in one query and
+# creates the missing targets with one bulk_create.
+#
+# A bad record never fails the whole import: lines that aren't valid UTF-8,
+# malformed CSV (e.g. a field over csv.field_size_limit()) and lines that
+# aren't JSON objects come out of read_rows() as error rows, which
+# import_rows() counts as invalid and reports in ImportStats like rows that
+# fail validation.
+#
+# Updating existing rows through an import can be turned off
+# (allow_updates=False, for users who may only create): rows carrying the id
+# of an existing object are then reported as invalid instead of written.
+#
+# The model-specific part (columns, validation, how a row becomes an
+# instance) is a catalog class in the app's catalog.py.
+
+FORMATS = ('csv', 'ndjson')
+CONTENT_TYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+BATCH_SIZE = 2000
+EXPORT_CHUNK_SIZE = 2000
+# Lines joined into one chunk of a streamed export
+LINES_PER_WRITE = 500
+LOOKUP_CHUNK_SIZE = 500
+MAX_ERRORS_KEPT = 20
+
+
+def format_for(name, default='csv'):
+    """The format a file name or content type stands for."""
+    name = (name or '').lower()
+    if name.endswith('.ndjson') or name.endswith('.jsonl') or 'ndjson' in name:
+        return 'ndjson'
+    if name.endswith('.csv') or 'csv' in name:
+        return 'csv'
+    return default
+
+
+class UndecodableLine(str):
+    """A line that isn't valid in the stream's encoding (decoded with replacement characters)."""
+
+
+def decode_lines(stream, encoding='utf-8-sig'):
+    """Text lines of a binary stream (a file or an HttpRequest), read and decoded lazily."""
+    for line in iter(stream.readline, b''):
+        try:
+            yield line.decode(encoding)
+        except UnicodeDecodeError:
+            yield UndecodableLine(line.decode(encoding, errors='replace'))
+
+
+def read_rows(lines, fmt):
+    """Dicts from CSV (with a header line) or NDJSON text lines; bad records come as {'__error__': message}."""
+    if fmt == 'csv':
+        yield from _read_csv(lines)
+    elif fmt == 'ndjson':
+        for line in lines:
+            if isinstance(line, UndecodableLine):
+                yield {'__error__': 'not valid UTF-8'}
+            elif line.strip():
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    row = None
+                yield row if isinstance(row, dict) else {'__error__': 'not a JSON object'}
+    else:
+        raise ValueError(f'Unknown format {fmt!r}; expected one of {", ".join(FORMATS)}.')
+
+
+def _read_csv(lines):
+    # Like csv.DictReader, but a record that can't be decoded or parsed is
+    # reported and skipped instead of ending the import
+    undecodable = []
+
+    def checked(lines):
+        for line in lines:
+            if isinstance(line, UndecodableLine):
+                undecodable.append(line)
+            yield line
+
+    reader = csv.reader(checked(lines))
+    header = None
+    while True:
+        try:
+            values = next(reader)
+            error = 'not valid UTF-8' if undecodable else None
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            error = f'malformed CSV ({exc})'
+        undecodable.clear()
+        if header is None:
+            if error:
+                # Without the column names no record can be read
+                yield {'__error__': f'header: {error}'}
+                return
+            header = values
+        elif error:
+            yield {'__error__': error}
+        elif values:
+            row = dict(zip(header, values))
+            if len(values) > len(header):
+                row[None] = values[len(header):]
+            else:
+                row.update(dict.fromkeys(header[len(values):]))
+            yield row
+
+
+class _Echo:
+    # csv.writer target that hands each formatted line back
+    def write(self, value):
+        return value
+
+
+def export_lines(rows, columns, fmt):
+    """Encoded CSV or NDJSON chunks for ``rows`` (tuples in ``columns`` order)."""
+    if fmt == 'csv':
+        writer = csv.writer(_Echo())
+        format_row = writer.writerow
+        yield format_row(columns).encode()
+    elif fmt == 'ndjson':
+        def format_row(row):
+            return json.dumps(dict(zip(columns, row)), default=str) + '\n'
+    else:
+        raise ValueError(f'Unknown format {fmt!r}; expected one of {", ".join(FORMATS)}.')
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, LINES_PER_WRITE))
+        if not chunk:
+            return
+        yield ''.join(format_row(row) for row in chunk).encode()
+
+
+class ForeignKeyCache:
+    """
+    Natural key -> pk for a related model (e.g. author name -> Author id),
+    resolved a batch at a time. Keys not in the table are created in bulk.
+    """
+
+    def __init__(self, model, field, max_size=100000):
+        self.model = model
+        self.field = field
+        self.max_size = max_size
+        self._pks = {}
+
+    def resolve(self, keys):
+        missing = {key for key in keys if key not in self._pks}
+        if missing:
+            if len(self._pks) + len(missing) > self.max_size:
+                self._pks.clear()
+            self._load(missing)
+            absent = [key for key in missing if key not in self._pks]
+            if absent:
+                self.model.objects.bulk_create([self.model(**{self.field: key}) for key in absent])
+                # Not every backend returns pks from bulk_create
+                self._load(absent)
+        return {key: self._pks[key] for key in keys}
+
+    def _load(self, keys):
+        keys = list(keys)
+        for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+            # Duplicate names resolve to the oldest row
+            found = (
+                self.model.objects.filter(**{f'{self.field}__in': chunk})
+                .order_by('-pk')
+                .values_list(self.field, 'pk')
+            )
+            self._pks.update(found)
+
+
+@dataclass
+class ImportStats:
+    created: int = 0
+    updated: int = 0
+    invalid: int = 0
+    seconds: float = 0.0
+    errors: list = field(default_factory=list)
+
+    @property
+    def rows(self):
+        return self.created + self.updated
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def error(self, message):
+        self.invalid += 1
+        if len(self.errors) < MAX_ERRORS_KEPT:
+            self.errors.append(message)
+
+    def as_dict(self):
+        return {
+            'rows': self.rows, 'created': self.created, 'updated': self.updated, 'invalid': self.invalid,
+            'seconds': round(self.seconds, 3), 'rows_per_second': round(self.rows_per_second, 1),
+            'errors': self.errors,
+        }
+
+    def summary(self):
+        return (
+            f"Imported {self.rows} rows ({self.created} created, {self.updated} updated, "
+            f"{self.invalid} invalid) in {self.seconds:.1f}s, {self.rows_per_second:.0f} rows/s."
+        )
+
+
+def import_rows(catalog, rows, batch_size=BATCH_SIZE, stats=None, allow_updates=True):
+    """
+    Write ``rows`` (dicts) through ``catalog`` (an app's catalog object, with
+    MODEL, UPDATE_FIELDS, build_batch() and imported()) in chunked
+    transactions. Rows carrying the id of an existing object update it (or,
+    without ``allow_updates``, are rejected); the others are created. Invalid
+    rows are skipped and counted.
+    """
+    stats = stats or ImportStats()
+    start = time.perf_counter()
+    rows = iter(rows)
+    record = 1
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            valid = []
+            for number, row in enumerate(batch, start=record):
+                if '__error__' in row:
+                    stats.error(f'record {number}: {row["__error__"]}')
+                else:
+                    valid.append((number, row))
+            instances = []
+            # build_batch() returns an instance or an error message per row
+            for (number, _), obj in zip(valid, catalog.build_batch([row for _, row in valid])):
+                if isinstance(obj, str):
+                    stats.error(f'record {number}: {obj}')
+                else:
+                    instances.append((number, obj))
+            record += len(batch)
+            _write_batch(catalog, instances, stats, allow_updates)
+    finally:
+        # Bulk writes send no signals; the catalog refreshes what they would
+        # have, also for the batches committed before a failure
+        catalog.imported()
+        stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def _write_batch(catalog, instances, stats, allow_updates=True):
+    model = catalog.MODEL
+    new, by_pk = [], {}
+    for number, obj in instances:
+        if obj.pk is None:
+            new.append(obj)
+        else:
+            by_pk[obj.pk] = (number, obj)  # the last row wins when a file repeats an id
+    existing = set(model.objects.filter(pk__in=list(by_pk)).values_list('pk', flat=True)) if by_pk else set()
+    updates = [obj for pk, (_, obj) in by_pk.items() if pk in existing]
+    creates = new + [obj for pk, (_, obj) in by_pk.items() if pk not in existing]
+    if updates and not allow_updates:
+        for obj in updates:
+            stats.error(f'record {by_pk[obj.pk][0]}: id {obj.pk} already exists and updates are not allowed')
+        updates = []
+    with transaction.atomic():
+        if updates:
+            model.objects.bulk_update(updates, catalog.UPDATE_FIELDS)
+        if creates:
+            model.objects.bulk_create(creates)
+    stats.updated += len(updates)
+    stats.created += len(creates)
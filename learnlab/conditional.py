@@ -0,0 +1,116 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# Conditional GET for read endpoints. A view derives its ETag / Last-Modified
+# from a version stamp instead of from the response body, so a client whose
+# copy is current gets 304 Not Modified before anything is queried, serialized
+# or rendered (ConditionalGetMixin below for DRF views,
+# django.views.decorators.http.condition for plain Django views):
+#
+#   - lists use TableVersion: the table's row count and newest updated_at,
+#     one aggregate query, cached until the app's signals invalidate it, as
+#     an ETag only: a Last-Modified of the newest updated_at would not move
+#     when a row is deleted, so If-Modified-Since would keep a stale list. The
+#     stamp lives in the CONDITIONAL_CACHE alias, which must be shared by all
+#     worker processes (FileBasedCache or Redis, see settings): with a
+#     per-process cache, invalidate() would only reach the worker that made
+#     the write, and the others would keep answering 304 with a stale stamp,
+#   - detail views read the one row's updated_at.
+#
+# Writes that bypass save()/delete() (bulk_create, queryset.update()) must
+# bump updated_at themselves where the row changes, and call invalidate().
+
+CONDITIONAL_CACHE = getattr(settings, 'CONDITIONAL_CACHE', 'default')
+VERSION_TIMEOUT = getattr(settings, 'CONDITIONAL_VERSION_TIMEOUT', 3600)
+
+
+def _cache():
+    return caches[CONDITIONAL_CACHE]
+
+
+def make_etag(*parts):
+    return hashlib.md5('|'.join(str(part) for part in parts).encode(), usedforsecurity=False).hexdigest()
+
+
+class TableVersion:
+    """Cached (row count, newest ``field``) of a model's table."""
+
+    def __init__(self, model, field='updated_at'):
+        self.model = model
+        self.field = field
+        self.key = f'conditional:{model._meta.label_lower}'
+
+    def get(self):
+        cache = _cache()
+        stamp = cache.get(self.key)
+        if stamp is None:
+            row = self.model._default_manager.aggregate(count=Count('pk'), latest=Max(self.field))
+            stamp = (row['count'], row['latest'])
+            cache.set(self.key, stamp, VERSION_TIMEOUT)
+        return stamp
+
+    def invalidate(self, **kwargs):
+        cache = _cache()
+        cache.delete(self.key)
+        # Again after commit, in case a reader cached the old stamp meanwhile
+        transaction.on_commit(lambda: cache.delete(self.key))
+
+    def etag(self, *vary_on):
+        return make_etag(*self.get(), *vary_on)
+
+
+def row_version(queryset, pk, field='updated_at'):
+    """``field`` of one row, or None if it doesn't exist."""
+    return queryset.filter(pk=pk).values_list(field, flat=True).first()
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    For DRF views: answer GET/HEAD with 304 Not Modified (or If-Match with
+    412) once authentication and permission checks have passed, before the
+    handler runs. Views override get_validators() to return an (etag,
+    last_modified datetime) pair, either of which may be None.
+    """
+
+    def get_validators(self, request):
+        return None, None  # no validators: every request gets the full response
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = (None, None)
+        if request.method not in ('GET', 'HEAD'):
+            return
+        etag, last_modified = self.get_validators(request)
+        # The browsable API and JSON share a URL but not a body
+        etag = quote_etag(make_etag(etag, request.accepted_renderer.format)) if etag else None
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        self.validators = (etag, timestamp)
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is not None:
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag, timestamp = getattr(self, 'validators', (None, None))
+        if response.status_code in (200, 304):
+            if etag and not response.has_header('ETag'):
+                response['ETag'] = etag
+            if timestamp and not response.has_header('Last-Modified'):
+                response['Last-Modified'] = http_date(timestamp)
+        return response
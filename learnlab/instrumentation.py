@@ -0,0 +1,230 @@
+import hmac
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import HttpResponse
+
+# Per-view SQL and latency instrumentation. QueryMetricsMiddleware wraps every
+# database connection with connection.execute_wrapper() for the duration of a
+# request and records, keyed by the resolved view name:
+#
+#   - request latency and time spent in the database,
+#   - how many queries the view ran (as a histogram, so one N+1 page shows up),
+#   - repeated query shapes: the same SQL fingerprint executed more than once
+#     in one request, which is what an N+1 loop looks like.
+#
+# Other code can count events with registry.increment() (e.g. the blog's
+# fragment cache hits and misses); they are exported as plain counters.
+#
+# metrics_view serves the totals in the Prometheus text format for scraping,
+# to staff users and to scrapers sending INSTRUMENTATION_METRICS_TOKEN as a
+# bearer token (no token, the default, turns that off). The client address is
+# never trusted: behind a proxy on the same host every request comes from
+# 127.0.0.1.
+#
+# Set INSTRUMENTATION_SERVER_TIMING = True to also send a Server-Timing header,
+# which browser dev tools show next to each request.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Repeated query shapes kept per view, most frequent first
+TOP_REPEATED = getattr(settings, 'INSTRUMENTATION_TOP_REPEATED', 5)
+# Bearer token that lets a scraper read the metrics; None turns it off
+METRICS_TOKEN = getattr(settings, 'INSTRUMENTATION_METRICS_TOKEN', None)
+
+_IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint(sql):
+    """Normalize SQL so queries differing only in parameters compare equal."""
+    # Parameters are already %s placeholders; IN lists of any length fold into one
+    return _WHITESPACE.sub(' ', _IN_LIST.sub('(%s, ...)', sql)).strip()
+
+
+class QueryRecorder:
+    """execute_wrapper hook counting and timing the queries of one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.shapes[fingerprint(sql)] += 1
+
+    def repeated(self):
+        return {shape: n for shape, n in self.shapes.items() if n > 1}
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+        self.total += 1
+        self.sum += value
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class ViewStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.repeated = Counter()
+
+
+class Registry:
+    """Process-wide totals; each worker process exposes its own."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(ViewStats)
+        self._counters = defaultdict(Counter)
+        self._help = {}
+
+    def observe(self, view, elapsed, recorder):
+        with self._lock:
+            stats = self._views[view]
+            stats.latency.observe(elapsed)
+            stats.queries.observe(recorder.count)
+            stats.db_seconds += recorder.duration
+            # Count the redundant executions: the first run of a shape is fine
+            for shape, n in recorder.repeated().items():
+                stats.repeated[shape] += n - 1
+
+    def increment(self, name, help_text, **labels):
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            self._counters[name][tuple(sorted(labels.items()))] += 1
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters[name][tuple(sorted(labels.items()))]
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._counters.clear()
+
+    def snapshot(self):
+        with self._lock:
+            return {view: stats for view, stats in sorted(self._views.items())}
+
+    def render(self):
+        """The collected metrics in the Prometheus text exposition format."""
+        lines = []
+        views = self.snapshot()
+
+        def header(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name, attr):
+            for view, stats in views.items():
+                hist = getattr(stats, attr)
+                label = _label(view)
+                for bound, count in hist.cumulative():
+                    lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{view="{label}",le="+Inf"}} {hist.total}')
+                lines.append(f'{name}_sum{{view="{label}"}} {hist.sum}')
+                lines.append(f'{name}_count{{view="{label}"}} {hist.total}')
+
+        header('django_view_latency_seconds', 'histogram', 'Time to produce a response, per view.')
+        histogram('django_view_latency_seconds', 'latency')
+        header('django_view_queries', 'histogram', 'SQL queries executed per request, per view.')
+        histogram('django_view_queries', 'queries')
+        header('django_view_db_seconds_total', 'counter', 'Time spent executing SQL, per view.')
+        for view, stats in views.items():
+            lines.append(f'django_view_db_seconds_total{{view="{_label(view)}"}} {stats.db_seconds}')
+        header('django_view_repeated_queries_total', 'counter',
+               'Redundant executions of a query shape already run in the same request.')
+        for view, stats in views.items():
+            for shape, n in stats.repeated.most_common(TOP_REPEATED):
+                lines.append(f'django_view_repeated_queries_total{{view="{_label(view)}",query="{_label(shape)}"}} {n}')
+        with self._lock:
+            counters = {name: (self._help[name], dict(values)) for name, values in sorted(self._counters.items())}
+        for name, (help_text, values) in counters.items():
+            header(name, 'counter', help_text)
+            for labels, n in sorted(values.items()):
+                label_text = ','.join(f'{key}="{_label(str(value))}"' for key, value in labels)
+                lines.append(f'{name}{{{label_text}}} {n}')
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+registry = Registry()
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return '<unresolved>'
+    return match.view_name or match.route
+
+
+class QueryMetricsMiddleware:
+    """Record query counts and timings for every request; put it first in MIDDLEWARE."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - start
+
+        registry.observe(view_name(request), elapsed, recorder)
+        if getattr(settings, 'INSTRUMENTATION_SERVER_TIMING', False):
+            response['Server-Timing'] = (
+                f'db;dur={recorder.duration * 1000:.1f};desc="{recorder.count} queries", '
+                f'total;dur={elapsed * 1000:.1f}'
+            )
+        return response
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint; staff users and holders of the metrics token only."""
+    if not (request.user.is_staff or _has_metrics_token(request)):
+        raise PermissionDenied
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _has_metrics_token(request):
+    if not METRICS_TOKEN:
+        return False
+    scheme, _, token = request.META.get('HTTP_AUTHORIZATION', '').partition(' ')
+    return scheme.lower() == 'bearer' and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
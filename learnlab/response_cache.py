@@ -0,0 +1,137 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+# Response cache for DRF list endpoints. CachedListMixin keeps the serialized
+# data of each page (not the rendered bytes, so content negotiation still
+# runs) in the cache named by RESPONSE_CACHE_ALIAS, keyed by:
+#
+#   - a generation number for every model the view depends on
+#     (``cache_models``); the app's signals bump a model's generation on each
+#     create/update/delete, which retires every page built from it at once,
+#   - host, path and the sorted query parameters, and the renderer format,
+#   - the auth scope: the user for views whose output depends on who asks
+#     (``cache_per_user``), otherwise one shared entry.
+#
+# The backend is whatever RESPONSE_CACHE_ALIAS points at in CACHES. It must
+# be shared by every worker process, since the generation numbers live there
+# too: with a per-process (locmem) cache, a write bumps the generation in the
+# worker that handled it only, and the others keep serving the old pages.
+# FileBasedCache shares it between the workers of one host,
+# django.core.cache.backends.redis.RedisCache between hosts; locmem only suits
+# a single process (runserver, tests).
+#
+# When an entry is missing, only the request holding the per-key lock
+# (cache.add) builds it; concurrent requests for the same key wait up to
+# RESPONSE_CACHE_LOCK_WAIT seconds for it instead of all hitting the database.
+#
+# Writes that bypass save()/delete() (bulk_create, queryset.update()) must
+# call bump() themselves. The browsable API is never cached.
+
+RESPONSE_CACHE_ALIAS = getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+RESPONSE_CACHE_LOCK_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_LOCK_TIMEOUT', 10)
+RESPONSE_CACHE_LOCK_WAIT = getattr(settings, 'RESPONSE_CACHE_LOCK_WAIT', 2.0)
+LOCK_POLL_INTERVAL = 0.02
+
+KEY_PREFIX = 'response'
+
+
+def _cache():
+    return caches[RESPONSE_CACHE_ALIAS]
+
+
+def _generation_key(model):
+    return f'{KEY_PREFIX}:generation:{model._meta.label_lower}'
+
+
+def generations(models):
+    """Current generation of each model; a missing one starts at a fresh, unused number."""
+    cache = _cache()
+    keys = [_generation_key(model) for model in models]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            # Not 0: after an eviction the old pages of generation 0 could still be cached
+            cache.add(key, time.time_ns(), None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def bump(model, **kwargs):
+    """Retire every cached page built from ``model``; takes signal kwargs so it can be a receiver."""
+    cache = _cache()
+    key = _generation_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
+
+
+class CachedListMixin:
+    """
+    Cache the serialized pages of a DRF list endpoint (see the module comment).
+    Set ``cache_models`` to every model the output is built from.
+    """
+
+    cache_models = ()
+    cache_per_user = True
+    cache_timeout = RESPONSE_CACHE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format == 'api':
+            return super().list(request, *args, **kwargs)
+
+        cache = _cache()
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is None:
+            cached = self._build(cache, key, lambda: super(CachedListMixin, self).list(request, *args, **kwargs))
+            if isinstance(cached, Response):
+                return cached  # not cacheable (e.g. an error), passed through
+            state = 'MISS'
+        else:
+            state = 'HIT'
+        status, data = cached
+        return Response(data, status=status, headers={'X-Cache': state})
+
+    def get_response_cache_key(self, request):
+        scope = f'user:{request.user.pk}' if self.cache_per_user and request.user.is_authenticated else 'shared'
+        params = sorted((name, sorted(values)) for name, values in request.query_params.lists())
+        parts = [
+            *generations(self.cache_models), request.get_host(), request.path, params,
+            request.accepted_renderer.format, scope,
+        ]
+        digest = hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+        return f'{KEY_PREFIX}:{type(self).__name__}:{digest}'
+
+    def _build(self, cache, key, render):
+        lock = f'{key}:lock'
+        locked = cache.add(lock, 1, RESPONSE_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            cached = self._wait(cache, key)
+            if cached is not None:
+                return cached
+            # The holder is slow or gone: build it ourselves rather than fail
+        try:
+            response = render()
+            if response.status_code != 200:
+                return response
+            cached = (response.status_code, response.data)
+            cache.set(key, cached, self.cache_timeout)
+            return cached
+        finally:
+            if locked:
+                cache.delete(lock)
+
+    def _wait(self, cache, key):
+        deadline = time.monotonic() + RESPONSE_CACHE_LOCK_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(LOCK_POLL_INTERVAL)
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        return None
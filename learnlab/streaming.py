@@ -0,0 +1,80 @@
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.exceptions import ValidationError
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+# Streaming list mode for DRF list endpoints. A normal list response builds
+# every serialized row, then the whole rendered body, before the first byte
+# is sent. With ?stream=json (a JSON array) or ?stream=ndjson (one object per
+# line), StreamingListMixin instead reads the filtered queryset with
+# .iterator(chunk_size=STREAM_CHUNK_SIZE), serializes one row at a time and
+# sends ROWS_PER_WRITE rows per chunk, so memory stays flat however many rows
+# there are and the response starts as soon as the first chunk is read.
+#
+# Streamed lists are never paginated nor response-cached (put the mixin
+# before CachedListMixin); filtering, searching and ordering still apply.
+# Serializers must not need prefetched relations, which .iterator() only
+# honours a chunk at a time.
+
+STREAM_CHUNK_SIZE = getattr(settings, 'STREAM_CHUNK_SIZE', 2000)
+ROWS_PER_WRITE = 500
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+STREAM_QUERY_PARAM = 'stream'
+
+
+def _dumps(data):
+    # Same output as DRF's JSONRenderer with the default settings
+    return json.dumps(
+        data, cls=JSONEncoder, ensure_ascii=not api_settings.UNICODE_JSON,
+        allow_nan=not api_settings.STRICT_JSON, separators=(',', ':'),
+    )
+
+
+def stream_json(items, fmt):
+    """Encoded chunks of ``items`` (serialized dicts) as a JSON array or as NDJSON."""
+    if fmt not in STREAM_FORMATS:
+        raise ValueError(f'Unknown format {fmt!r}; expected one of {", ".join(STREAM_FORMATS)}.')
+    items = iter(items)
+    if fmt == 'json':
+        yield b'['
+    separator = ''
+    while True:
+        chunk = list(islice(items, ROWS_PER_WRITE))
+        if not chunk:
+            break
+        if fmt == 'ndjson':
+            yield ''.join(_dumps(item) + '\n' for item in chunk).encode()
+        else:
+            yield (separator + ','.join(_dumps(item) for item in chunk)).encode()
+            separator = ','
+    if fmt == 'json':
+        yield b']'
+
+
+class StreamingListMixin:
+    """Serve ?stream=json|ndjson list requests as a streamed body (see the module comment)."""
+
+    stream_chunk_size = STREAM_CHUNK_SIZE
+
+    def list(self, request, *args, **kwargs):
+        fmt = request.query_params.get(STREAM_QUERY_PARAM)
+        if fmt is None:
+            return super().list(request, *args, **kwargs)
+        if fmt not in STREAM_FORMATS:
+            raise ValidationError({STREAM_QUERY_PARAM: f'Must be one of {", ".join(STREAM_FORMATS)}.'})
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+        return StreamingHttpResponse(
+            stream_json(self.stream_rows(queryset), fmt), content_type=STREAM_FORMATS[fmt],
+        )
+
+    def stream_rows(self, queryset):
+        # One serializer reused for every row, instead of a ListSerializer over all of them
+        serializer = self.get_serializer()
+        for obj in queryset.iterator(chunk_size=self.stream_chunk_size):
+            yield serializer.to_representation(obj)
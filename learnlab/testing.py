@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext, override_settings
+
+# Query-budget helpers for the test suites. A budget test grows a table through
+# SCALES and asserts the endpoint runs the same (bounded) number of queries at
+# every size, so an N+1 introduced in a view or serializer fails the build
+# instead of only showing up in production.
+#
+# The 10k step is slow on SQLite; it runs when QUERY_BUDGET_FULL=1 (CI).
+
+SCALES = (10, 1000, 10000) if os.environ.get('QUERY_BUDGET_FULL') else (10, 1000)
+
+
+class QueryBudgetMixin:
+    """Mix into a TestCase / APITestCase for assertMaxQueries and assertQueriesFlat."""
+
+    scales = SCALES
+
+    @contextmanager
+    def assertMaxQueries(self, budget, using=DEFAULT_DB_ALIAS):
+        """Fail if the block runs more than ``budget`` queries; lists them when it does."""
+        with CaptureQueriesContext(connections[using]) as context:
+            yield context
+        if len(context) > budget:
+            queries = '\n'.join(
+                f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{len(context)} queries executed, budget is {budget}:\n{queries}")
+
+    def assertQueriesFlat(self, make_rows, request, budget):
+        """
+        Call ``make_rows(start, count)`` to grow the data set to each scale in
+        turn and check ``request()`` stays within ``budget`` queries and runs
+        the same number of queries at every scale.
+        """
+        counts = {}
+        rows = 0
+        for scale in self.scales:
+            make_rows(rows, scale - rows)
+            rows = scale
+            with self.assertMaxQueries(budget) as context:
+                request()
+            counts[scale] = len(context)
+        self.assertEqual(len(set(counts.values())), 1, f"query count grows with row count: {counts}")
+
+
+class IsolatedCachesRunner(DiscoverRunner):
+    """
+    DiscoverRunner that points every FileBasedCache at a temporary directory
+    for the run. The shared caches live in fixed directories that running
+    servers use too, and tests clear them; this keeps the tests away from
+    those entries. Set TEST_RUNNER = 'learnlab.testing.IsolatedCachesRunner'.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_dir = tempfile.mkdtemp(prefix='learnlab-test-caches-')
+        isolated = {}
+        for alias, config in settings.CACHES.items():
+            config = dict(config)
+            if config['BACKEND'].endswith('.FileBasedCache'):
+                config['LOCATION'] = os.path.join(self.cache_dir, alias)
+            isolated[alias] = config
+        self.caches_override = override_settings(CACHES=isolated)
+        self.caches_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.caches_override.disable()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,36 @@
+# Minimal settings for learnlab's own tests; the projects test their wiring
+import tempfile
+from pathlib import Path
+
+SECRET_KEY = 'learnlab-tests'
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+]
+
+MIDDLEWARE = [
+    'learnlab.instrumentation.QueryMetricsMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+]
+
+ROOT_URLCONF = 'learnlab.tests.urls'
+
+DATABASES = {'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}}
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+USE_TZ = True
+
+# A shared cache as the projects configure them; the runner moves it for the tests
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'learnlab-shared',
+    },
+}
+SHARED_CACHE_LOCATION = CACHES['shared']['LOCATION']
+TEST_RUNNER = 'learnlab.testing.IsolatedCachesRunner'
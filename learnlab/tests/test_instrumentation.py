@@ -0,0 +1,54 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+
+from learnlab import instrumentation
+from learnlab.instrumentation import fingerprint, registry
+
+
+@override_settings(INSTRUMENTATION_SERVER_TIMING=True)
+class InstrumentationTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.user = User.objects.create_user(username='reader', password='pass12345')
+        self.staff = User.objects.create_user(username='ops', password='pass12345', is_staff=True)
+
+    def test_in_lists_share_a_fingerprint(self):
+        self.assertEqual(
+            fingerprint('SELECT * FROM t WHERE id IN (%s, %s)'),
+            fingerprint('SELECT * FROM t WHERE id IN (%s,\n %s, %s)'),
+        )
+
+    def test_requests_are_recorded_per_view(self):
+        response = self.client.get('/users/count/')
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ queries"')
+
+        self.client.force_login(self.staff)
+        metrics = self.client.get('/internal/metrics/')
+        self.assertEqual(metrics.status_code, 200)
+        self.assertTrue(metrics['Content-Type'].startswith('text/plain'))
+        body = metrics.content.decode()
+        self.assertIn('django_view_latency_seconds_count{view="user-count"} 1', body)
+        self.assertIn('django_view_queries_bucket{view="user-count",le="1"} 1', body)
+
+    def test_counters_are_exported(self):
+        registry.increment('app_events_total', 'Events seen.', kind='a')
+        registry.increment('app_events_total', 'Events seen.', kind='a')
+        self.assertEqual(registry.counter('app_events_total', kind='a'), 2)
+        self.assertIn('app_events_total{kind="a"} 2', registry.render())
+
+    def test_metrics_need_staff_or_the_token(self):
+        # The client address is not trusted: a same-host proxy makes every request local
+        self.assertEqual(self.client.get('/internal/metrics/', REMOTE_ADDR='127.0.0.1').status_code, 403)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get('/internal/metrics/').status_code, 403)
+        self.client.logout()
+
+        bearer = {'HTTP_AUTHORIZATION': 'Bearer s3cret'}
+        self.assertEqual(self.client.get('/internal/metrics/', **bearer).status_code, 403)
+        with mock.patch.object(instrumentation, 'METRICS_TOKEN', 's3cret'):
+            self.assertEqual(self.client.get('/internal/metrics/', **bearer).status_code, 200)
+            wrong = {'HTTP_AUTHORIZATION': 'Bearer guess'}
+            self.assertEqual(self.client.get('/internal/metrics/', **wrong).status_code, 403)
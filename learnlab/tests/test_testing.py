@@ -0,0 +1,39 @@
+import os
+
+from django.conf import settings
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
+from django.test import SimpleTestCase, TestCase
+
+from learnlab.testing import QueryBudgetMixin
+
+
+class QueryBudgetMixinTests(QueryBudgetMixin, TestCase):
+    scales = (1, 3)
+
+    def test_over_budget_lists_the_queries(self):
+        with self.assertRaises(AssertionError) as failure:
+            with self.assertMaxQueries(1):
+                User.objects.exists()
+                Group.objects.exists()
+        self.assertIn('2 queries executed, budget is 1', str(failure.exception))
+        self.assertIn('2. SELECT', str(failure.exception))
+
+    def test_growing_query_count_fails(self):
+        rows = []
+
+        def one_query_per_row():
+            for _ in rows:
+                User.objects.exists()
+
+        with self.assertRaises(AssertionError) as failure:
+            self.assertQueriesFlat(lambda start, count: rows.extend(range(count)), one_query_per_row, budget=5)
+        self.assertIn('query count grows with row count: {1: 1, 3: 3}', str(failure.exception))
+
+
+class IsolatedCachesRunnerTests(SimpleTestCase):
+    def test_file_based_caches_are_moved_for_the_run(self):
+        location = caches['shared']._dir
+        self.assertNotEqual(location, os.path.abspath(settings.SHARED_CACHE_LOCATION))
+        self.assertIn('learnlab-test-caches-', location)
+        self.assertEqual(settings.CACHES['default']['BACKEND'], 'django.core.cache.backends.locmem.LocMemCache')
@@ -0,0 +1,15 @@
+from django.contrib.auth.models import User
+from django.http import HttpResponse
+from django.urls import path
+
+from learnlab.instrumentation import metrics_view
+
+
+def user_count(request):
+    return HttpResponse(str(User.objects.count()))
+
+
+urlpatterns = [
+    path('users/count/', user_count, name='user-count'),
+    path('internal/metrics/', metrics_view, name='metrics'),
+]
@@ -0,0 +1,190 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router, transaction
+from django.db.models import Count
+from django.db.models.signals import m2m_changed
+
+from .models import User
+
+# Follower graph service. Each user's following / follower id sets and their
+# follower count are cached as adjacency entries, so follow checks and feed
+# builds don't hit the join table. Entries are loaded lazily from the edge
+# table. When an edge is added or removed, the m2m_changed handler in
+# accounts/signals.py drops the entries it makes stale, at once and again
+# after the transaction commits (a read of the old edges meanwhile would
+# cache them again). Entries are never patched in place: get, change and set
+# on a shared cache is not atomic (nor is incr() on FileBasedCache), so two
+# workers recording follows at the same time would lose one of them.
+#
+# The cache alias is FOLLOW_GRAPH_CACHE (see CACHES in settings). It must be a
+# backend shared by every worker process (file-based on one host, Redis
+# between hosts): invalidation only reaches the cache it runs against.
+
+# Edge table of User.followers: from_user is followed by to_user
+Follow = User.followers.through
+
+GRAPH_TIMEOUT = getattr(settings, 'FOLLOW_GRAPH_TIMEOUT', 3600)
+
+
+def _cache():
+    return caches[getattr(settings, 'FOLLOW_GRAPH_CACHE', 'default')]
+
+
+def _following_key(user_id):
+    return f'graph:following:{user_id}'
+
+
+def _followers_key(user_id):
+    return f'graph:followers:{user_id}'
+
+
+def _count_key(user_id):
+    return f'graph:follower_count:{user_id}'
+
+
+def following_ids(user_ids):
+    """Ids each user follows, as {user_id: frozenset}; one query for all cache misses."""
+    return _adjacency(user_ids, _following_key, 'to_user_id', 'from_user_id')
+
+
+def follower_ids(user_ids):
+    """Ids following each user, as {user_id: frozenset}; one query for all cache misses."""
+    return _adjacency(user_ids, _followers_key, 'from_user_id', 'to_user_id')
+
+
+def get_following(user_id):
+    return following_ids([user_id])[user_id]
+
+
+def get_followers(user_id):
+    return follower_ids([user_id])[user_id]
+
+
+def is_following(follower_id, followee_id):
+    return followee_id in get_following(follower_id)
+
+
+def follower_counts(user_ids):
+    cache = _cache()
+    user_ids = list(user_ids)
+    cached = cache.get_many([_count_key(user_id) for user_id in user_ids])
+    counts = {user_id: cached[_count_key(user_id)] for user_id in user_ids if _count_key(user_id) in cached}
+    missing = [user_id for user_id in user_ids if user_id not in counts]
+    if missing:
+        loaded = dict.fromkeys(missing, 0)
+        # Counted by the database, one row per user, not one per edge
+        loaded.update(
+            Follow.objects.filter(from_user_id__in=missing)
+            .values('from_user_id').annotate(n=Count('*')).values_list('from_user_id', 'n')
+        )
+        cache.set_many({_count_key(user_id): n for user_id, n in loaded.items()}, GRAPH_TIMEOUT)
+        counts.update(loaded)
+    return counts
+
+
+def follower_count(user_id):
+    return follower_counts([user_id])[user_id]
+
+
+def _adjacency(user_ids, make_key, own_column, other_column):
+    cache = _cache()
+    user_ids = list(user_ids)
+    cached = cache.get_many([make_key(user_id) for user_id in user_ids])
+    result = {user_id: cached[make_key(user_id)] for user_id in user_ids if make_key(user_id) in cached}
+    missing = [user_id for user_id in user_ids if user_id not in result]
+    if missing:
+        loaded = {user_id: set() for user_id in missing}
+        edges = Follow.objects.filter(**{own_column + '__in': missing}).values_list(own_column, other_column)
+        for user_id, other_id in edges.iterator(chunk_size=5000):
+            loaded[user_id].add(other_id)
+        loaded = {user_id: frozenset(ids) for user_id, ids in loaded.items()}
+        cache.set_many({make_key(user_id): ids for user_id, ids in loaded.items()}, GRAPH_TIMEOUT)
+        result.update(loaded)
+    return result
+
+
+def edges_changed(edges):
+    """Drop the entries made stale by added or removed (follower_id, followee_id) edges."""
+    keys = set()
+    for follower_id, followee_id in edges:
+        keys.update((_following_key(follower_id), _followers_key(followee_id), _count_key(followee_id)))
+    _drop(keys)
+
+
+def forget(user_ids):
+    """Drop every cached entry for these users; they are reloaded on next use."""
+    keys = []
+    for user_id in user_ids:
+        keys += [_following_key(user_id), _followers_key(user_id), _count_key(user_id)]
+    _drop(keys)
+
+
+def _drop(keys):
+    keys = list(keys)
+    _cache().delete_many(keys)
+    # Also after commit, in case a concurrent read cached the pre-change edges
+    transaction.on_commit(lambda: _cache().delete_many(keys))
+
+
+# Bulk edge writes. Both insert or delete every edge with one statement and
+# then send the same m2m_changed signals as user.following.add()/remove(), so
+# the cache above and the home feeds stay in step.
+
+FOLLOWED = 'followed'
+ALREADY_FOLLOWING = 'already_following'
+UNFOLLOWED = 'unfollowed'
+NOT_FOLLOWING = 'not_following'
+NOT_FOUND = 'not_found'
+SELF = 'self'
+
+
+def follow_many(follower, user_ids):
+    """Follow every id in ``user_ids``; returns {user_id: status}."""
+    user_ids = list(dict.fromkeys(user_ids))
+    found = set(User.objects.filter(pk__in=user_ids).values_list('pk', flat=True))
+    already = set(
+        Follow.objects.filter(to_user_id=follower.pk, from_user_id__in=found).values_list('from_user_id', flat=True)
+    )
+
+    results, new = {}, []
+    for user_id in user_ids:
+        if user_id == follower.pk:
+            results[user_id] = SELF
+        elif user_id not in found:
+            results[user_id] = NOT_FOUND
+        elif user_id in already:
+            results[user_id] = ALREADY_FOLLOWING
+        else:
+            results[user_id] = FOLLOWED
+            new.append(user_id)
+
+    if new:
+        with transaction.atomic(using=router.db_for_write(Follow)):
+            _send(follower, 'pre_add', new)
+            Follow.objects.bulk_create(
+                [Follow(from_user_id=user_id, to_user_id=follower.pk) for user_id in new],
+                ignore_conflicts=True,
+            )
+            _send(follower, 'post_add', new)
+    return results
+
+
+def unfollow_many(follower, user_ids):
+    """Unfollow every id in ``user_ids``; returns {user_id: status}."""
+    user_ids = list(dict.fromkeys(user_ids))
+    edges = Follow.objects.filter(to_user_id=follower.pk, from_user_id__in=user_ids)
+    followed = set(edges.values_list('from_user_id', flat=True))
+    if followed:
+        with transaction.atomic(using=router.db_for_write(Follow)):
+            _send(follower, 'pre_remove', followed)
+            edges.delete()
+            _send(follower, 'post_remove', followed)
+    return {user_id: UNFOLLOWED if user_id in followed else NOT_FOLLOWING for user_id in user_ids}
+
+
+def _send(follower, action, user_ids):
+    # Same shape as follower.following.add(...): the reverse side of User.followers
+    m2m_changed.send(
+        sender=Follow, instance=follower, action=action, reverse=True,
+        model=User, pk_set=set(user_ids), using=router.db_for_write(Follow),
+    )
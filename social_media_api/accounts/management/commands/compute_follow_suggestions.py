@@ -0,0 +1,88 @@
+import heapq
+from collections import Counter, defaultdict
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from accounts.models import FollowSuggestion, User
+
+# Edge table of User.followers: from_user is followed by to_user
+Follow = User.followers.through
+
+
+def _chunks(ids, size):
+    ids = iter(ids)
+    while True:
+        chunk = list(islice(ids, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _edges(follower_ids, chunk_size):
+    """Stream (follower, followee) pairs for the given followers straight off the edge table."""
+    for chunk in _chunks(follower_ids, chunk_size):
+        yield from (
+            Follow.objects.filter(to_user_id__in=chunk)
+            .values_list('to_user_id', 'from_user_id')
+            .iterator(chunk_size=chunk_size)
+        )
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the FollowSuggestion table: for every user, the accounts followed by "
+        "the people they follow, scored by mutual count. Run it periodically (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help="Number of users scored per batch (default: 500).")
+        parser.add_argument('--limit', type=int, default=50,
+                            help="Suggestions kept per user (default: 50).")
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help="Rows fetched per round trip when streaming edges (default: 2000).")
+
+    def handle(self, *args, batch_size, limit, chunk_size, **options):
+        users = written = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                User.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            users += len(batch)
+            written += self.score_batch(batch, limit, chunk_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Scored {users} users, wrote {written} suggestions."))
+
+    def score_batch(self, batch, limit, chunk_size):
+        # First hop: who each user in the batch follows, and the reverse index
+        # so second-hop edges can be credited to every batch user behind them
+        following = defaultdict(set)
+        via = defaultdict(list)
+        for user_id, followee_id in _edges(batch, chunk_size):
+            following[user_id].add(followee_id)
+            via[followee_id].append(user_id)
+
+        # Second hop: memory is bounded by the batch's candidate sets, never
+        # by the size of the whole edge table
+        scores = defaultdict(Counter)
+        for middle_id, candidate_id in _edges(via, chunk_size):
+            for user_id in via[middle_id]:
+                if candidate_id != user_id and candidate_id not in following[user_id]:
+                    scores[user_id][candidate_id] += 1
+
+        suggestions = [
+            FollowSuggestion(user_id=user_id, candidate_id=candidate_id, score=score)
+            for user_id, counter in scores.items()
+            # Highest mutual count first, lowest id breaks ties for stable output
+            for candidate_id, score in heapq.nsmallest(limit, counter.items(), key=lambda item: (-item[1], item[0]))
+        ]
+        with transaction.atomic():
+            FollowSuggestion.objects.filter(user_id__in=batch).delete()
+            FollowSuggestion.objects.bulk_create(suggestions, batch_size=chunk_size)
+        return len(suggestions)
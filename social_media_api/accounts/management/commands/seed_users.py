@@ -0,0 +1,78 @@
+import random
+from itertools import accumulate, islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from accounts.models import User
+
+# Edge table of User.followers: from_user is followed by to_user
+Follow = User.followers.through
+
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Create synthetic users and a follower graph for benchmarks. Follow targets "
+        "are drawn from a power law (Zipf), so a few accounts get most followers, "
+        "like a real social network."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000,
+                            help="Number of users to create (default: 10000).")
+        parser.add_argument('--avg-following', type=int, default=50,
+                            help="Average number of accounts each user follows (default: 50).")
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help="Zipf exponent of the follower distribution (default: 1.1).")
+        parser.add_argument('--prefix', default='bench',
+                            help="Username prefix (default: bench).")
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Rows per bulk_create (default: 5000).")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Random seed, for repeatable datasets (default: 0).")
+
+    def handle(self, *args, users, avg_following, alpha, prefix, batch_size, seed, **options):
+        rng = random.Random(seed)
+        # Hashing is the slow part of creating users: every account shares one hash
+        password = make_password('bench-password')
+
+        start = User.objects.aggregate(last=Max('pk'))['last'] or 0
+        for batch in _batches(range(users), batch_size):
+            User.objects.bulk_create(
+                User(username=f'{prefix}_{start + i}', email=f'{prefix}_{start + i}@example.com', password=password)
+                for i in batch
+            )
+        user_ids = list(User.objects.filter(pk__gt=start).order_by('pk').values_list('pk', flat=True))
+
+        # Popularity rank is random so follower counts don't follow creation order
+        ranked = user_ids[:]
+        rng.shuffle(ranked)
+        cum_weights = list(accumulate(1 / (rank + 1) ** alpha for rank in range(len(ranked))))
+
+        def edges():
+            for follower_id in user_ids:
+                k = min(int(rng.expovariate(1 / avg_following)) if avg_following else 0, len(ranked) - 1)
+                for followee_id in set(rng.choices(ranked, cum_weights=cum_weights, k=k)):
+                    if followee_id != follower_id:
+                        yield Follow(from_user_id=followee_id, to_user_id=follower_id)
+
+        created = 0
+        for batch in _batches(edges(), batch_size):
+            Follow.objects.bulk_create(batch, ignore_conflicts=True)
+            created += len(batch)
+
+        # bulk_create skips m2m_changed, so drop anything the graph cache holds
+        caches[getattr(settings, 'FOLLOW_GRAPH_CACHE', 'default')].clear()
+        self.stdout.write(self.style.SUCCESS(f"Created {len(user_ids)} users and {created} follow edges."))
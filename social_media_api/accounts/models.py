@@ -11,6 +11,25 @@ def __str__(self):
         return self.username
 
 
+# Precomputed "who to follow" candidates: friends-of-friends scored by how
+# many of the people `user` follows also follow `candidate`. Rebuilt in bulk by
+# `python manage.py compute_follow_suggestions`, read with one index lookup.
+class FollowSuggestion(models.Model):
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follow_suggestions')
+    candidate = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    score = models.PositiveIntegerField()
+    computed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('user', 'candidate')
+        indexes = [
+            models.Index(fields=['user', '-score'], name='suggestion_user_score_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.candidate_id} for {self.user_id} ({self.score} mutual)'
+
+
 #symmetrical=False means if A follows B, B doesn’t automatically follow A.
 
 """ The related_name defines how the opposite side of the relationship can access this connection.
@@ -1,5 +1,5 @@
 
-from .models import User
+from .models import FollowSuggestion, User
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from rest_framework.authtoken.models import Token
@@ -15,7 +15,19 @@ class CustomUserSerializer(serializers.ModelSerializer):
         user = get_user_model().objects.create_user(**validated_data)
         Token.objects.create(user=user)  # Create a token for the new user
         return user
-    
 
-        
 
+class BulkFollowSerializer(serializers.Serializer):
+    user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=1000
+    )
+
+
+class FollowSuggestionSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(source='candidate_id')
+    username = serializers.CharField(source='candidate.username')
+    mutual_count = serializers.IntegerField(source='score')
+
+    class Meta:
+        model = FollowSuggestion
+        fields = ['id', 'username', 'mutual_count']
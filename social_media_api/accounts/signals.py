@@ -0,0 +1,28 @@
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from . import graph
+from .models import User
+
+
+# Invalidation of the cached follower graph. author.followers.add(user) is
+# the forward side of the relation, user.following.add(author) the reverse.
+@receiver(m2m_changed, sender=User.followers.through)
+def update_follow_graph(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # Remember who is on the other side before the edges disappear
+        related = instance.following if reverse else instance.followers
+        instance._graph_cleared_ids = list(related.values_list('pk', flat=True))
+        return
+    if action == 'post_clear':
+        graph.forget([instance.pk] + getattr(instance, '_graph_cleared_ids', []))
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if reverse:
+        edges = [(instance.pk, followee_id) for followee_id in pk_set]
+    else:
+        edges = [(follower_id, instance.pk) for follower_id in pk_set]
+
+    graph.edges_changed(edges)
@@ -1,3 +1,153 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from . import graph
+from .models import User
+
+
+class FollowGraphTests(TestCase):
+    def setUp(self):
+        caches['follow_graph'].clear()
+        self.alice, self.bob, self.carol = (
+            User.objects.create_user(username=name, password='pass12345') for name in ('alice', 'bob', 'carol')
+        )
+
+    def load(self):
+        return (
+            graph.is_following(self.alice.pk, self.bob.pk),
+            graph.get_followers(self.bob.pk),
+            graph.follower_count(self.bob.pk),
+        )
+
+    def test_follows_drop_the_stale_entries(self):
+        self.assertEqual(self.load(), (False, set(), 0))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.alice.following.add(self.bob)
+            self.carol.following.add(self.bob)
+        # Reloaded from the edge table: alice's following, bob's followers and count
+        with self.assertNumQueries(3):
+            self.assertEqual(self.load(), (True, {self.alice.pk, self.carol.pk}, 2))
+        with self.assertNumQueries(0):
+            self.load()
+
+        graph.get_following(self.carol.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.followers.remove(self.alice)
+        self.assertEqual(self.load(), (False, {self.carol.pk}, 1))
+        # Carol's entries were not touched
+        with self.assertNumQueries(0):
+            graph.get_following(self.carol.pk)
+
+    def test_batched_lookup_uses_one_query_for_misses(self):
+        self.alice.following.add(self.bob, self.carol)
+        self.bob.following.add(self.carol)
+        with self.assertNumQueries(1):
+            following = graph.following_ids([self.alice.pk, self.bob.pk, self.carol.pk])
+        self.assertEqual(following, {
+            self.alice.pk: {self.bob.pk, self.carol.pk},
+            self.bob.pk: {self.carol.pk},
+            self.carol.pk: set(),
+        })
+
+    def test_follower_counts_are_aggregated_by_the_database(self):
+        self.alice.following.add(self.bob, self.carol)
+        self.carol.following.add(self.bob)
+        with CaptureQueriesContext(connection) as queries:
+            counts = graph.follower_counts([self.alice.pk, self.bob.pk, self.carol.pk])
+        self.assertEqual(counts, {self.alice.pk: 0, self.bob.pk: 2, self.carol.pk: 1})
+        self.assertEqual(len(queries), 1)
+        self.assertIn('COUNT(', queries[0]['sql'])
+
+    def test_other_workers_see_the_invalidation(self):
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection('follow_graph')
+        graph.get_followers(self.bob.pk)
+        self.assertEqual(other_worker.get(graph._followers_key(self.bob.pk)), set())
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.alice.following.add(self.bob)
+        self.assertIsNone(other_worker.get(graph._followers_key(self.bob.pk)))
+
+        # A read between the change and the commit cached the old edges again
+        other_worker.set(graph._followers_key(self.bob.pk), frozenset())
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(other_worker.get(graph._followers_key(self.bob.pk)))
+
+    def test_clear_drops_cached_entries(self):
+        self.alice.following.add(self.bob)
+        self.assertTrue(graph.is_following(self.alice.pk, self.bob.pk))
+        self.alice.following.clear()
+        self.assertFalse(graph.is_following(self.alice.pk, self.bob.pk))
+        self.assertEqual(graph.follower_count(self.bob.pk), 0)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BulkFollowAPITests(APITestCase):
+    def setUp(self):
+        caches['follow_graph'].clear()
+        self.user = User.objects.create_user(username='newcomer', password='pass12345')
+        self.accounts = [User.objects.create(username=f'account{i}') for i in range(20)]
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_follow_reports_per_id_status(self):
+        self.user.following.add(self.accounts[0])
+        ids = [a.pk for a in self.accounts] + [self.user.pk, 999999]
+        response = self.client.post('/api/accounts/follow/bulk/', {'user_ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        statuses = {item['id']: item['status'] for item in response.data['results']}
+        self.assertEqual(statuses[self.accounts[0].pk], 'already_following')
+        self.assertEqual(statuses[self.accounts[1].pk], 'followed')
+        self.assertEqual(statuses[self.user.pk], 'self')
+        self.assertEqual(statuses[999999], 'not_found')
+        self.assertEqual(self.user.following.count(), 20)
+
+    def test_bulk_follow_query_count_does_not_grow_with_ids(self):
+        ids = [a.pk for a in self.accounts]
+        with CaptureQueriesContext(connection) as small:
+            graph.follow_many(self.user, ids[:2])
+        with CaptureQueriesContext(connection) as large:
+            graph.follow_many(self.user, ids[2:])
+        self.assertEqual(len(small), len(large))
+
+    def test_bulk_unfollow(self):
+        self.user.following.add(*self.accounts[:3])
+        ids = [a.pk for a in self.accounts[:5]]
+        response = self.client.post('/api/accounts/unfollow/bulk/', {'user_ids': ids}, format='json')
+        statuses = [item['status'] for item in response.data['results']]
+        self.assertEqual(statuses, ['unfollowed'] * 3 + ['not_following'] * 2)
+        self.assertFalse(self.user.following.exists())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FollowSuggestionTests(APITestCase):
+    def setUp(self):
+        caches['follow_graph'].clear()
+        self.me, self.a, self.b, self.x, self.y = (
+            User.objects.create_user(username=name, password='pass12345') for name in ('me', 'a', 'b', 'x', 'y')
+        )
+        self.me.following.add(self.a, self.b)
+        self.a.following.add(self.x, self.y, self.me)
+        self.b.following.add(self.x)
+        self.client.force_authenticate(self.me)
+
+    def test_candidates_are_scored_by_mutual_count(self):
+        call_command('compute_follow_suggestions', batch_size=2, chunk_size=2, stdout=StringIO())
+        response = self.client.get('/api/accounts/suggestions/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(s['username'], s['mutual_count']) for s in response.data['results']],
+            [('x', 2), ('y', 1)],
+        )
+
+    def test_accounts_followed_since_the_last_run_are_skipped(self):
+        call_command('compute_follow_suggestions', stdout=StringIO())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.me.following.add(self.x)
+        response = self.client.get('/api/accounts/suggestions/')
+        self.assertEqual([s['username'] for s in response.data['results']], ['y'])
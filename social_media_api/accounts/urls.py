@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import UserListCreateView, UserRetrieveUpdateDestroyView, FollowUserView, UnfollowUserView
+from .views import UserRegistrationView, UserProfileView, Follow_User, Unfollow_User
+from .views import BulkFollowView, BulkUnfollowView, FollowSuggestionsView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
@@ -7,10 +8,13 @@ from rest_framework_simplejwt.views import (
 
 
 urlpatterns = [
-   path("register/", UserListCreateView.as_view(), name='user-list-create'),
+    path("register/", UserRegistrationView.as_view(), name='user-list-create'),
     path("login/", TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path("token/refresh/", TokenRefreshView.as_view(), name='token_refresh'),
-    path("profile/<int:pk>/", UserRetrieveUpdateDestroyView.as_view(), name='user-detail'),
-    path("follow/<int:user_id>/", FollowUserView.as_view(), name='follow-user'),
-    path("unfollow/<int:user_id>/", UnfollowUserView.as_view(), name='unfollow-user'),
-]
\ No newline at end of file
+    path("profile/", UserProfileView.as_view(), name='user-detail'),
+    path("follow/bulk/", BulkFollowView.as_view(), name='bulk-follow'),
+    path("unfollow/bulk/", BulkUnfollowView.as_view(), name='bulk-unfollow'),
+    path("follow/<int:pk>/", Follow_User.as_view(), name='follow-user'),
+    path("unfollow/<int:pk>/", Unfollow_User.as_view(), name='unfollow-user'),
+    path("suggestions/", FollowSuggestionsView.as_view(), name='follow-suggestions'),
+]
@@ -1,12 +1,13 @@
-from django.shortcuts import render
-from rest_framework.serializers import CustomUserSerializer
+from django.shortcuts import render, get_object_or_404
+from .serializers import CustomUserSerializer, BulkFollowSerializer, FollowSuggestionSerializer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.authtoken.models import Token
 from rest_framework import status
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework import permissions
-from .models import CustomUser
+from .models import FollowSuggestion, User
+from . import graph
 
 
 
@@ -44,26 +45,74 @@ class Follow_User(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        user_to_follow = CustomUser.objects.get(pk=kwargs['pk'])
+        user_to_follow = get_object_or_404(User, pk=kwargs['pk'])
+        # One edge: following.add() and followers.add() write the same row
         request.user.following.add(user_to_follow)
-        user_to_follow.followers.add(request.user)
         return Response({"message": "You are now following {}".format(user_to_follow.username)}, status=status.HTTP_200_OK)
 
     def delete(self, request, *args, **kwargs):
-        user_to_unfollow = CustomUser.objects.get(pk=kwargs['pk'])
+        user_to_unfollow = get_object_or_404(User, pk=kwargs['pk'])
         request.user.following.remove(user_to_unfollow)
-        user_to_unfollow.followers.remove(request.user)
         return Response({"message": "You have unfollowed {}".format(user_to_unfollow.username)}, status=status.HTTP_200_OK)
 
 class Unfollow_User(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def post(self, request, *args, **kwargs):
-        user_to_unfollow = CustomUser.objects.get(pk=kwargs['pk'])
+        user_to_unfollow = get_object_or_404(User, pk=kwargs['pk'])
         request.user.following.remove(user_to_unfollow)
-        user_to_unfollow.followers.remove(request.user)
         return Response({"message": "You have unfollowed {}".format(user_to_unfollow.username)}, status=status.HTTP_200_OK)
 
+class BulkFollowView(APIView):
+    """
+    POST /follow/bulk/ {"user_ids": [...]}: follow many accounts at once.
+    Targets are validated in one query and the edges inserted with one
+    bulk_create; the response gives a status per id.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = graph.follow_many(request.user, serializer.validated_data['user_ids'])
+        return Response({'results': [{'id': pk, 'status': result} for pk, result in results.items()]},
+                        status=status.HTTP_200_OK)
+
+class BulkUnfollowView(APIView):
+    """POST /unfollow/bulk/ {"user_ids": [...]}: unfollow many accounts with one DELETE."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = BulkFollowSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = graph.unfollow_many(request.user, serializer.validated_data['user_ids'])
+        return Response({'results': [{'id': pk, 'status': result} for pk, result in results.items()]},
+                        status=status.HTTP_200_OK)
+
+class FollowSuggestionsView(APIView):
+    """
+    GET /suggestions/?limit=N: accounts followed by the people you follow,
+    best mutual count first. Reads the precomputed FollowSuggestion table
+    (see compute_follow_suggestions); accounts followed since the last run
+    are dropped using the cached follow graph.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 50
+
+    def get(self, request):
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = self.default_limit
+        suggestions = FollowSuggestion.objects.filter(user=request.user)
+        following = graph.get_following(request.user.pk)
+        if following:
+            suggestions = suggestions.exclude(candidate_id__in=following)
+        suggestions = suggestions.select_related('candidate').order_by('-score', 'candidate_id')[:max(limit, 1)]
+        return Response({'results': FollowSuggestionSerializer(suggestions, many=True).data},
+                        status=status.HTTP_200_OK)
+
 class UserProfileView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
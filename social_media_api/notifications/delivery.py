@@ -0,0 +1,237 @@
+import atexit
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Mod
+from django.utils import timezone
+
+from .inbox import invalidate_unread_counts
+from .models import Notification, NotificationActor, NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+# Notifications are written off the request path, through a durable outbox.
+# notify() inserts a NotificationOutbox row in the caller's transaction, so an
+# event exists exactly when the change that caused it commits, and survives a
+# crash or kill of the process. Once the transaction commits, it wakes one of a
+# small pool of worker threads; each worker drains its shard of the outbox
+# (recipients modulo the pool size) in batches, folds repeated events on the
+# same target into one row and writes the batch with bulk_create /
+# bulk_update. Workers also poll every NOTIFICATIONS_POLL_INTERVAL seconds, so
+# rows left by a process that died, or written by another process, are picked
+# up too. Nothing depends on an external broker.
+#
+# Folded notifications count distinct actors (NotificationActor), so the same
+# user repeating an event is one of the "N people", however many batches it
+# spans.
+
+Event = namedtuple('Event', 'recipient_id actor_id verb target_ct_id target_id created_at')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def notify(recipient, actor, verb, target=None):
+    """Record a notification for ``recipient`` in the outbox; returns immediately."""
+    target_ct_id = target_id = None
+    if target is not None:
+        target_ct_id = ContentType.objects.get_for_model(target).pk
+        target_id = target.pk
+    event = Event(recipient.pk, actor.pk, verb, target_ct_id, target_id, timezone.now())
+
+    if not _setting('NOTIFICATIONS_ASYNC', True):
+        deliver([event])
+        return
+    spill([event])
+    transaction.on_commit(lambda: dispatcher.wake(event.recipient_id))
+
+
+def deliver(events):
+    """Write a batch of events, merging them into recent unread notifications on the same target."""
+    groups = OrderedDict()
+    for event in events:
+        key = (event.recipient_id, event.verb, event.target_ct_id, event.target_id)
+        groups.setdefault(key, []).append(event)
+
+    window = timedelta(seconds=_setting('NOTIFICATIONS_AGGREGATION_WINDOW', 3600))
+    with transaction.atomic():
+        recent = Notification.objects.filter(
+            recipient_id__in={key[0] for key in groups},
+            verb__in={key[1] for key in groups},
+            unread=True,
+            timestamp__gte=timezone.now() - window,
+        ).order_by('timestamp')
+        if connection.features.has_select_for_update:
+            # Another process may be folding events into the same rows
+            recent = recent.select_for_update()
+        existing = {
+            (n.recipient_id, n.verb, n.target_content_type_id, n.target_object_id): n
+            for n in recent.only('id', 'recipient_id', 'verb', 'target_content_type_id', 'target_object_id')
+        }
+        # Actors already counted in the notifications this batch merges into
+        counted = set(
+            NotificationActor.objects.filter(
+                notification__in=[n.pk for n in existing.values()],
+                actor_id__in={event.actor_id for event in events},
+            ).values_list('notification_id', 'actor_id')
+        ) if existing else set()
+
+        now = timezone.now()
+        to_create, to_update, links = [], [], []
+        for key, group in groups.items():
+            recipient_id, verb, target_ct_id, target_id = key
+            latest = group[-1]
+            actors = list(dict.fromkeys(event.actor_id for event in group))
+            notification = existing.get(key)
+            if notification is None:
+                notification = Notification(
+                    recipient_id=recipient_id, actor_id=latest.actor_id, verb=verb,
+                    target_content_type_id=target_ct_id, target_object_id=target_id,
+                    actor_count=len(actors),
+                )
+                to_create.append((notification, actors))
+            else:
+                new_actors = [actor for actor in actors if (notification.pk, actor) not in counted]
+                notification.actor_id = latest.actor_id
+                notification.actor_count = F('actor_count') + len(new_actors)
+                notification.timestamp = now
+                to_update.append(notification)
+                links += [NotificationActor(notification=notification, actor_id=actor) for actor in new_actors]
+
+        _create_notifications([notification for notification, _ in to_create])
+        links += [
+            NotificationActor(notification=notification, actor_id=actor)
+            for notification, actors in to_create for actor in actors
+        ]
+        Notification.objects.bulk_update(to_update, ['actor', 'actor_count', 'timestamp'])
+        NotificationActor.objects.bulk_create(links)
+    recipients = {key[0] for key in groups}
+    invalidate_unread_counts(recipients)
+    # Again after commit, in case a reader cached the old count meanwhile
+    transaction.on_commit(lambda: invalidate_unread_counts(recipients))
+    return len(to_create), len(to_update)
+
+
+def _create_notifications(notifications):
+    # The actor links need the new primary keys
+    if connection.features.can_return_rows_from_bulk_insert:
+        Notification.objects.bulk_create(notifications)
+    else:
+        for notification in notifications:
+            notification.save(force_insert=True)
+
+
+def spill(events):
+    """Write events to the outbox table, for the delivery workers to pick up."""
+    NotificationOutbox.objects.bulk_create([
+        NotificationOutbox(
+            recipient_id=e.recipient_id, actor_id=e.actor_id, verb=e.verb,
+            target_content_type_id=e.target_ct_id, target_object_id=e.target_id,
+            created_at=e.created_at,
+        )
+        for e in events
+    ])
+
+
+def drain_outbox(batch_size=None, shard=None):
+    """
+    Deliver the events in the outbox, or only those of ``shard`` (an (index,
+    count) pair: recipients whose id modulo count is index); returns the
+    number of events handled.
+    """
+    batch_size = batch_size or _setting('NOTIFICATIONS_BATCH_SIZE', 500)
+    handled = 0
+    while True:
+        with transaction.atomic():
+            rows = NotificationOutbox.objects.order_by('pk')
+            if shard is not None:
+                index, count = shard
+                rows = rows.annotate(shard=Mod('recipient_id', count)).filter(shard=index)
+            if transaction.get_connection().features.has_select_for_update_skip_locked:
+                # Other processes' workers skip the rows this one claimed
+                rows = rows.select_for_update(skip_locked=True)
+            rows = list(rows[:batch_size])
+            if not rows:
+                return handled
+            deliver([
+                Event(r.recipient_id, r.actor_id, r.verb, r.target_content_type_id, r.target_object_id, r.created_at)
+                for r in rows
+            ])
+            NotificationOutbox.objects.filter(pk__in=[r.pk for r in rows]).delete()
+        handled += len(rows)
+
+
+class Dispatcher:
+    """
+    Pool of worker threads, each draining one shard of the outbox.
+
+    Events are sharded by recipient so one recipient's events are always
+    merged by the same worker of a process and its batches never race on a
+    row. The wake-up events only save a worker from waiting for its next poll;
+    the outbox rows are the queue.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeups = []
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def wake(self, recipient_id):
+        if not self._threads:
+            self.start()
+        self._wakeups[recipient_id % len(self._wakeups)].set()
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            workers = max(1, _setting('NOTIFICATIONS_WORKERS', 2))
+            for index in range(workers):
+                wakeup = threading.Event()
+                thread = threading.Thread(
+                    target=self._run, args=(wakeup, (index, workers)),
+                    name=f'notifications-{index}', daemon=True,
+                )
+                self._wakeups.append(wakeup)
+                self._threads.append(thread)
+                thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout=5):
+        # Undelivered events stay in the outbox for the next start
+        self._stopping.set()
+        for wakeup in self._wakeups:
+            wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _run(self, wakeup, shard):
+        poll_interval = _setting('NOTIFICATIONS_POLL_INTERVAL', 5)
+        linger = _setting('NOTIFICATIONS_LINGER', 0.05)
+        while not self._stopping.is_set():
+            self._safely(drain_outbox, None, shard)
+            if wakeup.wait(poll_interval) and not self._stopping.is_set():
+                # Give the batch a moment to fill up before reading it
+                self._stopping.wait(linger)
+            wakeup.clear()
+
+    def _safely(self, func, *args):
+        try:
+            func(*args)
+            return True
+        except Exception:
+            logger.exception("Notification worker failed in %s", func.__name__)
+            return False
+        finally:
+            close_old_connections()
+
+
+dispatcher = Dispatcher()
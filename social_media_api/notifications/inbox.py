@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from .models import Notification
+from .prefetch import with_related
+
+# Unread badge counts are cached per user. Delivery and mark-as-read drop the
+# cached value, at once and again after their transaction commits, so the next
+# read recounts from the (recipient, unread) index. The cache alias is
+# NOTIFICATIONS_CACHE (see CACHES in settings), which must be shared by every
+# worker process: with a per-process cache, marking notifications read in one
+# worker would leave the others showing the old count.
+NOTIFICATIONS_CACHE = getattr(settings, 'NOTIFICATIONS_CACHE', 'default')
+UNREAD_TIMEOUT = 300
+
+
+def _cache():
+    return caches[NOTIFICATIONS_CACHE]
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def unread_count(user_id):
+    cache = _cache()
+    count = cache.get(_unread_key(user_id))
+    if count is None:
+        count = Notification.objects.filter(recipient_id=user_id, unread=True).count()
+        cache.set(_unread_key(user_id), count, UNREAD_TIMEOUT)
+    return count
+
+
+def invalidate_unread_counts(user_ids):
+    _cache().delete_many([_unread_key(user_id) for user_id in user_ids])
+
+
+def mark_read(user_id, ids=None):
+    """Mark the user's notifications (or only ``ids``) as read in a single UPDATE."""
+    notifications = Notification.objects.filter(recipient_id=user_id, unread=True)
+    if ids is not None:
+        notifications = notifications.filter(pk__in=ids)
+    updated = notifications.update(unread=False)
+    # Not set to 0: a delivery committing meanwhile would be hidden from every worker
+    invalidate_unread_counts([user_id])
+    transaction.on_commit(lambda: invalidate_unread_counts([user_id]))
+    return updated
+
+
+def inbox(user):
+    """A user's notifications; pass each page through prefetch_targets() before rendering."""
+    return with_related(Notification.objects.filter(recipient=user))
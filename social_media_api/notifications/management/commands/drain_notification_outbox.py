@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from notifications.delivery import drain_outbox
+
+
+class Command(BaseCommand):
+    help = "Deliver notification events parked in the outbox table."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help="Events delivered per transaction (default: NOTIFICATIONS_BATCH_SIZE).")
+
+    def handle(self, *args, batch_size, **options):
+        handled = drain_outbox(batch_size)
+        self.stdout.write(self.style.SUCCESS(f"Delivered {handled} queued notification events."))
@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -17,6 +18,48 @@ class Notification(models.Model):
     
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    # Number of actors folded into this row: repeated events on the same
+    # target become one "N people liked your post" notification
+    actor_count = models.PositiveIntegerField(default=1)
+    unread = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            # Inbox pages: one recipient, newest first (keyset on timestamp, id)
+            models.Index(fields=['recipient', '-timestamp', '-id'], name='notification_inbox_idx'),
+            # Unread badge: COUNT(*) is answered from the index alone
+            models.Index(fields=['recipient', 'unread'], name='notification_unread_idx'),
+        ]
+
+    def __str__(self):
+        actor = str(self.actor)
+        if self.actor_count > 1:
+            actor = f"{actor} and {self.actor_count - 1} others"
+        return f"{actor} {self.verb} {self.target} → {self.recipient}"
+
+
+# The distinct actors folded into a notification, so an actor who repeats an
+# event (likes, unlikes and likes again) is counted in actor_count once
+class NotificationActor(models.Model):
+    notification = models.ForeignKey(Notification, on_delete=models.CASCADE, related_name='actor_links')
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['notification', 'actor'], name='notification_actor_unique'),
+        ]
+
+
+# Durable queue of notification events that have not been delivered yet.
+# notify() writes a row in the caller's transaction; the delivery workers
+# drain the table in batches (see notifications/delivery.py).
+class NotificationOutbox(models.Model):
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    actor = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    verb = models.CharField(max_length=255)
+    target_content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
+    target_object_id = models.PositiveIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
     def __str__(self):
-        return f"{self.actor} {self.verb} {self.target} → {self.recipient}"
-# Create your models here.
+        return f"pending: {self.actor_id} {self.verb} → {self.recipient_id}"
@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+
+from .models import Notification
+
+# Relations each target model's __str__/serializer reaches for, loaded with the
+# target itself so rendering a notification never goes back to the database.
+TARGET_RELATED = {
+    'posts.post': ('author',),
+    'posts.comment': ('author', 'post'),
+}
+
+
+def with_related(notifications):
+    """select_related everything Notification.__str__ touches except the target."""
+    return notifications.select_related('actor', 'recipient', 'target_content_type')
+
+
+def prefetch_targets(notifications, related=None):
+    """
+    Load Notification.target for many notifications at once.
+
+    Targets are grouped by content type and fetched with one ``pk IN (...)``
+    query per type (with that type's TARGET_RELATED joined in), then cached on
+    each notification, so the cost is one query per content type rather than
+    one per row. Returns the notifications as a list.
+    """
+    related = TARGET_RELATED if related is None else related
+    notifications = list(notifications)
+
+    wanted = defaultdict(set)
+    for notification in notifications:
+        if notification.target_content_type_id is not None and notification.target_object_id is not None:
+            wanted[notification.target_content_type_id].add(notification.target_object_id)
+
+    found = {}
+    for ct_id, object_ids in wanted.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is None:
+            continue
+        targets = model._base_manager.filter(pk__in=object_ids)
+        if related.get(model._meta.label_lower):
+            targets = targets.select_related(*related[model._meta.label_lower])
+        for target in targets:
+            found[ct_id, target.pk] = target
+
+    # A missing target (deleted since) is cached as None rather than re-queried
+    field = Notification._meta.get_field('target')
+    for notification in notifications:
+        field.set_cached_value(
+            notification, found.get((notification.target_content_type_id, notification.target_object_id))
+        )
+    return notifications
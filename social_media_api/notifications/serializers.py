@@ -0,0 +1,26 @@
+from rest_framework import serializers
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    actor = serializers.CharField(source='actor.username', read_only=True)
+    target = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = ['id', 'actor', 'actor_count', 'verb', 'target', 'unread', 'timestamp']
+        read_only_fields = fields
+
+    def get_target(self, notification):
+        if notification.target is None:
+            return None
+        return {
+            'type': notification.target_content_type.model,
+            'id': notification.target_object_id,
+            'display': str(notification.target),
+        }
+
+
+class MarkReadSerializer(serializers.Serializer):
+    # Leave out to mark every unread notification as read
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=1000)
@@ -1,3 +1,155 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import caches
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from django.utils import timezone
+
+from accounts.models import User
+from posts.models import Comment, Post
+from . import delivery, inbox
+from .delivery import Event, deliver, drain_outbox, notify, spill
+from .models import Notification, NotificationActor, NotificationOutbox
+from .prefetch import prefetch_targets, with_related
+
+
+@override_settings(NOTIFICATIONS_ASYNC=False)
+class NotificationDeliveryTests(TestCase):
+    def setUp(self):
+        caches['follow_graph'].clear()
+        self.owner = User.objects.create_user(username='owner', password='pass12345')
+        self.fans = [User.objects.create_user(username=f'fan{i}', password='pass12345') for i in range(3)]
+        self.post = Post.objects.create(author=self.owner, title='Viral', content='...')
+
+    def test_likes_on_one_post_are_aggregated(self):
+        for fan in self.fans:
+            notify(recipient=self.owner, actor=fan, verb='liked your post', target=self.post)
+
+        notification = Notification.objects.get(recipient=self.owner)
+        self.assertEqual(notification.actor_count, 3)
+        self.assertEqual(notification.actor, self.fans[-1])
+        self.assertIn('and 2 others', str(notification))
+
+    def test_outbox_is_drained_into_notifications(self):
+        spill([
+            Event(self.owner.pk, fan.pk, 'started following you', None, None, timezone.now())
+            for fan in self.fans
+        ])
+        self.assertEqual(drain_outbox(), 3)
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(Notification.objects.get(recipient=self.owner).actor_count, 3)
+
+    def test_repeated_actor_is_counted_once_across_batches(self):
+        def like(fan):
+            return Event(self.owner.pk, fan.pk, 'liked your post', None, None, timezone.now())
+
+        deliver([like(self.fans[0]), like(self.fans[0])])
+        deliver([like(self.fans[0]), like(self.fans[1])])
+        deliver([like(self.fans[1])])
+        notification = Notification.objects.get(recipient=self.owner)
+        self.assertEqual(notification.actor_count, 2)
+        self.assertEqual(notification.actor, self.fans[1])
+        self.assertEqual(NotificationActor.objects.filter(notification=notification).count(), 2)
+
+    def test_outbox_shards_by_recipient(self):
+        spill([Event(fan.pk, self.owner.pk, 'started following you', None, None, timezone.now()) for fan in self.fans])
+        even = [fan for fan in self.fans if fan.pk % 2 == 0]
+        self.assertEqual(drain_outbox(shard=(0, 2)), len(even))
+        self.assertEqual(set(Notification.objects.values_list('recipient_id', flat=True)), {fan.pk for fan in even})
+        self.assertEqual(drain_outbox(shard=(1, 2)), len(self.fans) - len(even))
+
+
+@override_settings(NOTIFICATIONS_ASYNC=True)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        caches['follow_graph'].clear()
+        self.owner = User.objects.create_user(username='owner', password='pass12345')
+        self.fan = User.objects.create_user(username='fan', password='pass12345')
+
+    def test_event_is_written_with_the_callers_transaction(self):
+        with mock.patch.object(delivery.dispatcher, 'wake') as wake, \
+                self.captureOnCommitCallbacks(execute=True):
+            notify(recipient=self.owner, actor=self.fan, verb='started following you')
+            # In the outbox before commit; the workers are only woken after it
+            self.assertEqual(NotificationOutbox.objects.get().recipient_id, self.owner.pk)
+            wake.assert_not_called()
+        wake.assert_called_once_with(self.owner.pk)
+        self.assertFalse(Notification.objects.exists())
+
+        drain_outbox()
+        self.assertEqual(Notification.objects.get().actor, self.fan)
+
+
+@override_settings(NOTIFICATIONS_ASYNC=False, SECURE_SSL_REDIRECT=False)
+class InboxAPITests(APITestCase):
+    def setUp(self):
+        caches['follow_graph'].clear()
+        caches['notifications'].clear()
+        self.owner = User.objects.create_user(username='owner', password='pass12345')
+        self.fan = User.objects.create_user(username='fan', password='pass12345')
+        self.posts = [Post.objects.create(author=self.owner, title=f'Post {i}', content='...') for i in range(5)]
+        for post in self.posts:
+            notify(recipient=self.owner, actor=self.fan, verb='liked your post', target=post)
+        self.client.force_authenticate(self.owner)
+
+    def test_inbox_lists_newest_first(self):
+        response = self.client.get('/api/notifications/')
+        self.assertEqual(response.status_code, 200)
+        targets = [n['target']['id'] for n in response.data['results']]
+        self.assertEqual(targets, [post.pk for post in reversed(self.posts)])
+
+    def test_mark_read_updates_unread_count(self):
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread'], 5)
+        first = Notification.objects.filter(recipient=self.owner).first()
+        response = self.client.post('/api/notifications/mark-read/', {'ids': [first.pk]}, format='json')
+        self.assertEqual(response.data, {'marked_read': 1, 'unread': 4})
+        response = self.client.post('/api/notifications/mark-read/', {}, format='json')
+        self.assertEqual(response.data, {'marked_read': 4, 'unread': 0})
+
+    def test_mark_read_reaches_other_workers(self):
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection('notifications')
+        key = inbox._unread_key(self.owner.pk)
+        self.assertEqual(self.client.get('/api/notifications/unread-count/').data['unread'], 5)
+        self.assertEqual(other_worker.get(key), 5)
+        inbox.mark_read(self.owner.pk)
+        self.assertIsNone(other_worker.get(key))
+
+
+@override_settings(NOTIFICATIONS_ASYNC=False)
+class TargetPrefetchBenchmark(TestCase):
+    """Rendering notifications costs O(content types) queries, not O(rows)."""
+
+    def setUp(self):
+        caches['follow_graph'].clear()
+        self.owner = User.objects.create_user(username='owner', password='pass12345')
+        self.fan = User.objects.create_user(username='fan', password='pass12345')
+
+    def make_notifications(self, count):
+        for i in range(count):
+            post = Post.objects.create(author=self.owner, title=f'Post {i}', content='...')
+            comment = Comment.objects.create(post=post, author=self.fan, content='Nice')
+            notify(recipient=self.owner, actor=self.fan, verb='liked your post', target=post)
+            notify(recipient=self.owner, actor=self.fan, verb='commented on your post', target=comment)
+
+    def render(self, notifications):
+        return [str(notification) for notification in notifications]
+
+    def count_queries(self, func):
+        with CaptureQueriesContext(connection) as queries:
+            func()
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        grouped, naive = [], []
+        for total in (5, 25):
+            self.make_notifications(total - Notification.objects.count() // 2)
+            queryset = Notification.objects.filter(recipient=self.owner)
+            grouped.append(self.count_queries(lambda: self.render(prefetch_targets(with_related(queryset)))))
+            naive.append(self.count_queries(lambda: self.render(queryset)))
+
+        # 1 for the notifications + 1 per content type (posts, comments)
+        self.assertEqual(grouped, [3, 3])
+        self.assertGreater(naive[1], naive[0])
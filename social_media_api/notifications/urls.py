@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import NotificationListView, MarkNotificationsReadView, UnreadCountView
+
+urlpatterns = [
+    path("", NotificationListView.as_view(), name="notification-list"),
+    path("mark-read/", MarkNotificationsReadView.as_view(), name="notification-mark-read"),
+    path("unread-count/", UnreadCountView.as_view(), name="notification-unread-count"),
+]
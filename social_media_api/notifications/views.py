@@ -1,3 +1,46 @@
-from django.shortcuts import render
+from rest_framework import generics, permissions, status
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from learnlab.pagination import KeysetPagination
+from .inbox import inbox, mark_read, unread_count
+from .prefetch import prefetch_targets
+from .serializers import MarkReadSerializer, NotificationSerializer
+
+
+class NotificationListView(generics.ListAPIView):
+    """GET /api/notifications/ → the user's inbox, newest first (?unread=true for unread only)."""
+    serializer_class = NotificationSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-timestamp', '-id')
+
+    def get_queryset(self):
+        notifications = inbox(self.request.user)
+        if self.request.query_params.get('unread') in ('1', 'true'):
+            notifications = notifications.filter(unread=True)
+        return notifications
+
+    def paginate_queryset(self, queryset):
+        # One query per target content type for the whole page
+        page = super().paginate_queryset(queryset)
+        return prefetch_targets(page) if page is not None else None
+
+
+class MarkNotificationsReadView(APIView):
+    """POST /api/notifications/mark-read/ with {"ids": [...]} or {} for all."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        updated = mark_read(request.user.pk, serializer.validated_data.get('ids'))
+        return Response({'marked_read': updated, 'unread': unread_count(request.user.pk)}, status=status.HTTP_200_OK)
+
+
+class UnreadCountView(APIView):
+    """GET /api/notifications/unread-count/ → cached unread badge count."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        return Response({'unread': unread_count(request.user.pk)})
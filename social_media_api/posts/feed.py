@@ -0,0 +1,88 @@
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import F, Q, Window
+from django.db.models.functions import RowNumber
+
+from accounts import graph
+from accounts.models import User
+from .models import FeedEntry, Post, PullAuthor
+
+# Home feeds are materialized when a post is written (fan-out-on-write): every
+# follower of the author gets a FeedEntry row, so reading a feed is one indexed
+# scan over that user's entries no matter how many accounts they follow.
+#
+# Authors with more followers than FEED_FANOUT_THRESHOLD are switched to
+# fan-out-on-read: their posts are not copied and are merged in at read time,
+# so one post from a very large account doesn't write millions of rows.
+
+FANOUT_THRESHOLD = getattr(settings, 'FEED_FANOUT_THRESHOLD', 1000)
+FANOUT_BATCH_SIZE = getattr(settings, 'FEED_FANOUT_BATCH_SIZE', 1000)
+BACKFILL_LIMIT = getattr(settings, 'FEED_BACKFILL_LIMIT', 50)
+
+# Edge table of User.followers: from_user is followed by to_user
+Follow = User.followers.through
+
+
+def followed_ids(user_id):
+    return Follow.objects.filter(to_user_id=user_id).values_list('from_user_id', flat=True)
+
+
+def _bulk_insert(entries):
+    entries = iter(entries)
+    while True:
+        batch = list(islice(entries, FANOUT_BATCH_SIZE))
+        if not batch:
+            break
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out_post(post):
+    """Copy a new post into the feed of every follower of its author."""
+    if graph.follower_count(post.author_id) >= FANOUT_THRESHOLD:
+        PullAuthor.objects.get_or_create(author_id=post.author_id)
+        return
+    _bulk_insert(
+        FeedEntry(owner_id=owner_id, post_id=post.pk, author_id=post.author_id, created_at=post.created_at)
+        for owner_id in graph.get_followers(post.author_id)
+    )
+
+
+def backfill_feed(owner_id, author_ids):
+    """Seed a feed with recent posts from newly followed authors."""
+    pushed = set(author_ids) - set(
+        PullAuthor.objects.filter(author_id__in=author_ids).values_list('author_id', flat=True)
+    )
+    if not pushed:
+        return
+    # The newest BACKFILL_LIMIT posts of every author, in a single query
+    recent = (
+        Post.objects.filter(author_id__in=pushed)
+        .annotate(rank=Window(RowNumber(), partition_by=F('author_id'), order_by=F('created_at').desc()))
+        .filter(rank__lte=BACKFILL_LIMIT)
+        .values_list('pk', 'author_id', 'created_at')
+    )
+    _bulk_insert(
+        FeedEntry(owner_id=owner_id, post_id=post_id, author_id=author_id, created_at=created_at)
+        for post_id, author_id, created_at in recent
+    )
+
+
+def remove_authors_from_feed(owner_id, author_ids):
+    FeedEntry.objects.filter(owner_id=owner_id, author_id__in=author_ids).delete()
+
+
+def pulled_author_ids(user):
+    """Followed authors whose posts are merged in at read time."""
+    return list(
+        PullAuthor.objects.filter(author_id__in=followed_ids(user.pk)).values_list('author_id', flat=True)
+    )
+
+
+def get_feed(user):
+    """Posts from accounts the user follows, newest first."""
+    in_feed = Q(feed_entries__owner=user)
+    pulled = pulled_author_ids(user)
+    if pulled:
+        in_feed = Q(pk__in=FeedEntry.objects.filter(owner=user).values('post_id')) | Q(author_id__in=pulled)
+    return Post.objects.filter(in_feed).select_related('author').order_by('-created_at', '-id')
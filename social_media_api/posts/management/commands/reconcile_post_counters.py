@@ -0,0 +1,59 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce, Now
+
+from posts import versions
+from posts.models import Comment, Like, Post
+
+
+def _live_count(model):
+    # Correlated COUNT(*) for one post, so counting likes and comments
+    # together doesn't multiply rows the way two joins would
+    counts = (
+        model.objects.filter(post=OuterRef('pk'))
+        .order_by()
+        .values('post')
+        .annotate(n=Count('*'))
+        .values('n')
+    )
+    return Coalesce(Subquery(counts), 0)
+
+
+class Command(BaseCommand):
+    help = "Recompute Post.like_count and Post.comment_count and fix rows that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help="Number of posts checked per batch (default: 5000).")
+
+    def handle(self, *args, batch_size, **options):
+        checked = fixed = 0
+        last_pk = 0
+        while True:
+            batch = list(
+                Post.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size]
+            )
+            if not batch:
+                break
+            last_pk = batch[-1]
+            checked += len(batch)
+
+            drifted = list(
+                Post.objects.filter(pk__in=batch)
+                .annotate(live_likes=_live_count(Like), live_comments=_live_count(Comment))
+                .filter(~Q(like_count=F('live_likes')) | ~Q(comment_count=F('live_comments')))
+                .values_list('pk', flat=True)
+            )
+            if drifted:
+                # Recount inside the UPDATE itself so increments that landed
+                # since the check above are not lost
+                fixed += Post.objects.filter(pk__in=drifted).update(
+                    like_count=_live_count(Like),
+                    comment_count=_live_count(Comment),
+                    changed_at=Now(),
+                )
+
+        # Also covers posts bulk-created without signals (seed_posts)
+        versions.posts.invalidate()
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} posts, fixed {fixed}."))
@@ -0,0 +1,109 @@
+import random
+from itertools import accumulate, islice
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from accounts import graph
+from accounts.models import User
+from posts import feed
+from posts.models import Comment, FeedEntry, Like, Post, PullAuthor
+
+WORDS = (
+    "django query index cache feed follow post like comment python database latency "
+    "throughput shard replica batch stream queue worker signal model view serializer"
+).split()
+
+
+def _batches(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+class Command(BaseCommand):
+    help = (
+        "Create synthetic posts, likes and comments for benchmarks, and materialize "
+        "the home feeds of the authors' followers. Run seed_users first."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50000,
+                            help="Number of posts to create (default: 50000).")
+        parser.add_argument('--avg-likes', type=int, default=10,
+                            help="Average likes per post (default: 10).")
+        parser.add_argument('--avg-comments', type=int, default=3,
+                            help="Average comments per post (default: 3).")
+        parser.add_argument('--alpha', type=float, default=1.1,
+                            help="Zipf exponent of author activity and post popularity (default: 1.1).")
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help="Posts per batch (default: 2000).")
+        parser.add_argument('--seed', type=int, default=0,
+                            help="Random seed, for repeatable datasets (default: 0).")
+
+    def handle(self, *args, posts, avg_likes, avg_comments, alpha, batch_size, seed, **options):
+        rng = random.Random(seed)
+        user_ids = list(User.objects.values_list('pk', flat=True))
+        if not user_ids:
+            self.stderr.write("No users to post as; run seed_users first.")
+            return
+        rng.shuffle(user_ids)
+        cum_weights = list(accumulate(1 / (rank + 1) ** alpha for rank in range(len(user_ids))))
+
+        def count(mean):
+            return int(rng.expovariate(1 / mean)) if mean else 0
+
+        def text(words):
+            return ' '.join(rng.choices(WORDS, k=words))
+
+        totals = {'posts': 0, 'likes': 0, 'comments': 0, 'feed entries': 0}
+        for batch in _batches(range(posts), batch_size):
+            start = Post.objects.aggregate(last=Max('pk'))['last'] or 0
+            Post.objects.bulk_create(
+                Post(author_id=author_id, title=text(5).capitalize(), content=text(60))
+                for author_id in rng.choices(user_ids, cum_weights=cum_weights, k=len(batch))
+            )
+            created = list(Post.objects.filter(pk__gt=start).values_list('pk', 'author_id', 'created_at'))
+            totals['posts'] += len(created)
+
+            likes = {
+                (user_id, post_id)
+                for post_id, _, _ in created
+                for user_id in rng.sample(user_ids, min(count(avg_likes), len(user_ids)))
+            }
+            Like.objects.bulk_create((Like(user_id=u, post_id=p) for u, p in likes), batch_size=batch_size,
+                                     ignore_conflicts=True)
+            totals['likes'] += len(likes)
+
+            comments = [
+                Comment(post_id=post_id, author_id=rng.choice(user_ids), content=text(15))
+                for post_id, _, _ in created
+                for _ in range(count(avg_comments))
+            ]
+            Comment.objects.bulk_create(comments, batch_size=batch_size)
+            totals['comments'] += len(comments)
+
+            totals['feed entries'] += self.fan_out(created, batch_size)
+
+        # Like/comment counters were skipped by bulk_create; recount them
+        call_command('reconcile_post_counters', stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ", ".join(f"{n} {what}" for what, n in totals.items()) + "."
+        ))
+
+    def fan_out(self, created, batch_size):
+        # Same rules as feed.fan_out_post, with one follower lookup per batch
+        followers = graph.follower_ids({author_id for _, author_id, _ in created})
+        pulled = {author_id for author_id, ids in followers.items() if len(ids) >= feed.FANOUT_THRESHOLD}
+        PullAuthor.objects.bulk_create((PullAuthor(author_id=a) for a in pulled), ignore_conflicts=True)
+        entries = [
+            FeedEntry(owner_id=owner_id, post_id=post_id, author_id=author_id, created_at=created_at)
+            for post_id, author_id, created_at in created if author_id not in pulled
+            for owner_id in followers[author_id]
+        ]
+        FeedEntry.objects.bulk_create(entries, batch_size=batch_size, ignore_conflicts=True)
+        return len(entries)
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 16:50
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_existing(apps, schema_editor):
+    # Same correlated counts as reconcile_post_counters; without them the first
+    # unlike or comment delete on an older post would go below 0
+    Post = apps.get_model('posts', 'Post')
+
+    def live_count(model):
+        counts = (
+            model.objects.filter(post=OuterRef('pk'))
+            .order_by()
+            .values('post')
+            .annotate(n=Count('*'))
+            .values('n')
+        )
+        return Coalesce(Subquery(counts), 0)
+
+    Post.objects.update(
+        like_count=live_count(apps.get_model('posts', 'Like')),
+        comment_count=live_count(apps.get_model('posts', 'Comment')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_feedentry_pullauthor_post_post_author_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='like_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_existing, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F
+
+
+def stamp_existing_posts(apps, schema_editor):
+    # Until now counter updates moved updated_at, so it is the latest change
+    Post = apps.get_model('posts', 'Post')
+    Post.objects.update(changed_at=F('updated_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0006_comment_comment_created_idx_post_post_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.RunPython(stamp_existing_posts, migrations.RunPython.noop),
+    ]
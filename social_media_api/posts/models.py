@@ -8,7 +8,22 @@ class Post(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
-  
+    # Moves on every change to the post as the API shows it, counter updates
+    # included, and drives its conditional GET validators; updated_at only
+    # moves when the post itself is edited
+    changed_at = models.DateTimeField(auto_now=True)
+    # Denormalized counters, updated with F() by the like/comment views.
+    # `python manage.py reconcile_post_counters` repairs any drift.
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Pulled (fan-out-on-read) feeds scan one author's newest posts
+            models.Index(fields=['author', '-created_at'], name='post_author_created_idx'),
+            # The keyset-paginated post list walks (created_at, id) newest first
+            models.Index(fields=['-created_at', '-id'], name='post_created_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -20,6 +35,12 @@ class Comment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        # The keyset-paginated comment list walks (created_at, id) newest first
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='comment_created_idx'),
+        ]
+
     def __str__(self):
         return f'Comment by {self.author.username} on {self.post.title}'
     
@@ -32,4 +53,33 @@ class Like(models.Model):
         unique_together = ('user', 'post')
 
     def __str__(self):
-        return f'{self.user.username} likes {self.post.title}'
\ No newline at end of file
+        return f'{self.user.username} likes {self.post.title}'
+
+# One row per (feed owner, post): the materialized home feed built at write time.
+# created_at is copied from the post so a feed page is a single range scan
+# over (owner, created_at) without touching the posts table.
+class FeedEntry(models.Model):
+    owner = models.ForeignKey('accounts.User', related_name='feed_entries', on_delete=models.CASCADE)
+    post = models.ForeignKey(Post, related_name='feed_entries', on_delete=models.CASCADE)
+    author = models.ForeignKey('accounts.User', related_name='+', on_delete=models.CASCADE)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('owner', 'post')
+        indexes = [
+            models.Index(fields=['owner', '-created_at', '-post'], name='feedentry_owner_created_idx'),
+            models.Index(fields=['owner', 'author'], name='feedentry_owner_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.post_id} in feed of {self.owner_id}'
+
+
+# Authors with too many followers to fan out to. Their posts are not copied
+# into feeds; they are merged in when a follower reads the feed instead.
+class PullAuthor(models.Model):
+    author = models.OneToOneField('accounts.User', related_name='+', on_delete=models.CASCADE)
+    marked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'pull-mode author {self.author_id}'
@@ -4,7 +4,8 @@ from .models import Post, Comment
 class PostSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
-        fields = '__all__'
+        exclude = ['changed_at']  # internal, see Post.changed_at
+        read_only_fields = ['like_count', 'comment_count']
 
 class CommentSerializer(serializers.ModelSerializer):
     class Meta:
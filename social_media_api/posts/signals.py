@@ -0,0 +1,45 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from accounts.models import User
+from . import feed, versions
+from .models import FeedEntry, Post
+
+
+# Push every new post into the followers' materialized feeds
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    if created:
+        feed.fan_out_post(instance)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_versions(sender, **kwargs):
+    versions.posts.invalidate()
+
+
+# Keep feeds in step with follows made through either side of the relation:
+# author.followers.add(user) is the forward side, user.following.add(author)
+# the reverse one.
+@receiver(m2m_changed, sender=User.followers.through)
+def sync_feed_on_follow(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'post_clear':
+        if reverse:
+            FeedEntry.objects.filter(owner=instance).delete()
+        else:
+            FeedEntry.objects.filter(author=instance).delete()
+        return
+    if action not in ('post_add', 'post_remove') or not pk_set:
+        return
+
+    if reverse:
+        edges = [(instance.pk, list(pk_set))]
+    else:
+        edges = [(follower_id, [instance.pk]) for follower_id in pk_set]
+
+    for owner_id, author_ids in edges:
+        if action == 'post_add':
+            feed.backfill_feed(owner_id, author_ids)
+        else:
+            feed.remove_authors_from_feed(owner_id, author_ids)
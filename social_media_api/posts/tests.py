@@ -1,3 +1,236 @@
-from django.test import TestCase
+import base64
+import json
+import time
+from unittest import mock
 
-# Create your tests here.
+from io import StringIO
+
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+from rest_framework.test import APITestCase
+
+from accounts.models import User
+from learnlab.testing import QueryBudgetMixin
+from . import feed, versions
+from .models import Comment, FeedEntry, Like, Post, PullAuthor
+
+
+class FollowGraphResetMixin:
+    # User ids are reused between tests, so cached follower sets must not leak
+    def setUp(self):
+        super().setUp()
+        caches['follow_graph'].clear()
+
+
+class FeedFanOutTests(FollowGraphResetMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.author.followers.add(self.reader)
+
+    def test_new_post_is_pushed_to_followers(self):
+        post = Post.objects.create(author=self.author, title='Hello', content='First post')
+        self.assertTrue(FeedEntry.objects.filter(owner=self.reader, post=post).exists())
+        self.assertEqual(list(feed.get_feed(self.reader)), [post])
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        other = User.objects.create_user(username='other', password='pass12345')
+        post = Post.objects.create(author=other, title='Earlier', content='Before the follow')
+        self.reader.following.add(other)
+        self.assertIn(post, feed.get_feed(self.reader))
+        self.reader.following.remove(other)
+        self.assertNotIn(post, feed.get_feed(self.reader))
+
+    @mock.patch.object(feed, 'FANOUT_THRESHOLD', 1)
+    def test_large_author_is_pulled_at_read_time(self):
+        post = Post.objects.create(author=self.author, title='Viral', content='Too many followers')
+        self.assertFalse(FeedEntry.objects.filter(post=post).exists())
+        self.assertTrue(PullAuthor.objects.filter(author=self.author).exists())
+        self.assertEqual(list(feed.get_feed(self.reader)), [post])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class FeedAPITests(FollowGraphResetMixin, APITestCase):
+    def test_feed_lists_followed_posts_newest_first(self):
+        author = User.objects.create_user(username='author', password='pass12345')
+        reader = User.objects.create_user(username='reader', password='pass12345')
+        reader.following.add(author)
+        first = Post.objects.create(author=author, title='One', content='1')
+        second = Post.objects.create(author=author, title='Two', content='2')
+        Post.objects.create(author=reader, title='Mine', content='not in my feed')
+
+        self.client.force_authenticate(reader)
+        response = self.client.get('/api/posts/feed/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p['id'] for p in response.data['results']], [second.id, first.id])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class KeysetPaginationTests(FollowGraphResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='writer', password='pass12345')
+        self.posts = [Post.objects.create(author=self.user, title=f'Post {i}', content='...') for i in range(5)]
+        self.client.force_authenticate(self.user)
+
+    def test_pages_are_stable_under_inserts(self):
+        first = self.client.get('/api/posts/posts/', {'page_size': 2}).data
+        self.assertEqual([p['id'] for p in first['results']], [self.posts[4].id, self.posts[3].id])
+        self.assertNotIn('count', first)
+
+        # A post written between page loads must not shift the next page
+        Post.objects.create(author=self.user, title='Late', content='...')
+        second = self.client.get(first['next']).data
+        self.assertEqual([p['id'] for p in second['results']], [self.posts[2].id, self.posts[1].id])
+
+        back = self.client.get(second['previous']).data
+        self.assertEqual(back['results'], first['results'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/api/posts/posts/', {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_values_are_validated(self):
+        # Well-formed cursors whose positions aren't a created_at and an id
+        for payload in ({'r': 0, 'p': ['garbage', 'x']}, [{'a': 1}, 1], {'r': 0, 'p': [None, None]},
+                        {'r': 0, 'p': [{'a': 1}, 1]}):
+            token = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+            with self.subTest(payload=payload):
+                self.assertEqual(self.client.get('/api/posts/posts/', {'cursor': token}).status_code, 404)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostCounterTests(FollowGraphResetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='fan', password='pass12345')
+        self.post = Post.objects.create(author=self.user, title='Counted', content='...')
+        self.client.force_authenticate(self.user)
+
+    def test_like_and_unlike_update_counter(self):
+        self.client.post(f'/api/posts/posts/{self.post.pk}/like/')
+        self.client.post(f'/api/posts/posts/{self.post.pk}/like/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 1)
+        self.client.post(f'/api/posts/posts/{self.post.pk}/unlike/')
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_counters_do_not_mark_the_post_edited(self):
+        updated_at = self.post.updated_at
+        self.client.post(f'/api/posts/posts/{self.post.pk}/like/')
+        self.client.post('/api/posts/comments/', {'post': self.post.pk, 'author': self.user.pk, 'content': 'Hi'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.updated_at, updated_at)
+        self.assertGreater(self.post.changed_at, updated_at)
+
+    def test_counter_never_goes_below_zero(self):
+        # A like the counter never saw, e.g. one written before the column existed
+        Like.objects.create(user=self.user, post=self.post)
+        response = self.client.post(f'/api/posts/posts/{self.post.pk}/unlike/')
+        self.assertLess(response.status_code, 300)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.like_count, 0)
+
+    def test_comment_create_and_delete_update_counter(self):
+        response = self.client.post('/api/posts/comments/', {
+            'post': self.post.pk, 'author': self.user.pk, 'content': 'Nice',
+        })
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+        self.client.delete(f"/api/posts/comments/{response.data['id']}/")
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+
+    def test_reconcile_command_repairs_drift(self):
+        Like.objects.create(user=self.user, post=self.post)
+        Comment.objects.create(post=self.post, author=self.user, content='Direct write')
+        call_command('reconcile_post_counters', stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertEqual((self.post.like_count, self.post.comment_count), (1, 1))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostQueryBudgetTests(FollowGraphResetMixin, QueryBudgetMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.client.force_authenticate(self.reader)
+
+    def make_posts(self, start, count):
+        # bulk_create skips the fan-out signal, so feed entries are added by hand
+        posts = Post.objects.bulk_create(
+            Post(author=self.author, title=f'Post {start + i}', content='...') for i in range(count)
+        )
+        FeedEntry.objects.bulk_create(
+            FeedEntry(owner=self.reader, post=post, author=self.author, created_at=post.created_at)
+            for post in posts
+        )
+        versions.posts.invalidate()
+
+    def test_post_list_does_not_grow_with_posts(self):
+        # The table version stamp + the page
+        self.assertQueriesFlat(self.make_posts, lambda: self.client.get('/api/posts/posts/'), budget=2)
+
+    def test_feed_does_not_grow_with_posts(self):
+        # Followed pull-authors + the feed page
+        self.assertQueriesFlat(self.make_posts, lambda: self.client.get('/api/posts/feed/'), budget=2)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class PostConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        caches['conditional'].clear()
+        self.author = User.objects.create_user(username='author', password='pass12345')
+        self.reader = User.objects.create_user(username='reader', password='pass12345')
+        self.post = Post.objects.create(author=self.author, title='Post', content='...')
+        self.client.force_authenticate(self.reader)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_list_answers_304_until_a_post_changes(self):
+        url = '/api/posts/posts/'
+        response = self.client.get(url)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.client.post(f'/api/posts/posts/{self.post.pk}/like/')
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_list_has_no_last_modified(self):
+        # Deleting a post doesn't move the newest changed_at, so If-Modified-Since
+        # alone would keep the deleted post in the client's copy
+        url = '/api/posts/posts/'
+        self.assertFalse(self.client.get(url).has_header('Last-Modified'))
+        self.post.delete()
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+        self.assertEqual(response.status_code, 200)
+
+    def test_detail_answers_304_until_the_post_changes(self):
+        url = f'/api/posts/posts/{self.post.pk}/'
+        response = self.client.get(url)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.client.post('/api/posts/comments/', {'post': self.post.pk, 'author': self.reader.pk, 'content': 'Hi'})
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_invalidation_reaches_other_workers(self):
+        # A second connection to the same cache stands in for another worker process
+        other_worker = caches.create_connection('conditional')
+        stamp = versions.posts.get()
+        self.assertEqual(other_worker.get(versions.posts.key), stamp)
+        Post.objects.create(author=self.author, title='Another', content='...')
+        self.assertIsNone(other_worker.get(versions.posts.key))
+
+    def test_authentication_is_checked_first(self):
+        url = '/api/posts/posts/'
+        response = self.client.get(url)
+        self.client.force_authenticate(None)
+        self.assertIn(self.revalidate(url, response).status_code, (401, 403))
@@ -7,11 +7,11 @@ from .views import FeedAPIView
 router = DefaultRouter()
 router.register(r'posts', PostViewSet, basename='post')
 router.register(r'comments', CommentViewSet, basename='comment')
-urlpatterns = router.urls
 
 urlpatterns = [
     path("feed/", FeedAPIView.as_view(), name="user-feed"),
     path("posts/<int:pk>/like/", LikePostView.as_view(), name="like-post"),
     path("posts/<int:pk>/unlike/", UnlikePostView.as_view(), name="unlike-post"),
-  
-]
\ No newline at end of file
+]
+
+urlpatterns += router.urls
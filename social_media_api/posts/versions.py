@@ -0,0 +1,8 @@
+from learnlab.conditional import TableVersion
+from .models import Post
+
+# Cached version stamp of the posts table for conditional GET on the post list
+# (see learnlab/conditional.py). posts/signals.py invalidates it on
+# every save and delete; the like and comment counter updates bump changed_at
+# and invalidate it themselves.
+posts = TableVersion(Post, field='changed_at')
@@ -1,54 +1,98 @@
 from django.shortcuts import render
 from rest_framework import viewsets
-from .models import Posts, Comments
+from .models import Post, Comment
 from rest_framework.generics import ListAPIView
 from .serializers import PostSerializer, CommentSerializer
+from .feed import get_feed
+from learnlab.pagination import KeysetPagination
 from rest_framework import permissions
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest, Now
+from learnlab.conditional import ConditionalGetMixin, make_etag, row_version
+from . import versions
 
 # Create your views here.
-class PostViewSet(viewsets.ModelViewSet):
-    queryset = Posts.objects.all()
+class PostViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
+    queryset = Post.objects.all()
     # Post.objects.all()
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    # 304 Not Modified for clients polling an unchanged list or post
+    def get_validators(self, request):
+        if self.action == 'list':
+            return versions.posts.etag(), None  # no Last-Modified, see learnlab/conditional.py
+        if self.action == 'retrieve':
+            changed_at = row_version(self.get_queryset(), self.kwargs['pk'], field='changed_at')
+            if changed_at is not None:
+                return make_etag(self.kwargs['pk'], changed_at), changed_at
+        return None, None
+
+
+def bump_counter(post_id, field, delta):
+    # The counters are part of the post's representation, so changed_at moves
+    # too; updated_at is left for real edits
+    # Never below 0, even if the counter had drifted low
+    Post.objects.filter(pk=post_id).update(**{field: Greatest(F(field) + delta, 0)}, changed_at=Now())
+    versions.posts.invalidate()
 
 class CommentViewSet(viewsets.ModelViewSet):
-    queryset = Comments.objects.all()
+    queryset = Comment.objects.all()
     #  Comment.objects.all()
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
+
+    # Post.comment_count is kept in step with every comment written or removed
+    @transaction.atomic
+    def perform_create(self, serializer):
+        comment = serializer.save()
+        bump_counter(comment.post_id, 'comment_count', 1)
+
+    @transaction.atomic
+    def perform_update(self, serializer):
+        old_post_id = serializer.instance.post_id
+        comment = serializer.save()
+        if comment.post_id != old_post_id:
+            bump_counter(old_post_id, 'comment_count', -1)
+            bump_counter(comment.post_id, 'comment_count', 1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        post_id = instance.post_id
+        instance.delete()
+        bump_counter(post_id, 'comment_count', -1)
 
 class FeedAPIView(ListAPIView):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
-        user = self.request.user
-        followed_users = user.following.all()
-        # ["Post.objects.filter(author__in=following_users).order_by"
-        return Posts.objects.filter(user__in=followed_users).order_by('-created_at')
+        # Reads the materialized feed built when posts are created (see posts/feed.py)
+        return get_feed(self.request.user)
 
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import Post, Like
-from notifications.models import Notification
+from notifications.delivery import notify
 
 class LikePostView(generics.GenericAPIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, pk):
         post = get_object_or_404(Post, pk=pk)
-        like, created = Like.objects.get_or_create(user=request.user, post=post)
+        with transaction.atomic():
+            like, created = Like.objects.get_or_create(user=request.user, post=post)
+            if created:
+                bump_counter(post.pk, 'like_count', 1)
 
         if created:
-            Notification.objects.create(
-                recipient=post.user,
-                actor=request.user,
-                verb='liked your post',
-                target=post
-            )
+            notify(recipient=post.author, actor=request.user, verb='liked your post', target=post)
             return Response({'detail': 'Post liked.'}, status=status.HTTP_201_CREATED)
         else:
             return Response({'detail': 'You already liked this post.'}, status=status.HTTP_200_OK)
@@ -59,9 +103,11 @@ class UnlikePostView(generics.GenericAPIView):
     def post(self, request, pk):
         # ["generics.get_object_or_404(Post, pk=pk)"]
         post = get_object_or_404(Post, pk=pk)
-        try:
-            like = Like.objects.get(user=request.user, post=post)
-            like.delete()
+        with transaction.atomic():
+            deleted, _ = Like.objects.filter(user=request.user, post=post).delete()
+            if deleted:
+                bump_counter(post.pk, 'like_count', -1)
+        if deleted:
             return Response({'detail': 'Post unliked.'}, status=status.HTTP_200_OK)
-        except Like.DoesNotExist:
-            return Response({'detail': 'You have not liked this post.'}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'detail': 'You have not liked this post.'}, status=status.HTTP_400_BAD_REQUEST)
+
@@ -12,9 +12,17 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import sys
+import tempfile
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Code shared with the other projects in this repository lives in learnlab/ at
+# its root
+REPO_DIR = BASE_DIR.parent
+if str(REPO_DIR) not in sys.path:
+    sys.path.append(str(REPO_DIR))
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.2/howto/deployment/checklist/
@@ -44,10 +52,12 @@ INSTALLED_APPS = [
     'accounts',
     'rest_framework.authtoken',
     'posts',
+    'notifications',
     'rest_framework_simplejwt'
 ]
 
 MIDDLEWARE = [
+    'learnlab.instrumentation.QueryMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -141,4 +151,70 @@ AUTH_USER_MODEL = 'accounts.User'
 Now Django needs to know:
 “Should I still use the default auth.User, or this new accounts.User as the official user model?”
 
-That’s exactly what AUTH_USER_MODEL does. """
\ No newline at end of file
+That’s exactly what AUTH_USER_MODEL does. """
+
+# Home feed fan-out (posts/feed.py). Authors with at least this many followers
+# are not fanned out on write; their posts are merged into feeds at read time.
+FEED_FANOUT_THRESHOLD = 1000
+FEED_FANOUT_BATCH_SIZE = 1000
+# How many recent posts are copied into a feed when a user follows someone
+FEED_BACKFILL_LIMIT = 50
+
+# Notification delivery (notifications/delivery.py). Events are written to
+# the outbox table in the caller's transaction and delivered in batches by
+# background threads; set NOTIFICATIONS_ASYNC = False to write them inline
+# (tests, shell scripts).
+NOTIFICATIONS_ASYNC = True
+NOTIFICATIONS_WORKERS = 2
+NOTIFICATIONS_BATCH_SIZE = 500
+# Seconds between outbox polls when no worker is woken (events left by other
+# processes, or by one that stopped)
+NOTIFICATIONS_POLL_INTERVAL = 5
+# Seconds a worker waits for a batch to fill before writing it
+NOTIFICATIONS_LINGER = 0.05
+# Events on the same target within this many seconds are merged into one
+# "N people liked your post" notification
+NOTIFICATIONS_AGGREGATION_WINDOW = 3600
+
+# Caches. follow_graph holds the follower adjacency sets (accounts/graph.py).
+# Every worker process must share it, or entries a follow drops in one worker
+# stay cached in the others: FileBasedCache shares it between the workers of
+# one host, django.core.cache.backends.redis.RedisCache (needs redis-py)
+# between hosts.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'conditional': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'social_media_api-conditional',
+    },
+    'follow_graph': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'social_media_api-follow-graph',
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+    'notifications': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'social_media_api-notifications',
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+# Tests get every FileBasedCache above in a temporary directory instead, so
+# they never clear or read the entries of a running server
+TEST_RUNNER = 'learnlab.testing.IsolatedCachesRunner'
+FOLLOW_GRAPH_CACHE = 'follow_graph'
+# Unread notification counts (notifications/inbox.py), shared by every worker
+NOTIFICATIONS_CACHE = 'notifications'
+# Version stamps for conditional GET (learnlab/conditional.py). Every worker
+# process must see the same stamps, or the ones that didn't handle a write keep
+# answering 304: FileBasedCache shares them on one host, Redis between hosts.
+CONDITIONAL_CACHE = 'conditional'
+FOLLOW_GRAPH_TIMEOUT = 3600
+
+# Per-view query/latency metrics (see learnlab/instrumentation.py), scraped from
+# /internal/metrics/ by staff users, or by a scraper sending
+# "Authorization: Bearer <INSTRUMENTATION_METRICS_TOKEN>" (None turns that off)
+INSTRUMENTATION_METRICS_TOKEN = os.environ.get('INSTRUMENTATION_METRICS_TOKEN')
+INSTRUMENTATION_SERVER_TIMING = DEBUG
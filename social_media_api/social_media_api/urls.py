@@ -17,8 +17,12 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from learnlab.instrumentation import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('internal/metrics/', metrics_view, name='metrics'),
     path('api/accounts/', include('accounts.urls')),
      path('api/posts/', include('posts.urls')),
+    path('api/notifications/', include('notifications.urls')),
 ]